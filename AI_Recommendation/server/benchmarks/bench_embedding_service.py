@@ -0,0 +1,125 @@
+"""
+Embedding throughput and memory: per-worker models vs the shared service.
+
+For each HTTP worker count, "local" starts that many processes that each
+load their own model (today's `uvicorn --workers N`), while "service"
+starts that many clients of one embedding_service.py pool. Every worker
+encodes the same query workload; the report gives aggregate texts/sec and
+total peak RSS across worker and model processes.
+
+With the default fake embedder RSS mostly reflects interpreter and library
+overhead; set EMBEDDING_BACKEND=sentence-transformers to include the model.
+
+Usage:
+    python benchmarks/bench_embedding_service.py --workers 1 2 4 --pool-size 2
+"""
+import argparse
+import multiprocessing
+import os
+import secrets
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from bench_common import environment_info, peak_rss_mb, write_report
+from bench_load import query_pool
+
+
+def process_peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak RSS of another process (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _worker(mode: str, address: Optional[str], requests: int, batch_size: int,
+            start: Any, results: Any) -> None:
+    if mode == "service":
+        from embedding_service import EmbeddingServiceClient
+        model = EmbeddingServiceClient(address)
+    else:
+        from embeddings import load_local_model
+        model = load_local_model()
+
+    texts = query_pool(requests * batch_size, seed=os.getpid())
+    start.wait()
+    started = time.time()
+    for i in range(requests):
+        model.encode(texts[i * batch_size:(i + 1) * batch_size])
+    results.put({"started": started, "finished": time.time(), "texts": requests * batch_size,
+                 "peak_rss_mb": peak_rss_mb()})
+
+
+def run_mode(mode: str, workers: int, requests: int, batch_size: int, pool_size: int) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    service = None
+    address = None
+    with tempfile.TemporaryDirectory(prefix="bench-embed-") as scratch:
+        if mode == "service":
+            from embedding_service import AUTHKEY_ENV, EmbeddingService
+            # Spawned workers inherit the environment, so a one-off key reaches the clients too
+            os.environ.setdefault(AUTHKEY_ENV, secrets.token_hex(32))
+            address = os.path.join(scratch, "embeddings.sock")
+            service = EmbeddingService(address, pool_size)
+            service.start()
+
+        start = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(target=_worker, args=(mode, address, requests, batch_size, start, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        service_rss = 0.0
+        if service is not None:
+            service_rss = sum(process_peak_rss_mb(pid) or 0.0 for pid in service.worker_pids)
+            service.stop()
+
+    elapsed = max(r["finished"] for r in reports) - min(r["started"] for r in reports)
+    worker_rss = sum(r["peak_rss_mb"] or 0.0 for r in reports)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "pool_size": pool_size if mode == "service" else workers,
+        "texts": sum(r["texts"] for r in reports),
+        "texts_per_sec": round(sum(r["texts"] for r in reports) / elapsed, 1),
+        "worker_rss_mb": round(worker_rss, 1),
+        "model_rss_mb": round(service_rss, 1),
+        "total_rss_mb": round(worker_rss + service_rss, 1),
+    }
+
+
+def run(worker_counts: List[int] = (1, 2, 4), requests: int = 200, batch_size: int = 8,
+        pool_size: int = 2) -> List[Dict[str, Any]]:
+    return [
+        run_mode(mode, workers, requests, batch_size, pool_size)
+        for workers in worker_counts
+        for mode in ("local", "service")
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker models with the shared embedding service")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=200, help="encode() calls per worker")
+    parser.add_argument("--batch-size", type=int, default=8, help="Texts per encode() call")
+    parser.add_argument("--pool-size", type=int, default=2, help="Model processes in the service")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.workers, args.requests, args.batch_size, args.pool_size)
+    write_report({"environment": environment_info(), "embedding_service": report}, args.output)
+
+
+if __name__ == "__main__":
+    main()
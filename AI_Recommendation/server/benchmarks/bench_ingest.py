@@ -0,0 +1,92 @@
+"""
+Ingest throughput and memory at increasing catalog sizes.
+
+Each size runs in a fresh subprocess inside a scratch directory so peak RSS
+is per run rather than the high-water mark of the whole suite.
+
+    batch   setup_chromadb.create_chroma_collection (whole catalog in memory)
+    stream  stream_ingest.stream_ingest (bounded read -> encode -> write)
+
+Usage:
+    python benchmarks/bench_ingest.py --sizes 1000 100000 1000000 --modes batch stream
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from bench_common import environment_info, peak_rss_mb, working_directory, write_report
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+
+def run_single(size: int, mode: str, compute_similar: bool) -> Dict[str, Any]:
+    """Ingest one synthetic catalog in the current process"""
+    from synthetic_catalog import generate_locations, write_catalog
+
+    with tempfile.TemporaryDirectory(prefix="bench-ingest-") as scratch, working_directory(scratch):
+        if mode == "stream":
+            write_catalog("catalog.jsonl", size)
+            from stream_ingest import stream_ingest
+            started = time.perf_counter()
+            report = stream_ingest("catalog.jsonl", rebuild=True, compute_similar=compute_similar)
+            elapsed = time.perf_counter() - started
+            written = report["written"]
+        else:
+            from setup_chromadb import create_chroma_collection
+            locations = list(generate_locations(size))
+            started = time.perf_counter()
+            create_chroma_collection(locations, compute_similar=compute_similar)
+            elapsed = time.perf_counter() - started
+            written = len(locations)
+
+    return {
+        "mode": mode,
+        "size": size,
+        "written": written,
+        "seconds": round(elapsed, 3),
+        "records_per_sec": round(written / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "similar_graph": compute_similar,
+    }
+
+
+def run(sizes: List[int], modes: List[str], compute_similar: bool = False) -> List[Dict[str, Any]]:
+    """Run every size/mode pair in its own subprocess"""
+    results = []
+    for mode in modes:
+        for size in sizes:
+            command = [sys.executable, os.path.abspath(__file__), "--single", str(size), "--modes", mode]
+            if compute_similar:
+                command.append("--similar")
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                results.append({"mode": mode, "size": size, "error": completed.stderr.strip().splitlines()[-1:]})
+                continue
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog ingest at several sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--modes", nargs="+", choices=["batch", "stream"], default=["batch", "stream"])
+    parser.add_argument("--similar", action="store_true", help="Also build the similar-locations graph")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.single is not None:
+        # Child process: print one JSON line for the parent to collect
+        print(json.dumps(run_single(args.single, args.modes[0], args.similar)))
+        return
+
+    write_report({"environment": environment_info(), "ingest": run(args.sizes, args.modes, args.similar)}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+In-process load test of the hot endpoints.
+
+Builds a synthetic collection in a scratch directory, starts the FastAPI
+app and drives it through httpx's ASGI transport at several concurrency
+levels, so results measure the server code without network noise.
+
+Usage:
+    python benchmarks/bench_load.py --catalog-size 5000 --concurrency 1 8 32 --requests 500
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+from bench_common import environment_info, peak_rss_mb, percentiles, working_directory, write_report
+from synthetic_catalog import BEST_FOR, KINDS, TAGS, TOWNS, generate_locations
+
+
+def query_pool(size: int, seed: int = 11) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(['quiet', 'famous', 'scenic'])} {rng.choice(KINDS).lower()} near {rng.choice(TOWNS)} "
+        f"for {rng.choice(TAGS)}"
+        for _ in range(size)
+    ]
+
+
+def build_scenarios(queries: List[str], unique: bool) -> Dict[str, Callable[[int], str]]:
+    """URL factories per endpoint; unique=True gives every request a distinct query (cold caches)"""
+    def recommend(i: int) -> str:
+        query = f"{queries[i % len(queries)]} {i}" if unique else queries[i % len(queries)]
+        return f"/api/recommend?query={query}&n=5"
+
+    tags = TAGS + BEST_FOR
+
+    def search_by_tag(i: int) -> str:
+        return f"/api/search-by-tag?tag={tags[i % len(tags)]}&n=10"
+
+    def locations_all(i: int) -> str:
+        return "/api/locations/all?limit=100"
+
+    return {"recommend": recommend, "search_by_tag": search_by_tag, "locations_all": locations_all}
+
+
+async def drive(client: httpx.AsyncClient, make_url: Callable[[int], str], total: int, concurrency: int) -> Dict[str, Any]:
+    counter = itertools.count()
+    latencies: List[float] = []
+    failures = 0
+
+    async def worker():
+        nonlocal failures
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            started = time.perf_counter()
+            response = await client.get(make_url(i))
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "failures": failures,
+        "rps": round(total / elapsed, 1),
+        **percentiles(latencies)
+    }
+
+
+async def run_async(catalog_size: int, concurrency_levels: List[int], total: int, unique: bool) -> Dict[str, Any]:
+    from setup_chromadb import create_chroma_collection
+    create_chroma_collection(list(generate_locations(catalog_size)))
+
+    import main
+    await main.startup_event()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            scenarios = build_scenarios(query_pool(200), unique)
+            results: Dict[str, Any] = {}
+            for name, make_url in scenarios.items():
+                await drive(client, make_url, min(total, 50), 4)  # warm-up
+                results[name] = [await drive(client, make_url, total, c) for c in concurrency_levels]
+            results["batcher"] = main.query_batcher.stats()
+            results["caches"] = {
+                "embedding": main.embedding_cache.stats(),
+                "result": main.result_cache.stats()
+            }
+    finally:
+        await main.shutdown_event()
+
+    return {"catalog_size": catalog_size, "unique_queries": unique,
+            "peak_rss_mb": peak_rss_mb(), "endpoints": results}
+
+
+def run(catalog_size: int = 5000, concurrency_levels: List[int] = (1, 8, 32), total: int = 500,
+        unique: bool = False) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="bench-load-") as scratch, working_directory(scratch):
+        return asyncio.run(run_async(catalog_size, list(concurrency_levels), total, unique))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load-test the recommender endpoints in-process")
+    parser.add_argument("--catalog-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--unique-queries", action="store_true", help="Defeat the result cache with distinct queries")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.catalog_size, args.concurrency, args.requests, args.unique_queries)
+    write_report({"environment": environment_info(), "load": report}, args.output)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,64 @@
+"""
+Micro-benchmarks for the CPU-bound helpers on the setup and request paths.
+
+Usage:
+    python benchmarks/bench_micro.py --output micro.json
+"""
+import argparse
+import random
+from typing import Any, Dict
+
+from bench_common import environment_info, percentiles, time_calls, write_report
+
+import main
+from setup_chromadb import build_metadatas, create_enhanced_descriptions
+from synthetic_catalog import generate_locations
+
+
+def fake_query_results(n: int, seed: int = 7) -> Dict[str, Any]:
+    """A single-query Chroma result with n hits, shaped like collection.query output"""
+    rng = random.Random(seed)
+    locations = list(generate_locations(n, seed))
+    descriptions = create_enhanced_descriptions(locations)
+    return {
+        "ids": [[loc["id"] for loc in locations]],
+        "distances": [sorted(rng.uniform(0.2, 1.2) for _ in locations)],
+        "metadatas": [build_metadatas(locations, descriptions)],
+        "documents": [descriptions],
+    }
+
+
+def run(iterations: int = 200, catalog_size: int = 1000) -> Dict[str, Any]:
+    locations = list(generate_locations(catalog_size))
+    descriptions_samples = time_calls(lambda: create_enhanced_descriptions(locations), iterations)
+
+    results = {}
+    for n in (5, 20):
+        query_results = fake_query_results(n)
+        samples = time_calls(lambda: main.format_recommendations("beach", query_results, 0.0), iterations * 10)
+        results[f"format_recommendations_n{n}"] = {"iterations": len(samples), **percentiles(samples)}
+
+    per_call = percentiles(descriptions_samples)
+    return {
+        "create_enhanced_descriptions": {
+            "locations_per_call": catalog_size,
+            "iterations": len(descriptions_samples),
+            "locations_per_sec": round(catalog_size / (sum(descriptions_samples) / len(descriptions_samples)), 1),
+            **per_call
+        },
+        **results
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Micro-benchmark description building and result formatting")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    write_report({"environment": environment_info(), "micro": run(args.iterations, args.catalog_size)}, args.output)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,141 @@
+"""
+Snapshot size and cold load time against the ChromaDB directory.
+
+For each catalog size a synthetic collection is built in a scratch
+directory and exported with setup_chromadb.py --export-snapshot. Each
+load is then timed in a fresh subprocess, so nothing is cached in-process:
+
+    chroma    PersistentClient + get_collection + paged get(metadatas, documents), as the server starts today
+    snapshot  load_snapshot + NumpyBackend over the memory-mapped float16 matrix
+
+plus the first query against the loaded index.
+
+Usage:
+    python benchmarks/bench_snapshot.py --sizes 1000 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from bench_common import environment_info, peak_rss_mb, write_report
+
+DEFAULT_SIZES = [1000, 100000]
+SNAPSHOT_FILE = "recommender.snapshot.tar"
+
+
+def measure(source: str) -> Dict[str, Any]:
+    """Load the index from source in the current process (run from the scratch directory)"""
+    import numpy as np
+
+    started = time.perf_counter()
+    if source == "chroma":
+        import chromadb
+        collection = chromadb.PersistentClient(path="./chroma_db").get_collection(
+            "sri_lanka_locations", embedding_function=None
+        )
+        # Paged like export_snapshot: a single get() fails on large collections
+        count = 0
+        for offset in range(0, collection.count(), 5000):
+            count += len(collection.get(include=["metadatas", "documents"], limit=5000, offset=offset)["ids"])
+        dim = len(collection.peek(1)["embeddings"][0])
+
+        def first_query(query):
+            return collection.query(query_embeddings=[query], n_results=5)
+    else:
+        from snapshot import load_snapshot
+        snapshot = load_snapshot(SNAPSHOT_FILE)
+        backend = snapshot.to_backend()
+        count, dim = backend.count(), snapshot.embeddings.shape[1]
+
+        def first_query(query):
+            return backend.query([query], 5, ["distances"])
+    loaded = time.perf_counter()
+
+    first_query(np.random.default_rng(0).standard_normal(dim).astype(np.float32).tolist())
+    queried = time.perf_counter()
+    return {
+        "source": source,
+        "count": count,
+        "load_seconds": round(loaded - started, 4),
+        "first_query_seconds": round(queried - loaded, 4),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def build(size: int) -> Dict[str, Any]:
+    """Build a synthetic collection in the current directory and export it"""
+    from setup_chromadb import create_chroma_collection, export_chroma_snapshot
+    from snapshot import directory_size
+    from synthetic_catalog import generate_locations
+
+    create_chroma_collection(list(generate_locations(size)), compute_similar=False)
+    started = time.perf_counter()
+    export_chroma_snapshot(SNAPSHOT_FILE)
+    export_seconds = time.perf_counter() - started
+    return {
+        "size": size,
+        "chroma_bytes": directory_size("chroma_db"),
+        "snapshot_bytes": os.path.getsize(SNAPSHOT_FILE),
+        "export_seconds": round(export_seconds, 3),
+    }
+
+
+def run_in_subprocess(args: List[str], scratch: str) -> Dict[str, Any]:
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__)] + args,
+                               capture_output=True, text=True, cwd=scratch)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(sizes: List[int] = DEFAULT_SIZES) -> List[Dict[str, Any]]:
+    """
+    Build each size in one subprocess (Chroma caches clients per path) and
+    time each load in another, all started from this process so peak RSS is
+    not inherited from the build
+    """
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="bench-snapshot-") as scratch:
+            result = run_in_subprocess(["--build", str(size)], scratch)
+            if "error" in result:
+                results.append({"size": size, **result})
+                continue
+            result["chroma"] = run_in_subprocess(["--measure", "chroma"], scratch)
+            result["snapshot"] = run_in_subprocess(["--measure", "snapshot"], scratch)
+
+        result["size_ratio"] = round(result["snapshot_bytes"] / result["chroma_bytes"], 3)
+        chroma_seconds = result["chroma"].get("load_seconds")
+        snapshot_seconds = result["snapshot"].get("load_seconds")
+        if chroma_seconds and snapshot_seconds:
+            result["load_speedup"] = round(chroma_seconds / snapshot_seconds, 1)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare snapshot size and load time with the ChromaDB directory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--build", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--measure", choices=["chroma", "snapshot"], help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Child processes print one JSON line for the parent to collect
+    if args.measure:
+        print(json.dumps(measure(args.measure)))
+        return
+    if args.build is not None:
+        print(json.dumps(build(args.build)))
+        return
+
+    write_report({"environment": environment_info(), "snapshot": run(args.sizes)}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Run the whole benchmark suite and write one JSON report.
+
+Compare against an earlier report to see whether an optimization helped:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    # ...apply the change...
+    python benchmarks/run_benchmarks.py --output after.json --baseline before.json
+
+--quick shrinks every size so the suite finishes in well under a minute.
+"""
+import argparse
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+import bench_embedding_service
+import bench_ingest
+import bench_load
+import bench_micro
+import bench_snapshot
+from bench_common import environment_info, write_report
+
+# Metrics where a higher value is better; every other numeric leaf is a cost
+HIGHER_IS_BETTER = ("rps", "records_per_sec", "locations_per_sec", "hit_rate")
+
+
+def flatten(report: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield (dotted.path, value) for numeric leaves; list items are keyed by size/concurrency"""
+    if isinstance(report, dict):
+        for key, value in report.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(report, list):
+        for index, item in enumerate(report):
+            label = index
+            if isinstance(item, dict):
+                keys = ("mode", "size", "concurrency", "workers")
+                label = "/".join(str(item[k]) for k in keys if k in item) or index
+            yield from flatten(item, f"{prefix}[{label}]")
+    elif isinstance(report, (int, float)) and not isinstance(report, bool):
+        yield prefix, float(report)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Per-metric baseline/current values and relative change (positive = improvement)"""
+    before = dict(flatten({k: v for k, v in baseline.items() if k != "environment"}))
+    changes = {}
+    for path, value in flatten({k: v for k, v in current.items() if k != "environment"}):
+        if path not in before or before[path] == 0:
+            continue
+        change = (value - before[path]) / before[path]
+        if not path.rsplit(".", 1)[-1].startswith(HIGHER_IS_BETTER):
+            change = -change
+        changes[path] = {"baseline": before[path], "current": value, "improvement": round(change, 4)}
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run micro, ingest, load, embedding-service and snapshot benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a fast smoke run")
+    parser.add_argument("--skip", nargs="*", choices=["micro", "ingest", "load", "embedding_service", "snapshot"], default=[])
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"environment": environment_info()}
+    if "micro" not in args.skip:
+        report["micro"] = bench_micro.run(iterations=20 if args.quick else 200)
+    if "ingest" not in args.skip:
+        sizes = [1000] if args.quick else bench_ingest.DEFAULT_SIZES
+        report["ingest"] = bench_ingest.run(sizes, ["batch", "stream"])
+    if "load" not in args.skip:
+        if args.quick:
+            report["load"] = bench_load.run(catalog_size=500, concurrency_levels=[1, 8], total=100)
+        else:
+            report["load"] = bench_load.run()
+    if "embedding_service" not in args.skip:
+        if args.quick:
+            report["embedding_service"] = bench_embedding_service.run([1, 2], requests=50)
+        else:
+            report["embedding_service"] = bench_embedding_service.run()
+    if "snapshot" not in args.skip:
+        report["snapshot"] = bench_snapshot.run([1000] if args.quick else bench_snapshot.DEFAULT_SIZES)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
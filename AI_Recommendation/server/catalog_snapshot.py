@@ -0,0 +1,130 @@
+import base64
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from query_cache import LRUCache
+from tag_index import split_list_field
+
+LOCATION_FIELDS = ("id", "name", "location", "tags", "best_for", "popularity")
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that are malformed or belong to an older catalog"""
+
+
+class CatalogSnapshot:
+    """
+    Precomputed, serialized view of the location catalog.
+
+    Built once per loaded collection (startup and reload), so
+    /api/locations/all never rescans the collection or re-splits the
+    ', '-joined metadata fields per request. Rendered pages are cached as
+    bytes (plain and gzip) and identified by an ETag derived from the
+    catalog content.
+    """
+
+    def __init__(self, ids: Sequence[str], metadatas: Sequence[Dict[str, Any]], page_cache_size: int = 256):
+        self.locations: List[Dict[str, Any]] = []
+        for item_id, metadata in zip(ids, metadatas):
+            metadata = metadata or {}
+            self.locations.append({
+                "id": item_id,
+                "name": metadata.get("name"),
+                "location": metadata.get("location"),
+                "tags": split_list_field(metadata.get("tags")),
+                "best_for": split_list_field(metadata.get("best_for")),
+                "popularity": metadata.get("popularity")
+            })
+
+        self.by_id = {loc["id"]: loc for loc in self.locations}
+
+        digest = hashlib.sha256(json.dumps(self.locations, sort_keys=True).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+        self._pages = LRUCache(max_size=page_cache_size, ttl_seconds=float("inf"))
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def encode_cursor(self, offset: int) -> str:
+        return base64.urlsafe_b64encode(f"{self.version}:{offset}".encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, cursor: str) -> int:
+        try:
+            version, offset = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+            offset = int(offset)
+        except Exception:
+            raise InvalidCursor("Malformed cursor")
+        if version != self.version:
+            raise InvalidCursor("Cursor belongs to an older catalog, restart from the first page")
+        if offset < 0 or offset > len(self.locations):
+            raise InvalidCursor("Cursor out of range")
+        return offset
+
+    def page(
+        self,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> "CatalogPage":
+        """
+        Return the rendered page for cursor/limit/fields, serializing it once.
+
+        Without cursor and limit the body has the original
+        {"total", "locations"} shape; paginated bodies add next_cursor.
+        """
+        fields = tuple(fields) if fields else LOCATION_FIELDS
+        key = (cursor, limit, fields)
+        cached = self._pages.get(key)
+        if cached is not None:
+            return cached
+
+        start = self.decode_cursor(cursor) if cursor else 0
+        end = len(self.locations) if limit is None else min(len(self.locations), start + limit)
+
+        if fields == LOCATION_FIELDS:
+            locations = self.locations[start:end]
+        else:
+            locations = [{field: loc[field] for field in fields} for loc in self.locations[start:end]]
+
+        payload: Dict[str, Any] = {"total": len(self.locations), "locations": locations}
+        if cursor is not None or limit is not None:
+            payload["next_cursor"] = self.encode_cursor(end) if end < len(self.locations) else None
+
+        variant = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:8]
+        page = CatalogPage(f'W/"{self.version}-{variant}"', json.dumps(payload).encode("utf-8"))
+        self._pages.set(key, page)
+        return page
+
+
+class CatalogPage:
+    """One serialized catalog page with its ETag and lazily gzipped body"""
+
+    __slots__ = ("etag", "body", "_gzipped")
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self._gzipped: Optional[bytes] = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
@@ -0,0 +1,413 @@
+"""
+Shared embedding service for multi-worker deployments.
+
+A fixed pool of model processes loads all-MiniLM-L6-v2 once each and is fed
+through a local job queue. HTTP workers connect as clients, send texts and
+get vectors back through shared-memory buffers they allocate, so any number
+of uvicorn workers share the pool without loading their own copy of the
+model or shipping vectors through pickles.
+
+Clients authenticate with EMBEDDING_SERVICE_AUTHKEY, which the service
+and every worker must share; the service refuses to start without one.
+Connections exchange pickles, so anyone holding the key can run code in
+the service: use a long random value and keep it out of the repo.
+
+Usage:
+    export EMBEDDING_SERVICE_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    python embedding_service.py --address 127.0.0.1:8765 --pool-size 2
+    EMBEDDING_SERVICE_ADDRESS=127.0.0.1:8765 uvicorn main:app --workers 4
+"""
+import argparse
+import itertools
+import logging
+import mmap
+import multiprocessing
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+AUTHKEY_ENV = "EMBEDDING_SERVICE_AUTHKEY"
+MIN_AUTHKEY_LENGTH = 16
+
+# Texts per pool job; larger client batches are split so the whole pool works on them
+DEFAULT_JOB_SIZE = 64
+REQUEST_TIMEOUT_SECONDS = 60.0
+# Reconnect attempts per encode() after the service restarts, with exponential backoff
+RECONNECT_ATTEMPTS = 5
+RECONNECT_BACKOFF_SECONDS = 0.2
+RECONNECT_BACKOFF_MAX_SECONDS = 5.0
+
+Address = Union[str, Tuple[str, int]]
+
+
+def service_authkey(authkey: Optional[bytes] = None) -> bytes:
+    """The shared secret, from the argument or EMBEDDING_SERVICE_AUTHKEY; there is no default"""
+    if authkey is None:
+        authkey = os.getenv(AUTHKEY_ENV, "").encode("utf-8")
+    if len(authkey) < MIN_AUTHKEY_LENGTH:
+        raise RuntimeError(
+            f"{AUTHKEY_ENV} must be set to a secret of at least {MIN_AUTHKEY_LENGTH} characters, "
+            f"shared by the embedding service and its clients"
+        )
+    return authkey
+
+
+def parse_address(address: str) -> Address:
+    """'host:port' for TCP, anything else is a Unix socket path"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def _write_shared_memory(name: str, vectors: np.ndarray) -> None:
+    """Copy vectors into the client's buffer without taking ownership of it"""
+    data = memoryview(np.ascontiguousarray(vectors, dtype=np.float32)).cast("B")
+    if sys.version_info >= (3, 13) or os.name == "nt":
+        shm = shared_memory.SharedMemory(name=name, **({"track": False} if os.name != "nt" else {}))
+        try:
+            shm.buf[:len(data)] = data
+        finally:
+            shm.close()
+        return
+
+    # Before 3.13 attaching a SharedMemory registers it with the resource tracker,
+    # which would later unlink the client's buffer, so map the segment directly
+    import _posixshmem
+    fd = _posixshmem.shm_open("/" + name, os.O_RDWR, mode=0o600)
+    try:
+        with mmap.mmap(fd, len(data)) as mapped:
+            mapped[:] = data
+    finally:
+        os.close(fd)
+
+
+def _shutdown(conn: Connection) -> None:
+    """Close a connection another thread may be blocked reading; close() alone would not wake it"""
+    try:
+        with socket.socket(fileno=os.dup(conn.fileno())) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    conn.close()
+
+
+def _model_worker(jobs: "multiprocessing.Queue", results: "multiprocessing.Queue") -> None:
+    """Pool process: load the model once, then encode jobs straight into the client's buffer"""
+    from embeddings import load_local_model
+
+    try:
+        model = load_local_model()
+        dim = model.get_sentence_embedding_dimension()
+    except Exception as e:
+        results.put(("failed", os.getpid(), repr(e)))
+        return
+    results.put(("ready", os.getpid(), dim))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        conn_id, job_id, texts, shm_name = job
+        error = None
+        try:
+            _write_shared_memory(shm_name, np.asarray(model.encode(texts), dtype=np.float32))
+        except Exception as e:
+            error = repr(e)
+        results.put(("done", conn_id, (job_id, error)))
+
+
+class EmbeddingService:
+    """Fixed-size pool of model processes behind a local listener"""
+
+    def __init__(self, address: Address, pool_size: int = 2, authkey: Optional[bytes] = None):
+        self.address = address
+        self.pool_size = pool_size
+        self.authkey = service_authkey(authkey)
+        self.dim: Optional[int] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs = self._context.Queue()
+        self._results = self._context.Queue()
+        self._workers: List[multiprocessing.Process] = []
+        self._connections: Dict[int, Tuple[Connection, threading.Lock]] = {}
+        self._connections_lock = threading.Lock()
+        self._conn_ids = itertools.count()
+        self._listener: Optional[Listener] = None
+        self._stopping = threading.Event()
+
+    @property
+    def worker_pids(self) -> List[int]:
+        return [worker.pid for worker in self._workers]
+
+    def start(self) -> None:
+        """Start the pool, wait until every model is loaded, then accept clients"""
+        for i in range(self.pool_size):
+            worker = self._context.Process(
+                target=_model_worker, args=(self._jobs, self._results), name=f"embedding-worker-{i}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        for _ in range(self.pool_size):
+            status, pid, detail = self._wait_for_worker()
+            if status != "ready":
+                self.stop()
+                raise RuntimeError(f"Embedding worker {pid} failed to load the model: {detail}")
+            self.dim = detail
+        logger.info(f"✅ {self.pool_size} embedding workers ready (dim={self.dim})")
+
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self.address = self._listener.address
+        threading.Thread(target=self._route_results, name="embedding-results", daemon=True).start()
+        threading.Thread(target=self._accept, name="embedding-accept", daemon=True).start()
+        logger.info(f"🚀 Embedding service listening on {self.address}")
+
+    def _wait_for_worker(self) -> Tuple[str, Optional[int], object]:
+        """Next startup report from the pool, noticing workers that died before reporting"""
+        while True:
+            try:
+                return self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [worker for worker in self._workers if worker.exitcode is not None]
+                if dead:
+                    return "failed", dead[0].pid, f"exited with code {dead[0].exitcode}"
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._listener is not None:
+            self._listener.close()
+        # Clients see EOF and reconnect to whatever service takes over the address
+        with self._connections_lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for conn, _ in connections:
+            _shutdown(conn)
+        for _ in self._workers:
+            self._jobs.put(None)
+        self._results.put(("stop", None, None))
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            self._stopping.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _accept(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                conn = self._listener.accept()
+            except multiprocessing.AuthenticationError:
+                logger.warning("⚠️ Rejected an embedding client with the wrong authkey")
+                continue
+            except (OSError, EOFError):
+                if self._stopping.is_set():
+                    return
+                continue
+            conn_id = next(self._conn_ids)
+            with self._connections_lock:
+                self._connections[conn_id] = (conn, threading.Lock())
+            conn.send(("hello", self.dim))
+            threading.Thread(target=self._serve_client, args=(conn_id, conn), daemon=True).start()
+
+    def _serve_client(self, conn_id: int, conn: Connection) -> None:
+        try:
+            while True:
+                kind, job_id, texts, shm_name = conn.recv()
+                if kind == "encode":
+                    self._jobs.put((conn_id, job_id, texts, shm_name))
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._connections_lock:
+                self._connections.pop(conn_id, None)
+            conn.close()
+
+    def _route_results(self) -> None:
+        """Send each finished job back to the connection that submitted it"""
+        while True:
+            status, conn_id, payload = self._results.get()
+            if status == "stop":
+                return
+            with self._connections_lock:
+                entry = self._connections.get(conn_id)
+            if entry is None:
+                continue  # client went away; it already unlinked its buffer
+            conn, lock = entry
+            try:
+                with lock:
+                    conn.send(("done",) + payload)
+            except OSError:
+                pass
+
+
+class EmbeddingServiceClient:
+    """
+    SentenceTransformer-style encode() backed by the embedding service.
+
+    Thread-safe: concurrent encode() calls share one connection and are
+    matched to their results by job id. If the service goes away (e.g. it
+    is restarted), encode() reconnects with backoff and resubmits.
+    """
+
+    def __init__(self, address: Union[str, Address], authkey: Optional[bytes] = None,
+                 job_size: int = DEFAULT_JOB_SIZE, timeout: float = REQUEST_TIMEOUT_SECONDS,
+                 reconnect_attempts: int = RECONNECT_ATTEMPTS):
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.authkey = service_authkey(authkey)
+        self.job_size = job_size
+        self.timeout = timeout
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnects = 0
+        self.dim: Optional[int] = None
+        self._conn: Optional[Connection] = None
+        self._conn_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Tuple[Connection, Future]] = {}
+        self._pending_lock = threading.Lock()
+        self._job_ids = itertools.count()
+        self._connection()
+
+    def _connection(self) -> Connection:
+        """The live connection, opening a new one (and its reader thread) if needed"""
+        with self._conn_lock:
+            if self._conn is None:
+                conn = Client(self.address, authkey=self.authkey)
+                if self.dim is not None:
+                    self.reconnects += 1
+                _, self.dim = conn.recv()
+                self._conn = conn
+                threading.Thread(target=self._read_results, args=(conn,), name="embedding-client",
+                                 daemon=True).start()
+            return self._conn
+
+    def _drop(self, conn: Connection) -> None:
+        """Forget a broken connection and fail the jobs still waiting on it"""
+        with self._conn_lock:
+            if self._conn is conn:
+                self._conn = None
+        try:
+            conn.close()
+        except OSError:
+            pass
+        with self._pending_lock:
+            lost = [job_id for job_id, (owner, _) in self._pending.items() if owner is conn]
+            futures = [self._pending.pop(job_id)[1] for job_id in lost]
+        for future in futures:
+            if not future.done():
+                future.set_exception(ConnectionError("Embedding service connection closed"))
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences, **kwargs) -> np.ndarray:
+        """Encode texts on the pool; encode kwargs such as batch_size are decided by the service"""
+        if isinstance(sentences, str):
+            return self.encode([sentences])[0]
+        texts = list(sentences)
+        delay = RECONNECT_BACKOFF_SECONDS
+        for attempt in range(self.reconnect_attempts + 1):
+            try:
+                return self._encode_once(texts)
+            except TimeoutError:
+                raise
+            except (EOFError, ConnectionError, OSError) as e:
+                if attempt == self.reconnect_attempts:
+                    raise ConnectionError(f"Embedding service at {self.address} unavailable: {e!r}") from e
+                logger.warning(f"⚠️ Embedding service connection lost ({e!r}), reconnecting in {delay:.1f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_BACKOFF_MAX_SECONDS)
+
+    def _encode_once(self, texts: List[str]) -> np.ndarray:
+        conn = self._connection()
+        output = np.empty((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return output
+
+        submitted: List[Tuple[int, int, shared_memory.SharedMemory, Future]] = []
+        try:
+            for start in range(0, len(texts), self.job_size):
+                chunk = texts[start:start + self.job_size]
+                shm = shared_memory.SharedMemory(create=True, size=len(chunk) * self.dim * 4)
+                job_id = next(self._job_ids)
+                future: Future = Future()
+                with self._pending_lock:
+                    self._pending[job_id] = (conn, future)
+                submitted.append((job_id, start, shm, future))
+                try:
+                    with self._send_lock:
+                        conn.send(("encode", job_id, chunk, shm.name))
+                except (EOFError, OSError):
+                    self._drop(conn)
+                    raise
+
+            for _, start, shm, future in submitted:
+                future.result(timeout=self.timeout)
+                rows = min(self.job_size, len(texts) - start)
+                output[start:start + rows] = np.ndarray((rows, self.dim), dtype=np.float32, buffer=shm.buf)
+        finally:
+            with self._pending_lock:
+                for job_id, _, _, _ in submitted:
+                    self._pending.pop(job_id, None)
+            for _, _, shm, _ in submitted:
+                shm.close()
+                shm.unlink()
+        return output
+
+    def close(self) -> None:
+        with self._conn_lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def _read_results(self, conn: Connection) -> None:
+        try:
+            while True:
+                _, job_id, error = conn.recv()
+                with self._pending_lock:
+                    entry = self._pending.pop(job_id, None)
+                if entry is None:
+                    continue
+                future = entry[1]
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(RuntimeError(f"Embedding service error: {error}"))
+        except (EOFError, OSError):
+            self._drop(conn)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Serve all-MiniLM-L6-v2 embeddings from a shared process pool")
+    parser.add_argument("--address", default=os.getenv("EMBEDDING_SERVICE_ADDRESS", "127.0.0.1:8765"),
+                        help="host:port or Unix socket path to listen on")
+    parser.add_argument("--pool-size", type=int, default=2, help="Number of model processes")
+    args = parser.parse_args()
+
+    try:
+        authkey = service_authkey()
+    except RuntimeError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+    EmbeddingService(parse_address(args.address), args.pool_size, authkey).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_CHUNK_SIZE = 500
+
+
+class EmbeddingStore:
+    """
+    Content-addressed on-disk embedding cache shared by setup and the server.
+
+    Vectors are keyed by sha256(model id + text), so identical texts are
+    encoded once across runs and processes, and switching models never
+    returns stale vectors. Backed by SQLite in WAL mode, which lets a
+    running server read while setup writes.
+    """
+
+    def __init__(self, path: str, model_id: str):
+        self.path = path
+        self.model_id = model_id
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Stored vectors in input order, None where a text has not been encoded yet"""
+        keys = [self.key(text) for text in texts]
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+            vectors = [found.get(key) for key in keys]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, texts: Sequence[str], vectors: Any) -> None:
+        rows = [
+            (self.key(text), np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "model": self.model_id,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def encode_texts(model: Any, texts: Sequence[str], store: Optional[EmbeddingStore] = None, **encode_kwargs) -> np.ndarray:
+    """
+    Encode texts with model.encode, reusing vectors from the store.
+
+    Only texts missing from the store are encoded (once each, in a single
+    call) and written back. Returns a float32 array in input order.
+    """
+    texts = list(texts)
+    if store is None or not texts:
+        return np.asarray(model.encode(texts, **encode_kwargs), dtype=np.float32)
+
+    vectors = store.get_many(texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+    if missing:
+        computed = np.asarray(model.encode(missing, **encode_kwargs), dtype=np.float32)
+        store.put_many(missing, computed)
+        by_text = dict(zip(missing, computed))
+        vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+
+    return np.stack(vectors)
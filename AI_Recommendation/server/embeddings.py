@@ -0,0 +1,163 @@
+"""
+Embedding model factory shared by setup_chromadb.py, stream_ingest.py and main.py.
+
+EMBEDDING_BACKEND selects the implementation:
+    sentence-transformers  all-MiniLM-L6-v2 (default)
+    fake                   deterministic hashed bag-of-words vectors, for
+                           offline benchmarks and tests without the model
+
+The SentenceTransformer model is loaded at most once per process (or served
+by embedding_service.py when EMBEDDING_SERVICE_ADDRESS is set). Catalog
+documents are encoded through the on-disk embedding store
+(EMBEDDING_STORE_PATH, empty to disable); the server embeds queries
+without it and caches them in memory instead.
+"""
+import hashlib
+import os
+import re
+import threading
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+from embedding_store import EmbeddingStore, encode_texts
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_STORE_PATH = os.getenv("EMBEDDING_STORE_PATH", "./embedding_store.sqlite")
+# host:port or socket path of embedding_service.py; when set, models are served by its pool
+EMBEDDING_SERVICE_ADDRESS = os.getenv("EMBEDDING_SERVICE_ADDRESS", "")
+
+_model_lock = threading.Lock()
+_sentence_model = None
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+class FakeEmbeddingFunction(EmbeddingFunction):
+    """
+    Deterministic stand-in for all-MiniLM-L6-v2.
+
+    Each token is hashed into one of ``dim`` buckets with a signed weight and
+    the vector is L2-normalized, so texts sharing words score as similar. It
+    implements both the Chroma embedding-function call and the
+    SentenceTransformer ``encode`` method used by setup.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def __call__(self, input: Sequence[str]) -> List[np.ndarray]:
+        return list(self.encode(list(input)))
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            return self.encode([sentences])[0]
+        vectors = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for row, text in enumerate(sentences):
+            for token in _TOKEN_RE.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    @property
+    def loaded(self) -> bool:
+        return True
+
+    def load(self) -> "FakeEmbeddingFunction":
+        return self
+
+    @staticmethod
+    def name() -> str:
+        return "fake"
+
+
+class LazySentenceTransformerEmbeddingFunction(SentenceTransformerEmbeddingFunction):
+    """
+    Chroma's sentence-transformer embedding function, minus the eager load.
+
+    The model is loaded on first use or by an explicit load() (e.g. from a
+    background thread), is shared with create_sentence_model(), and encoded
+    texts go through the embedding store. The Chroma name and config are
+    unchanged, so existing collections open as before.
+    """
+
+    def __init__(self, model: Optional[Any] = None, store: Optional[EmbeddingStore] = None,
+                 model_name: str = MODEL_NAME, device: str = "cpu"):
+        self.model_name = model_name
+        self.device = device
+        self.normalize_embeddings = False
+        self.kwargs = {}
+        self.store = store
+        self._model = model
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Any:
+        with self._load_lock:
+            if self._model is None:
+                self._model = create_sentence_model()
+        return self._model
+
+    def __call__(self, input: Sequence[str]) -> List[np.ndarray]:
+        return list(encode_texts(self.load(), list(input), self.store))
+
+
+def embedding_model_id() -> str:
+    """Identifies the vectors a backend produces, so the store never mixes models"""
+    return f"fake-{EMBEDDING_DIM}" if EMBEDDING_BACKEND == "fake" else MODEL_NAME
+
+
+def create_embedding_store(path: Optional[str] = None) -> Optional[EmbeddingStore]:
+    path = EMBEDDING_STORE_PATH if path is None else path
+    return EmbeddingStore(path, embedding_model_id()) if path else None
+
+
+def create_embedding_function(model: Optional[Any] = None, store: Optional[EmbeddingStore] = None):
+    """
+    Embedding function passed to Chroma and used to embed queries.
+
+    Nothing is loaded here; pass an already loaded model to share it, or
+    call load() on the result to load it ahead of the first query.
+    """
+    if EMBEDDING_BACKEND == "fake":
+        return FakeEmbeddingFunction()
+    return LazySentenceTransformerEmbeddingFunction(model, store)
+
+
+def load_local_model():
+    """Load the model into this process (the embedding service's pool workers call this directly)"""
+    if EMBEDDING_BACKEND == "fake":
+        return FakeEmbeddingFunction()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+
+def create_sentence_model():
+    """
+    Model with a SentenceTransformer-style encode(), created once per process.
+
+    With EMBEDDING_SERVICE_ADDRESS set this is a client of the shared
+    embedding service instead of a local copy of the model.
+    """
+    global _sentence_model
+    with _model_lock:
+        if _sentence_model is None:
+            if EMBEDDING_SERVICE_ADDRESS:
+                from embedding_service import EmbeddingServiceClient
+                _sentence_model = EmbeddingServiceClient(EMBEDDING_SERVICE_ADDRESS)
+            else:
+                _sentence_model = load_local_model()
+        return _sentence_model
@@ -0,0 +1,134 @@
+import heapq
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from tag_index import POPULARITY_RANK, split_list_field
+
+# Field weights for BM25F-style scoring: a word in the name counts three times one in the description
+FIELD_WEIGHTS = {"name": 3.0, "location": 2.0, "tags": 1.5, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    "a an and are at be by for from i in is it near of on or the to with".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Any) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(str(text or "").lower()) if token not in STOPWORDS]
+
+
+def normalize_text(text: Any) -> str:
+    """Key for exact name / town matching: 'Galle  Fort', 'galle-fort' -> 'galle fort'"""
+    return " ".join(_TOKEN_RE.findall(str(text or "").lower()))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists into one, scoring each id by sum(1 / (k + rank))"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class LexicalIndex:
+    """
+    Precomputed BM25 index over name, location, tags and description.
+
+    Term weights are folded into the postings at build time, so a query is
+    a sum over the postings of its tokens. Names and towns are also indexed
+    verbatim for the exact-match fast path.
+    """
+
+    def __init__(self, ids: List[str], metadatas: List[Dict[str, Any]], documents: Optional[List[str]] = None):
+        self.ids = ids
+        self.metadatas = metadatas
+        self.documents = documents or [""] * len(ids)
+        self.positions = {item_id: position for position, item_id in enumerate(ids)}
+        self._names: Dict[str, List[int]] = {}
+        self._towns: Dict[str, List[int]] = {}
+        self._name_tokens: List[frozenset] = []
+
+        frequencies: List[Dict[str, float]] = []
+        for position, metadata in enumerate(metadatas):
+            metadata = metadata or {}
+            fields = {
+                "name": metadata.get("name"),
+                "location": metadata.get("location"),
+                "tags": " ".join(split_list_field(metadata.get("tags"))),
+                "description": metadata.get("description"),
+            }
+            tf: Dict[str, float] = {}
+            for field, text in fields.items():
+                for token in tokenize(text):
+                    tf[token] = tf.get(token, 0.0) + FIELD_WEIGHTS[field]
+            frequencies.append(tf)
+
+            self._names.setdefault(normalize_text(metadata.get("name")), []).append(position)
+            self._towns.setdefault(normalize_text(metadata.get("location")), []).append(position)
+            self._name_tokens.append(frozenset(tokenize(metadata.get("name"))))
+        self._names.pop("", None)
+        self._towns.pop("", None)
+
+        lengths = [sum(tf.values()) for tf in frequencies]
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        document_frequency: Dict[str, int] = {}
+        for tf in frequencies:
+            for token in tf:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+
+        count = len(frequencies)
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        for position, (tf, length) in enumerate(zip(frequencies, lengths)):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length) if average_length else BM25_K1
+            for token, frequency in tf.items():
+                df = document_frequency[token]
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                weight = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                self._postings.setdefault(token, []).append((position, weight))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, n: int) -> List[Tuple[int, float]]:
+        """Top-n (position, BM25 score) for the query, best first"""
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            for position, weight in self._postings.get(token, ()):
+                scores[position] = scores.get(position, 0.0) + weight
+        return heapq.nlargest(n, scores.items(), key=lambda item: item[1])
+
+    def fast_path(self, query: str, n: int, confidence_ratio: float = 2.0) -> Optional[Tuple[str, List[Tuple[int, float]]]]:
+        """
+        Answer queries that need no model: ("exact", hits) or ("lexical", hits).
+
+        A query equal to a location's name returns that location; one equal
+        to a town returns its locations by popularity. Otherwise the top
+        BM25 hit is accepted when its name contains every query word and it
+        outscores the runner-up by confidence_ratio. Scores are lexical,
+        scaled to 0-1 relative to the best hit (1.0 for exact matches), and
+        there may be fewer than n hits; the caller fills the rest. Returns
+        None when the vector path should decide.
+        """
+        key = normalize_text(query)
+        if key in self._names:
+            return "exact", [(position, 1.0) for position in self._names[key][:n]]
+        if key in self._towns:
+            ranked = sorted(
+                self._towns[key],
+                key=lambda position: -POPULARITY_RANK.get((self.metadatas[position] or {}).get("popularity"), -1)
+            )
+            return "exact", [(position, 1.0) for position in ranked[:n]]
+
+        tokens = set(tokenize(query))
+        hits = self.search(query, max(n, 2))
+        if not tokens or not hits or not tokens <= self._name_tokens[hits[0][0]]:
+            return None
+        if len(hits) > 1 and hits[0][1] < confidence_ratio * hits[1][1]:
+            return None
+        top = hits[0][1]
+        return "lexical", [(position, score / top) for position, score in hits[:n]]
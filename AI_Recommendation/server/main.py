@@ -1,12 +1,29 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+import asyncio
 import chromadb
-from chromadb.utils import embedding_functions
+import hmac
 import logging
-from typing import Optional, List, Dict, Any
+import os
+import threading
+import time
+from typing import Optional, List, Dict, Any, AsyncIterator, Literal, Tuple
 import json
 
+import metrics
+from catalog_snapshot import LOCATION_FIELDS, CatalogSnapshot, InvalidCursor, etag_matches
+from embeddings import create_embedding_function, embedding_model_id
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+from query_batcher import QueryBatcher, split_query_results
+from query_cache import LRUCache, SingleFlight, normalize_query
+from similar_graph import load_similar_graph
+from snapshot import load_snapshot
+from tag_index import TagIndex, split_list_field
+from vector_backends import create_vector_backend, similarity_from_distance
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,36 +39,542 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for ChromaDB
-chroma_client = None
-collection = None
-
-def initialize_chromadb():
-    """Initialize ChromaDB connection with error handling"""
-    global chroma_client, collection
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count and time every request; add Server-Timing when the client opts in"""
+    wants_timing = SERVER_TIMING_ALWAYS or request.headers.get("x-server-timing") == "1"
+    token = metrics.start_request_timings(wants_timing)
+    started = time.perf_counter()
+    status_code = 500
     try:
-        chroma_client = chromadb.PersistentClient(path="./chroma_db")
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = metrics.end_request_timings(token)
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics.REQUEST_SECONDS.observe(elapsed, path=path)
+        metrics.REQUESTS.inc(path=path, status=str(status_code))
+    
+    if timings is not None:
+        response.headers["Server-Timing"] = metrics.format_server_timing(timings, elapsed)
+    return response
+
+class ServingState:
+    """
+    Everything loaded from one collection (or snapshot).
+    
+    initialize_chromadb() builds a complete new state and swaps it in as one
+    object, so a request that reads serving_state once sees a consistent
+    backend, indexes and catalog even while a reload runs.
+    """
+    
+    def __init__(
+        self,
+        vector_backend,
+        tag_index: Optional[TagIndex] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        catalog_snapshot: Optional[CatalogSnapshot] = None,
+        similar_graph: Optional[Dict[str, List[List[Any]]]] = None,
+        chroma_client=None,
+        collection=None,
+        generation: int = 0
+    ):
+        self.vector_backend = vector_backend
+        self.tag_index = tag_index
+        self.lexical_index = lexical_index
+        self.catalog_snapshot = catalog_snapshot
+        self.similar_graph = similar_graph
+        self.chroma_client = chroma_client
+        self.collection = collection
+        self.generation = generation
+
+# Global variables for ChromaDB; serving_state is replaced, never mutated
+embedding_function = None
+serving_state: Optional[ServingState] = None
+# Serializes reloads so concurrent ones cannot interleave their builds and swaps
+state_lock = threading.Lock()
+
+# Embedding model lifecycle: not_loaded -> loading -> ready | failed
+model_state = "not_loaded"
+model_loader = None
+
+# "eager" loads the model before serving; "background" serves catalog and tag
+# endpoints immediately and answers semantic endpoints with 503 until it is ready
+MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "eager")
+# Query run once after loading so the first real request is not cold (empty disables)
+WARMUP_QUERY = os.getenv("WARMUP_QUERY", "beautiful beach for swimming")
+
+# Lexical retrieval: exact or confident BM25 matches skip the model, other
+# queries fuse the top HYBRID_CANDIDATES lexical and vector hits
+LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "1") == "1"
+LEXICAL_CONFIDENCE_RATIO = float(os.getenv("LEXICAL_CONFIDENCE_RATIO", "2.0"))
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") == "1"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+
+# Vector search backend: "chroma" (default) or "numpy" for exact in-process search
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")
+VECTOR_CACHE_DIR = os.getenv("VECTOR_CACHE_DIR", "./vector_cache")
+VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+
+# Serve from a snapshot written by `setup_chromadb.py --export-snapshot` instead of ./chroma_db;
+# the float16 matrix is memory-mapped from the file and ChromaDB is never opened
+RECOMMENDER_SNAPSHOT = os.getenv("RECOMMENDER_SNAPSHOT", "")
+
+# Add a Server-Timing header to every response, not only requests sending "X-Server-Timing: 1"
+SERVER_TIMING_ALWAYS = os.getenv("SERVER_TIMING_ALWAYS", "0") == "1"
+
+# Gzip /api/locations/all bodies above this size when the client accepts it (negative disables)
+CATALOG_GZIP_MIN_BYTES = int(os.getenv("CATALOG_GZIP_MIN_BYTES", "1024"))
+
+# Query caches: normalized query -> embedding, and (query, n, include) -> raw query results
+embedding_cache = LRUCache(
+    max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+    ttl_seconds=float(os.getenv("EMBEDDING_CACHE_TTL", "3600"))
+)
+result_cache = LRUCache(
+    max_size=int(os.getenv("RESULT_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", "300"))
+)
+query_flight = SingleFlight()
+
+# POST /api/admin/reload requires this value in the X-Admin-Token header (empty disables the endpoint)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Limits for POST /api/recommend/batch
+BATCH_RECOMMEND_MAX_ITEMS = int(os.getenv("BATCH_RECOMMEND_MAX_ITEMS", "5000"))
+BATCH_RECOMMEND_CHUNK_SIZE = int(os.getenv("BATCH_RECOMMEND_CHUNK_SIZE", "64"))
+
+RECOMMEND_INCLUDE = ["metadatas", "distances", "documents"]
+
+class RecommendItem(BaseModel):
+    query: str = Field(..., min_length=1, description="Search query for locations")
+    n: int = Field(5, ge=1, le=20, description="Number of results to return")
+    min_score: float = Field(0.0, ge=0.0, le=1.0, description="Minimum similarity score threshold")
+
+class BatchRecommendRequest(BaseModel):
+    items: List[RecommendItem]
+
+def build_serving_state(generation: int) -> ServingState:
+    """Load the collection (or the RECOMMENDER_SNAPSHOT file) and build its indexes into a new state"""
+    snapshot = None
+    chroma_client = None
+    collection = None
+    if RECOMMENDER_SNAPSHOT:
+        with metrics.load_timer("snapshot"):
+            snapshot = load_snapshot(RECOMMENDER_SNAPSHOT)
+            snapshot.check_model(embedding_model_id())
+            vector_backend = snapshot.to_backend(VECTOR_RESCORE_FACTOR)
+        logger.info(f"✅ Loaded snapshot {RECOMMENDER_SNAPSHOT} ({len(snapshot)} locations, memory-mapped)")
+    else:
+        with metrics.load_timer("chroma_client"):
+            chroma_client = chromadb.PersistentClient(path="./chroma_db")
         
         # Check if collection exists
         try:
-            collection = chroma_client.get_collection(
-                name="sri_lanka_locations",
-                embedding_function=embedding_functions.SentenceTransformerEmbeddingFunction("all-MiniLM-L6-v2")
-            )
+            with metrics.load_timer("collection"):
+                collection = chroma_client.get_collection(
+                    name="sri_lanka_locations",
+                    embedding_function=embedding_function
+                )
             logger.info("✅ ChromaDB collection loaded successfully")
         except ValueError:
-            logger.error("❌ ChromaDB collection 'sri_lanka_locations' not found. Please run setup_chromadb.py first.")
-            collection = None
-            
+            raise ValueError("ChromaDB collection 'sri_lanka_locations' not found. Please run setup_chromadb.py first.")
+        
+        options = {}
+        if VECTOR_BACKEND == "numpy":
+            options = {"cache_dir": VECTOR_CACHE_DIR, "dtype": VECTOR_DTYPE, "rescore_factor": VECTOR_RESCORE_FACTOR,
+                       "embedding_model": embedding_model_id()}
+        with metrics.load_timer("vector_backend"):
+            vector_backend = create_vector_backend(collection, VECTOR_BACKEND, **options)
+    
+    logger.info(f"✅ Using {vector_backend.name} vector backend")
+    
+    # Inverted tag index answers /api/search-by-tag without the model
+    with metrics.load_timer("tag_index"):
+        records = vector_backend.get_all(["metadatas", "documents"])
+        tag_index = TagIndex(list(records["ids"]), list(records["metadatas"] or []))
+    logger.info(f"✅ Tag index built for {len(tag_index)} locations")
+    
+    # BM25 index for the exact-match fast path and hybrid ranking
+    with metrics.load_timer("lexical_index"):
+        lexical_index = LexicalIndex(tag_index.ids, tag_index.metadatas, list(records["documents"] or []))
+    
+    # Serialized catalog for /api/locations/all, replaced whenever the collection is reloaded
+    with metrics.load_timer("catalog_snapshot"):
+        catalog_snapshot = CatalogSnapshot(tag_index.ids, tag_index.metadatas)
+    
+    # Precomputed k-NN graph written by setup_chromadb.py (or carried in the snapshot)
+    with metrics.load_timer("similar_graph"):
+        similar_graph = snapshot.similar_graph if snapshot is not None else None
+        if similar_graph is None:
+            similar_graph = load_similar_graph()
+    if similar_graph is None:
+        logger.warning("⚠️ similar_locations.json not found - run setup_chromadb.py to enable similar locations")
+    
+    return ServingState(vector_backend, tag_index, lexical_index, catalog_snapshot, similar_graph,
+                        chroma_client=chroma_client, collection=collection, generation=generation)
+
+def initialize_chromadb() -> bool:
+    """
+    Initialize ChromaDB (or the RECOMMENDER_SNAPSHOT file) with error handling.
+    
+    The new state is built off to the side and swapped in only when it is
+    complete; if loading fails the previous state keeps serving. Returns
+    whether a new state was installed.
+    """
+    global embedding_function, serving_state
+    with state_lock:
+        try:
+            if embedding_function is None:
+                # Created unloaded; load_embedding_model() loads the model before or after startup.
+                # Query embeddings stay in the in-memory embedding_cache: the on-disk store is
+                # for catalog documents, and writing every unique query to it would grow it unbounded
+                embedding_function = create_embedding_function()
+            generation = serving_state.generation + 1 if serving_state is not None else 1
+            state = build_serving_state(generation)
+        except Exception as e:
+            kept = "keeping the previous collection" if serving_state is not None else "no collection loaded"
+            logger.error(f"❌ Failed to initialize ChromaDB ({kept}): {str(e)}")
+            return False
+        
+        serving_state = state
+        # Cached results belong to whatever collection was loaded before
+        embedding_cache.clear()
+        result_cache.clear()
+        return True
+
+def load_embedding_model():
+    """Load the embedding model and run the warm-up query"""
+    global model_state
+    model_state = "loading"
+    try:
+        with metrics.load_timer("embedding_model"):
+            embedding_function.load()
+        if WARMUP_QUERY:
+            with metrics.load_timer("warmup"):
+                embeddings = embedding_function([normalize_query(WARMUP_QUERY)])
+                state = serving_state
+                if state is not None:
+                    state.vector_backend.query(embeddings, 1, ["distances"])
+        model_state = "ready"
+        logger.info("✅ Embedding model loaded and warmed up")
     except Exception as e:
-        logger.error(f"❌ Failed to initialize ChromaDB: {str(e)}")
-        chroma_client = None
-        collection = None
+        model_state = "failed"
+        logger.error(f"❌ Failed to load embedding model: {str(e)}")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set, and then require it in X-Admin-Token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token header.")
+
+def require_model_ready():
+    """Semantic endpoints fail fast with 503 instead of blocking on a model that is still loading"""
+    if model_state != "ready":
+        raise HTTPException(
+            status_code=503,
+            detail=f"Embedding model is {model_state.replace('_', ' ')}. Retry shortly.",
+            headers={"Retry-After": "5"}
+        )
+
+def embed_texts(texts: List[str]) -> List[Any]:
+    """Embed normalized texts in one model call, skipping any that are already cached"""
+    embeddings = [embedding_cache.get(text) for text in texts]
+    missing = [text for text, embedding in zip(texts, embeddings) if embedding is None]
+
+    if missing:
+        with metrics.stage_timer("embed"):
+            computed = embedding_function(missing)
+        for text, embedding in zip(missing, computed):
+            embedding_cache.set(text, embedding)
+        computed_by_text = dict(zip(missing, computed))
+        embeddings = [computed_by_text[text] if embedding is None else embedding
+                      for text, embedding in zip(texts, embeddings)]
+
+    return embeddings
+
+def run_collection_query(query_embeddings: List[Any], n_results: int, include: List[str]) -> Dict[str, Any]:
+    state = serving_state
+    with metrics.stage_timer("vector_search"):
+        return state.vector_backend.query(query_embeddings, n_results, include)
+
+# Micro-batching scheduler for semantic queries from /api/recommend
+query_batcher = QueryBatcher(
+    embed_fn=embed_texts,
+    query_fn=run_collection_query,
+    max_batch_size=int(os.getenv("BATCH_MAX_SIZE", "32")),
+    max_wait_ms=float(os.getenv("BATCH_WINDOW_MS", "5"))
+)
+
+async def query_collection(state: ServingState, query_text: str, n: int, include: List[str]) -> Dict[str, Any]:
+    """Run a semantic query against the collection, caching the top-k results per loaded state"""
+    normalized = normalize_query(query_text)
+    # Keyed by generation so a query still in flight during a reload cannot cache old results as new
+    key = (state.generation, normalized, n, tuple(include))
+    results = result_cache.get(key)
+    if results is not None:
+        return results
+
+    async def compute():
+        results = await query_batcher.submit(normalized, n, include, metrics.current_request_timings())
+        result_cache.set(key, results)
+        return results
+
+    return await query_flight.do(key, compute)
+
+def vector_candidates(state: ServingState, n: int) -> int:
+    """How many vector hits to fetch for a query that returns n results"""
+    return max(n, HYBRID_CANDIDATES) if HYBRID_SEARCH and state.lexical_index is not None else n
+
+def lexical_fast_path(state: ServingState, query: str, n: int) -> Optional[Tuple[str, List[Tuple[int, float]]]]:
+    """Exact or high-confidence lexical matches as (served_by, [(position, lexical score)]), or None"""
+    if not LEXICAL_FAST_PATH or state.lexical_index is None:
+        return None
+    with metrics.stage_timer("lexical"):
+        return state.lexical_index.fast_path(query, n, LEXICAL_CONFIDENCE_RATIO)
+
+def fast_path_candidates(hits: List[Tuple[int, float]], n: int) -> int:
+    """How many vector hits to fetch to fill a fast-path answer up to n (0 when it is full)"""
+    return n + len(hits) if len(hits) < n else 0
+
+def complete_fast_path(
+    state: ServingState,
+    query: str,
+    served_by: str,
+    hits: List[Tuple[int, float]],
+    n: int,
+    vector: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Turn fast-path hits into a Chroma-shaped result, ranked first.
+    
+    With the model ready, the hits get their cosine distance to the query
+    and the remaining slots up to n are filled from the vector results.
+    While the model loads only the hits are returned, with distance None.
+    Each result carries its match type and lexical score alongside.
+    Positions in hits refer to state's lexical index.
+    """
+    lexical_index = state.lexical_index
+    ids = [lexical_index.ids[position] for position, _ in hits]
+    match_types = [served_by] * len(hits)
+    lexical_scores: List[Optional[float]] = [score for _, score in hits]
+    distances: List[Optional[float]] = [None] * len(hits)
+    metadatas = [lexical_index.metadatas[position] for position, _ in hits]
+    documents = [lexical_index.documents[position] for position, _ in hits]
+    
+    if model_state == "ready":
+        vector_ids = list(vector["ids"][0]) if vector else []
+        vector_distances = dict(zip(vector_ids, vector["distances"][0])) if vector else {}
+        unscored = [item_id for item_id in ids if item_id not in vector_distances]
+        if unscored:
+            embedding = embed_texts([normalize_query(query)])[0]
+            with metrics.stage_timer("vector_search"):
+                vector_distances.update(zip(unscored, state.vector_backend.score_ids(embedding, unscored)))
+        distances = [vector_distances[item_id] for item_id in ids]
+        
+        seen = set(ids)
+        for i, item_id in enumerate(vector_ids):
+            if len(ids) >= n:
+                break
+            if item_id in seen:
+                continue
+            ids.append(item_id)
+            match_types.append("vector")
+            lexical_scores.append(None)
+            distances.append(vector["distances"][0][i])
+            metadatas.append(vector["metadatas"][0][i])
+            documents.append(vector["documents"][0][i])
+    
+    return {
+        "ids": [ids],
+        "metadatas": [metadatas],
+        "distances": [distances],
+        "documents": [documents],
+        "match_types": [match_types],
+        "lexical_scores": [lexical_scores]
+    }
+
+def fuse_with_lexical(state: ServingState, query: str, results: Dict[str, Any], n: int) -> Tuple[Dict[str, Any], str]:
+    """Merge a query's vector hits with its BM25 hits by reciprocal rank fusion"""
+    lexical_index = state.lexical_index
+    if not HYBRID_SEARCH or lexical_index is None:
+        return split_query_results(results, 0, n), "vector"
+    with metrics.stage_timer("lexical"):
+        hits = lexical_index.search(query, HYBRID_CANDIDATES)
+    if not hits:
+        return split_query_results(results, 0, n), "vector"
+    
+    by_id = {
+        item_id: (metadata, distance, document)
+        for item_id, metadata, distance, document in zip(
+            results["ids"][0], results["metadatas"][0], results["distances"][0], results["documents"][0]
+        )
+    }
+    rankings = [list(results["ids"][0]), [lexical_index.ids[position] for position, _ in hits]]
+    fused = [item_id for item_id, _ in reciprocal_rank_fusion(rankings)[:n]]
+    
+    # Lexical-only hits still get a real similarity score against the query embedding
+    missing = [item_id for item_id in fused if item_id not in by_id]
+    if missing:
+        embedding = embed_texts([normalize_query(query)])[0]
+        with metrics.stage_timer("vector_search"):
+            distances = state.vector_backend.score_ids(embedding, missing)
+        for item_id, distance in zip(missing, distances):
+            position = lexical_index.positions[item_id]
+            by_id[item_id] = (lexical_index.metadatas[position], distance, lexical_index.documents[position])
+    
+    return {
+        "ids": [fused],
+        "metadatas": [[by_id[item_id][0] for item_id in fused]],
+        "distances": [[by_id[item_id][1] for item_id in fused]],
+        "documents": [[by_id[item_id][2] for item_id in fused]]
+    }, "hybrid"
+
+def build_recommendation(
+    state: ServingState,
+    query: str,
+    results: Dict[str, Any],
+    min_score: float,
+    served_by: str
+) -> Dict[str, Any]:
+    response = format_recommendations(query, results, min_score, state.vector_backend.metric)
+    response["served_by"] = served_by
+    metrics.QUERIES_SERVED.inc(path=served_by)
+    return response
+
+def format_recommendations(query: str, results: Dict[str, Any], min_score: float, metric: str = "l2") -> Dict[str, Any]:
+    """Turn a single-query Chroma result into the /api/recommend response shape"""
+    if not results["metadatas"] or not results["metadatas"][0]:
+        return {
+            "query": query,
+            "results": [],
+            "message": "No locations found matching your query"
+        }
+    
+    # Process results with similarity scores
+    processed_results = []
+    metadatas = results["metadatas"][0]
+    distances = results["distances"][0]
+    documents = results.get("documents", [[]])[0]
+    match_types = results.get("match_types", [[]])[0]
+    lexical_scores = results.get("lexical_scores", [[]])[0]
+    for i, (metadata, distance, document) in enumerate(zip(metadatas, distances, documents)):
+        # Convert distance to cosine similarity for the backend's metric;
+        # fast-path hits served before the model loads have no score and are not filtered
+        similarity_score = None if distance is None else similarity_from_distance(distance, metric)
+        
+        # Apply minimum score filter
+        if similarity_score is None or similarity_score >= min_score:
+            result_item = {
+                "rank": i + 1,
+                "similarity_score": None if similarity_score is None else round(similarity_score, 3),
+                "name": metadata.get("name", "Unknown"),
+                "location": metadata.get("location", "Unknown"),
+                "tags": metadata.get("tags", "").split(", ") if metadata.get("tags") else [],
+                "best_for": metadata.get("best_for", "").split(", ") if metadata.get("best_for") else [],
+                "popularity": metadata.get("popularity", "Unknown"),
+                "description_snippet": document[:200] + "..." if len(document) > 200 else document
+            }
+            if match_types:
+                result_item["match_type"] = match_types[i]
+                result_item["lexical_score"] = None if lexical_scores[i] is None else round(lexical_scores[i], 3)
+            processed_results.append(result_item)
+    
+    return {
+        "query": query,
+        "total_results": len(processed_results),
+        "results": processed_results,
+        "message": f"Found {len(processed_results)} locations matching '{query}'"
+    }
+
+def recommend_chunk(state: ServingState, items: List[RecommendItem]) -> List[Dict[str, Any]]:
+    """Embed a chunk of queries in one pass with one multi-query search, fast-path hits ranked first"""
+    fast = [lexical_fast_path(state, item.query, item.n) for item in items]
+    candidates = [
+        vector_candidates(state, item.n) if matched is None else fast_path_candidates(matched[1], item.n)
+        for item, matched in zip(items, fast)
+    ]
+    searched = [i for i, count in enumerate(candidates) if count]
+    results: Dict[int, Dict[str, Any]] = {}
+    if searched:
+        found = query_batcher.search_many(
+            [normalize_query(items[i].query) for i in searched],
+            [candidates[i] for i in searched],
+            RECOMMEND_INCLUDE
+        )
+        results = dict(zip(searched, found))
+    
+    responses = []
+    for i, item in enumerate(items):
+        if fast[i] is None:
+            merged, served_by = fuse_with_lexical(state, item.query, results[i], item.n)
+        else:
+            served_by, hits = fast[i]
+            merged = complete_fast_path(state, item.query, served_by, hits, item.n, results.get(i))
+        responses.append(build_recommendation(state, item.query, merged, item.min_score, served_by))
+    return responses
+
+def collect_component_metrics() -> List[str]:
+    """Export cache and batcher counters at scrape time"""
+    lines = [
+        "# HELP recommender_cache_events_total Cache lookups by cache and result",
+        "# TYPE recommender_cache_events_total counter",
+    ]
+    for name, cache in (("embedding", embedding_cache), ("result", result_cache)):
+        stats = cache.stats()
+        lines.append(f'recommender_cache_events_total{{cache="{name}",result="hit"}} {stats["hits"]}')
+        lines.append(f'recommender_cache_events_total{{cache="{name}",result="miss"}} {stats["misses"]}')
+    lines += [
+        "# HELP recommender_cache_entries Entries currently held by each cache",
+        "# TYPE recommender_cache_entries gauge",
+    ]
+    for name, cache in (("embedding", embedding_cache), ("result", result_cache)):
+        lines.append(f'recommender_cache_entries{{cache="{name}"}} {cache.stats()["size"]}')
+    
+    flight = query_flight.stats()
+    batcher = query_batcher.stats()
+    lines += [
+        "# HELP recommender_coalesced_queries_total Queries that waited on an identical in-flight query",
+        "# TYPE recommender_coalesced_queries_total counter",
+        f"recommender_coalesced_queries_total {flight['coalesced']}",
+        "# HELP recommender_batches_total Batched encode+search calls by batch size",
+        "# TYPE recommender_batches_total counter",
+    ]
+    for size, count in batcher["batch_size_counts"].items():
+        lines.append(f'recommender_batches_total{{size="{size}"}} {count}')
+    lines += [
+        "# HELP recommender_batch_errors_total Batched calls that raised",
+        "# TYPE recommender_batch_errors_total counter",
+        f"recommender_batch_errors_total {batcher['errors']}",
+        "# HELP recommender_batch_queue_depth Queries waiting for the next batch",
+        "# TYPE recommender_batch_queue_depth gauge",
+        f"recommender_batch_queue_depth {batcher['queue_depth']}",
+        "# HELP recommender_model_ready Whether the embedding model is loaded and warmed up",
+        "# TYPE recommender_model_ready gauge",
+        f"recommender_model_ready {int(model_state == 'ready')}",
+    ]
+    return lines
+
+metrics.registry.add_collector(collect_component_metrics)
 
 # Initialize ChromaDB on startup
 @app.on_event("startup")
 async def startup_event():
+    global model_loader
     initialize_chromadb()
+    await query_batcher.start()
+    if MODEL_LOAD_MODE == "background":
+        model_loader = asyncio.create_task(run_in_threadpool(load_embedding_model))
+    else:
+        load_embedding_model()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await query_batcher.stop()
 
 @app.get("/")
 async def root():
@@ -61,12 +584,66 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     """Check if ChromaDB is properly initialized"""
-    if collection is None:
+    if serving_state is None:
         return JSONResponse(
             status_code=503,
             content={"status": "error", "message": "ChromaDB not initialized. Please run setup_chromadb.py first."}
         )
-    return {"status": "healthy", "collection_initialized": True}
+    return {"status": "healthy", "collection_initialized": True, "model": model_state}
+
+@app.get("/api/health/live")
+async def liveness_check():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/api/health/ready")
+async def readiness_check():
+    """Readiness: the collection is loaded and the embedding model is warmed up"""
+    ready = serving_state is not None and model_state == "ready"
+    content = {
+        "status": "ready" if ready else "not_ready",
+        "collection_initialized": serving_state is not None,
+        "model": model_state
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+@app.post("/api/admin/reload", dependencies=[Depends(require_admin)])
+async def reload_collection():
+    """
+    Reload the collection and drop cached results, e.g. after setup_chromadb.py --incremental
+    
+    Requires the X-Admin-Token header to match ADMIN_TOKEN. Requests in
+    flight finish on the state they started with; if the reload fails the
+    previous collection keeps serving.
+    """
+    reloaded = await run_in_threadpool(initialize_chromadb)
+    if model_state == "failed":
+        await run_in_threadpool(load_embedding_model)
+    if not reloaded:
+        detail = "ChromaDB collection could not be reloaded."
+        if serving_state is not None:
+            detail += " Still serving the previously loaded collection."
+        raise HTTPException(status_code=503, detail=detail)
+    return {"status": "reloaded", "count": serving_state.vector_backend.count()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of latency histograms, counters and load times"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Report hit/miss counters for the query caches"""
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "query_single_flight": query_flight.stats()
+    }
+
+@app.get("/api/batcher/stats")
+async def batcher_stats():
+    """Report batch-size and queue-wait statistics for the query scheduler"""
+    return query_batcher.stats()
 
 @app.get("/api/recommend")
 async def recommend_locations(
@@ -77,6 +654,14 @@ async def recommend_locations(
     """
     Recommend locations based on semantic search
     
+    Locations a query exactly names (or matches with high lexical
+    confidence) are ranked first, and the rest of the n results come from
+    the vector search; other queries fuse BM25 and vector hits. served_by in
+    the response is "exact", "lexical", "hybrid" or "vector", and fast-path
+    results carry their match_type and lexical_score. similarity_score is
+    always the cosine similarity, or null for fast-path hits served while
+    the model is still loading.
+    
     Args:
         query: Search query (e.g., "beach vacation", "historical sites", "adventure")
         n: Number of results to return (1-20)
@@ -85,158 +670,281 @@ async def recommend_locations(
     Returns:
         JSON response with recommended locations
     """
-    if collection is None:
+    state = serving_state
+    if state is None:
         raise HTTPException(
             status_code=503, 
             detail="ChromaDB collection not initialized. Please run setup_chromadb.py first."
         )
     
+    # Place names and towns are answered from the lexical index, even while the model loads
+    fast = lexical_fast_path(state, query, n)
+    if fast is None:
+        require_model_ready()
+    
     try:
         logger.info(f"🔍 Searching for: '{query}' (n={n}, min_score={min_score})")
         
-        # Perform semantic search
-        results = collection.query(
-            query_texts=[query],
-            n_results=n,
-            include=["metadatas", "distances", "documents"]
-        )
+        if fast is not None:
+            served_by, hits = fast
+            count = fast_path_candidates(hits, n) if model_state == "ready" else 0
+            vector = await query_collection(state, query, count, RECOMMEND_INCLUDE) if count else None
+            results = await run_in_threadpool(complete_fast_path, state, query, served_by, hits, n, vector)
+        else:
+            # Perform semantic search, then fuse in lexical hits
+            results = await query_collection(state, query, vector_candidates(state, n), RECOMMEND_INCLUDE)
+            results, served_by = await run_in_threadpool(fuse_with_lexical, state, query, results, n)
         
-        if not results["metadatas"] or not results["metadatas"][0]:
-            return {
-                "query": query,
-                "results": [],
-                "message": "No locations found matching your query"
-            }
+        with metrics.stage_timer("filter_format"):
+            response = build_recommendation(state, query, results, min_score, served_by)
+        logger.info(f"✅ Found {response.get('total_results', 0)} locations matching query ({served_by})")
         
-        # Process results with similarity scores
-        processed_results = []
-        metadatas = results["metadatas"][0]
-        distances = results["distances"][0]
-        documents = results.get("documents", [[]])[0]
-        
-        for i, (metadata, distance, document) in enumerate(zip(metadatas, distances, documents)):
-            # Convert distance to similarity score (lower distance = higher similarity)
-            similarity_score = max(0.0, 1.0 - distance)
-            
-            # Apply minimum score filter
-            if similarity_score >= min_score:
-                result_item = {
-                    "rank": i + 1,
-                    "similarity_score": round(similarity_score, 3),
-                    "name": metadata.get("name", "Unknown"),
-                    "location": metadata.get("location", "Unknown"),
-                    "tags": metadata.get("tags", "").split(", ") if metadata.get("tags") else [],
-                    "best_for": metadata.get("best_for", "").split(", ") if metadata.get("best_for") else [],
-                    "popularity": metadata.get("popularity", "Unknown"),
-                    "description_snippet": document[:200] + "..." if len(document) > 200 else document
-                }
-                processed_results.append(result_item)
-        
-        logger.info(f"✅ Found {len(processed_results)} locations matching query")
-        
-        return {
-            "query": query,
-            "total_results": len(processed_results),
-            "results": processed_results,
-            "message": f"Found {len(processed_results)} locations matching '{query}'"
-        }
+        with metrics.stage_timer("serialize"):
+            return JSONResponse(response)
         
     except Exception as e:
+        metrics.ERRORS.inc(endpoint="recommend")
         logger.error(f"❌ Search error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@app.post("/api/recommend/batch")
+async def recommend_batch(
+    request: Request,
+    batch: BatchRecommendRequest,
+    stream: bool = Query(False, description="Stream results as NDJSON, one line per query")
+):
+    """
+    Recommend locations for many queries at once
+    
+    Queries are embedded and searched in chunks of BATCH_RECOMMEND_CHUNK_SIZE. Each
+    result has the same shape as /api/recommend (including served_by) plus its
+    position in the request.
+    Pass stream=true (or Accept: application/x-ndjson) to receive each chunk as
+    soon as it completes.
+    """
+    state = serving_state
+    if state is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="ChromaDB collection not initialized. Please run setup_chromadb.py first."
+        )
+    require_model_ready()
+    
+    if len(batch.items) > BATCH_RECOMMEND_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many queries in batch ({len(batch.items)} > {BATCH_RECOMMEND_MAX_ITEMS})"
+        )
+    
+    chunks = [batch.items[i:i + BATCH_RECOMMEND_CHUNK_SIZE]
+              for i in range(0, len(batch.items), BATCH_RECOMMEND_CHUNK_SIZE)]
+    logger.info(f"🔍 Batch search for {len(batch.items)} queries in {len(chunks)} chunks")
+    
+    if stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        async def generate() -> AsyncIterator[bytes]:
+            index = 0
+            for chunk in chunks:
+                try:
+                    responses = await run_in_threadpool(recommend_chunk, state, chunk)
+                except Exception as e:
+                    metrics.ERRORS.inc(endpoint="recommend_batch")
+                    logger.error(f"❌ Batch search error: {str(e)}")
+                    yield (json.dumps({"error": f"Search failed: {str(e)}"}) + "\n").encode("utf-8")
+                    return
+                lines = []
+                for response in responses:
+                    lines.append(json.dumps({"index": index, **response}))
+                    index += 1
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+        
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+    
+    try:
+        responses = []
+        for chunk in chunks:
+            responses.extend(await run_in_threadpool(recommend_chunk, state, chunk))
+        
+        with metrics.stage_timer("serialize"):
+            return JSONResponse({
+                "total_queries": len(responses),
+                "results": [{"index": i, **response} for i, response in enumerate(responses)]
+            })
+        
+    except Exception as e:
+        metrics.ERRORS.inc(endpoint="recommend_batch")
+        logger.error(f"❌ Batch search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
 @app.get("/api/search-by-tag")
 async def search_by_tag(
-    tag: str = Query(..., description="Tag to search for (e.g., 'beach', 'historical')"),
-    n: int = Query(10, ge=1, le=50, description="Number of results to return")
+    tag: str = Query(..., description="Tag to search for (e.g., 'beach', 'historical'); comma-separate several tags"),
+    n: int = Query(10, ge=1, le=50, description="Number of results to return"),
+    mode: Literal["or", "and"] = Query("or", description="Match any (or) or all (and) of the tags"),
+    query: Optional[str] = Query(None, min_length=1, description="Optional query to rank tagged locations by similarity")
 ):
     """
     Search locations by specific tags
+    
+    Tags are looked up exactly in the tag and best_for index. Matches are
+    ranked by popularity, or by similarity to query when one is given.
     """
-    if collection is None:
+    state = serving_state
+    if state is None or state.tag_index is None:
         raise HTTPException(
             status_code=503, 
             detail="ChromaDB collection not initialized."
         )
+    if query:
+        require_model_ready()
     
+    tag_index = state.tag_index
     try:
-        # Use tag-based semantic search
-        tag_query = f"places for {tag} activities {tag} locations"
+        tags = [t for t in tag.split(",") if t.strip()]
+        with metrics.stage_timer("tag_lookup"):
+            positions = tag_index.lookup(tags, mode)
         
-        results = collection.query(
-            query_texts=[tag_query],
-            n_results=n,
-            include=["metadatas", "distances"]
-        )
-        
-        if not results["metadatas"] or not results["metadatas"][0]:
+        if not positions:
             return {
                 "tag": tag,
                 "results": [],
                 "message": f"No locations found with tag '{tag}'"
             }
         
-        # Filter results that actually contain the tag
+        if query:
+            # Rank only the tagged locations against the query
+            embedding = (await run_in_threadpool(embed_texts, [normalize_query(query)]))[0]
+            with metrics.stage_timer("vector_search"):
+                distances = await run_in_threadpool(
+                    state.vector_backend.score_ids, embedding, [tag_index.ids[p] for p in positions]
+                )
+            ranked = sorted(zip(positions, distances), key=lambda item: item[1])[:n]
+        else:
+            ranked = [(p, None) for p in tag_index.rank_by_popularity(positions)[:n]]
+        
+        format_started = time.perf_counter()
         filtered_results = []
-        for metadata, distance in zip(results["metadatas"][0], results["distances"][0]):
-            tags = metadata.get("tags", "").lower()
-            best_for = metadata.get("best_for", "").lower()
-            
-            if tag.lower() in tags or tag.lower() in best_for:
-                similarity_score = max(0.0, 1.0 - distance)
-                filtered_results.append({
-                    "name": metadata.get("name"),
-                    "location": metadata.get("location"),
-                    "tags": metadata.get("tags", "").split(", "),
-                    "best_for": metadata.get("best_for", "").split(", "),
-                    "popularity": metadata.get("popularity"),
-                    "similarity_score": round(similarity_score, 3)
-                })
+        for position, distance in ranked:
+            metadata = tag_index.metadatas[position]
+            result_item = {
+                "id": tag_index.ids[position],
+                "name": metadata.get("name"),
+                "location": metadata.get("location"),
+                "tags": split_list_field(metadata.get("tags")),
+                "best_for": split_list_field(metadata.get("best_for")),
+                "popularity": metadata.get("popularity")
+            }
+            if distance is not None:
+                result_item["similarity_score"] = round(similarity_from_distance(distance, state.vector_backend.metric), 3)
+            filtered_results.append(result_item)
+        elapsed = time.perf_counter() - format_started
+        metrics.STAGE_SECONDS.observe(elapsed, stage="filter_format")
+        metrics.record_request_timing("filter_format", elapsed)
         
-        return {
-            "tag": tag,
-            "total_results": len(filtered_results),
-            "results": filtered_results
-        }
+        with metrics.stage_timer("serialize"):
+            return JSONResponse({
+                "tag": tag,
+                "total_results": len(filtered_results),
+                "results": filtered_results
+            })
         
     except Exception as e:
+        metrics.ERRORS.inc(endpoint="search_by_tag")
         logger.error(f"❌ Tag search error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Tag search failed: {str(e)}")
 
 @app.get("/api/locations/all")
-async def get_all_locations():
-    """Get all locations in the database"""
-    if collection is None:
+async def get_all_locations(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; omit to return every location"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    fields: Optional[str] = Query(None, description=f"Comma-separated subset of {', '.join(LOCATION_FIELDS)}")
+):
+    """
+    Get all locations in the database
+    
+    Served from a precomputed snapshot of the catalog. Supports cursor
+    pagination, field selection, ETag / If-None-Match and gzip.
+    """
+    state = serving_state
+    if state is None or state.catalog_snapshot is None:
         raise HTTPException(
             status_code=503, 
             detail="ChromaDB collection not initialized."
         )
     
+    selected = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in LOCATION_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
     try:
-        # Get all items from collection
-        results = collection.get(include=["metadatas"])
-        
-        if not results["metadatas"]:
-            return {"total": 0, "locations": []}
-        
-        locations = []
-        for metadata in results["metadatas"]:
-            locations.append({
-                "name": metadata.get("name"),
-                "location": metadata.get("location"),
-                "tags": metadata.get("tags", "").split(", ") if metadata.get("tags") else [],
-                "best_for": metadata.get("best_for", "").split(", ") if metadata.get("best_for") else [],
-                "popularity": metadata.get("popularity")
-            })
-        
-        return {
-            "total": len(locations),
-            "locations": locations
-        }
-        
+        with metrics.stage_timer("serialize"):
+            page = state.catalog_snapshot.page(cursor, limit, selected)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        metrics.ERRORS.inc(endpoint="locations_all")
         logger.error(f"❌ Get all locations error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve locations: {str(e)}")
+    
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+    
+    body = page.body
+    if (0 <= CATALOG_GZIP_MIN_BYTES <= len(body)
+            and "gzip" in request.headers.get("accept-encoding", "")):
+        body = page.gzipped()
+        headers["Content-Encoding"] = "gzip"
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/locations/{location_id}/similar")
+async def get_similar_locations(
+    location_id: str,
+    n: int = Query(5, ge=1, le=20, description="Number of similar locations to return")
+):
+    """
+    Get locations similar to the given one
+    
+    Answered from the k-NN graph precomputed by setup_chromadb.py, so no
+    embedding or vector search happens at request time. similarity_score is
+    the cosine similarity between the two locations' embeddings.
+    """
+    state = serving_state
+    if state is None or state.catalog_snapshot is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="ChromaDB collection not initialized."
+        )
+    catalog_snapshot, similar_graph = state.catalog_snapshot, state.similar_graph
+    if similar_graph is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Similar locations not computed. Please run setup_chromadb.py first."
+        )
+    
+    location = catalog_snapshot.by_id.get(location_id)
+    if location is None:
+        raise HTTPException(status_code=404, detail=f"Location '{location_id}' not found")
+    
+    results = []
+    for neighbor_id, similarity in similar_graph.get(location_id, []):
+        neighbor = catalog_snapshot.by_id.get(neighbor_id)
+        if neighbor is None:
+            continue
+        results.append({**neighbor, "similarity_score": round(similarity, 3)})
+        if len(results) >= n:
+            break
+    
+    return {
+        "id": location_id,
+        "name": location["name"],
+        "total_results": len(results),
+        "results": results
+    }
 
 if __name__ == "__main__":
     import uvicorn
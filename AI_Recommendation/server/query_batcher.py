@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingQuery:
+    __slots__ = ("text", "n", "include", "future", "timings", "enqueued_at")
+
+    def __init__(self, text: str, n: int, include: Sequence[str], future: asyncio.Future,
+                 timings: Optional[Dict[str, float]] = None):
+        self.text = text
+        self.n = n
+        self.include = include
+        self.future = future
+        self.timings = timings
+        self.enqueued_at = time.perf_counter()
+
+
+def split_query_results(results: Dict[str, Any], index: int, n: int) -> Dict[str, Any]:
+    """Slice one query's top-n hits out of a multi-query Chroma result"""
+    single = {}
+    for key, value in results.items():
+        if isinstance(value, list) and len(value) > index and isinstance(value[index], (list, tuple)):
+            single[key] = [list(value[index][:n])]
+        elif isinstance(value, list) and len(value) > index and hasattr(value[index], "shape"):
+            single[key] = [value[index][:n]]
+        else:
+            single[key] = value
+    return single
+
+
+class QueryBatcher:
+    """
+    Micro-batching scheduler for semantic queries.
+
+    Concurrent submissions are collected for up to ``max_wait_ms`` or until
+    ``max_batch_size`` queries are waiting, then encoded in one batched model
+    call and searched with a single multi-query ``collection.query`` on a
+    dedicated worker thread, keeping the event loop free.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[Any]],
+        query_fn: Callable[..., Dict[str, Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        stats_window: int = 2048
+    ):
+        self.embed_fn = embed_fn
+        self.query_fn = query_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Statistics
+        self.batches = 0
+        self.queries = 0
+        self.errors = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        self._queue_waits = deque(maxlen=stats_window)
+        self._batch_durations = deque(maxlen=stats_window)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-batcher")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, text: str, n: int, include: Sequence[str],
+                     timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Queue one query and wait for its slice of the batched result.
+
+        If a timings dict is given it receives the queue wait plus the embed
+        and vector_search durations of the batch the query ran in.
+        """
+        if not self.running:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingQuery(text, n, include, future, timings))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[_PendingQuery]) -> None:
+        started = time.perf_counter()
+        for item in batch:
+            self._queue_waits.append(started - item.enqueued_at)
+
+        batch_timings: Dict[str, float] = {}
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._run_batch, batch, batch_timings
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Batched query failed: {str(e)}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.queries += len(batch)
+        self.batch_size_counts[len(batch)] = self.batch_size_counts.get(len(batch), 0) + 1
+        self._batch_durations.append(time.perf_counter() - started)
+
+        for item, result in zip(batch, results):
+            if item.timings is not None:
+                item.timings["queue"] = item.timings.get("queue", 0.0) + started - item.enqueued_at
+                for stage, seconds in batch_timings.items():
+                    item.timings[stage] = item.timings.get(stage, 0.0) + seconds
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def _run_batch(self, batch: List[_PendingQuery], timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        return self.search_many(
+            [item.text for item in batch],
+            [item.n for item in batch],
+            sorted({field for item in batch for field in item.include}),
+            timings
+        )
+
+    def search_many(self, texts: List[str], ns: List[int], include: List[str],
+                    timings: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """Encode unique texts once, run one multi-query search and fan results back out"""
+        unique_texts = list(dict.fromkeys(texts))
+        started = time.perf_counter()
+        embeddings = self.embed_fn(unique_texts)
+        embedded = time.perf_counter()
+
+        results = self.query_fn(
+            query_embeddings=list(embeddings),
+            n_results=max(ns),
+            include=include
+        )
+
+        if timings is not None:
+            timings["embed"] = embedded - started
+            timings["vector_search"] = time.perf_counter() - embedded
+
+        positions = {text: i for i, text in enumerate(unique_texts)}
+        return [split_query_results(results, positions[text], n) for text, n in zip(texts, ns)]
+
+    def stats(self) -> Dict[str, Any]:
+        waits_ms = sorted(w * 1000.0 for w in self._queue_waits)
+        durations_ms = sorted(d * 1000.0 for d in self._batch_durations)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "queries": self.queries,
+            "errors": self.errors,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "queue_wait_ms": _percentiles(waits_ms),
+            "batch_duration_ms": _percentiles(durations_ms),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+def _percentiles(sorted_values: List[float]) -> Dict[str, float]:
+    if not sorted_values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    def pick(q: float) -> float:
+        return round(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))], 3)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(sorted_values[-1], 3)}
@@ -1,10 +1,19 @@
+import argparse
+import hashlib
 import json
 import chromadb
-from sentence_transformers import SentenceTransformer
-from chromadb.utils import embedding_functions
+import numpy as np
 import os
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from embedding_store import encode_texts
+from embeddings import create_embedding_function, create_embedding_store, create_sentence_model, embedding_model_id
+from similar_graph import (
+    DEFAULT_NEIGHBORS, SIMILAR_GRAPH_PATH, build_similar_graph, load_similar_graph,
+    rebuild_similar_graph_from_collection, save_similar_graph
+)
+from snapshot import export_snapshot, load_snapshot
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,19 +44,29 @@ def load_locations() -> List[Dict[str, Any]]:
 
 # Removed sample data creation function - data should come from your JSON file
 
+REQUIRED_FIELDS = ["id", "name", "location", "description", "tags", "best_for", "popularity"]
+
+def validate_location(loc: Any) -> Optional[str]:
+    """Validate a single location record, returning an error message or None if valid"""
+    if not isinstance(loc, dict):
+        return "is not a JSON object"
+    
+    for field in REQUIRED_FIELDS:
+        if field not in loc:
+            return f"missing required field: {field}"
+    
+    # Validate data types
+    if not isinstance(loc["tags"], list) or not isinstance(loc["best_for"], list):
+        return "has invalid data types for tags or best_for"
+    
+    return None
+
 def validate_location_data(locations: List[Dict[str, Any]]) -> bool:
     """Validate location data structure"""
-    required_fields = ["id", "name", "location", "description", "tags", "best_for", "popularity"]
-    
     for i, loc in enumerate(locations):
-        for field in required_fields:
-            if field not in loc:
-                logger.error(f"❌ Location {i} missing required field: {field}")
-                return False
-                
-        # Validate data types
-        if not isinstance(loc["tags"], list) or not isinstance(loc["best_for"], list):
-            logger.error(f"❌ Location {i} has invalid data types for tags or best_for")
+        error = validate_location(loc)
+        if error:
+            logger.error(f"❌ Location {i} {error}")
             return False
     
     logger.info("✅ Location data validation passed")
@@ -73,7 +92,23 @@ def create_enhanced_descriptions(locations: List[Dict[str, Any]]) -> List[str]:
     
     return descriptions
 
-def create_chroma_collection(locations: List[Dict[str, Any]]) -> None:
+def fingerprint_description(description: str) -> str:
+    """Content hash of an enhanced description, used to detect changed locations"""
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+def build_metadatas(locations: List[Dict[str, Any]], descriptions: List[str]) -> List[Dict[str, Any]]:
+    """Prepare the metadata stored alongside each location's embedding"""
+    return [{
+        "name": loc["name"],
+        "location": loc["location"],
+        "tags": ", ".join(loc["tags"]),
+        "best_for": ", ".join(loc["best_for"]),
+        "popularity": loc["popularity"],
+        "description": loc["description"],  # Store original description
+        "content_hash": fingerprint_description(desc)
+    } for loc, desc in zip(locations, descriptions)]
+
+def create_chroma_collection(locations: List[Dict[str, Any]], compute_similar: bool = True) -> None:
     """Create ChromaDB collection with enhanced error handling"""
     try:
         # Validate input data
@@ -84,26 +119,22 @@ def create_chroma_collection(locations: List[Dict[str, Any]]) -> None:
         
         # Initialize embedding model
         logger.info("📊 Loading embedding model...")
-        model = SentenceTransformer("all-MiniLM-L6-v2")
+        model = create_sentence_model()
+        store = create_embedding_store()
         
         # Create enhanced descriptions for better search
         logger.info("📝 Creating enhanced descriptions...")
         descriptions = create_enhanced_descriptions(locations)
         
-        # Generate embeddings
+        # Generate embeddings, reusing any the embedding store already holds
         logger.info("🔮 Generating embeddings...")
-        embeddings = model.encode(descriptions, show_progress_bar=True).tolist()
+        embeddings = encode_texts(model, descriptions, store, show_progress_bar=True).tolist()
+        if store is not None:
+            logger.info(f"♻️ Reused {store.hits} stored embeddings, encoded {store.misses} new ones")
         
         # Prepare metadata
         logger.info("📋 Preparing metadata...")
-        metadatas = [{
-            "name": loc["name"],
-            "location": loc["location"],
-            "tags": ", ".join(loc["tags"]),
-            "best_for": ", ".join(loc["best_for"]),
-            "popularity": loc["popularity"],
-            "description": loc["description"]  # Store original description
-        } for loc in locations]
+        metadatas = build_metadatas(locations, descriptions)
         
         ids = [loc["id"] for loc in locations]
         
@@ -123,10 +154,10 @@ def create_chroma_collection(locations: List[Dict[str, Any]]) -> None:
         except Exception as e:
             logger.info(f"📂 No existing collection found - creating new one ({str(e)})")
         
-        # Create new collection
+        # Create new collection, sharing the already loaded model with its embedding function
         collection = client.create_collection(
             name="sri_lanka_locations",
-            embedding_function=embedding_functions.SentenceTransformerEmbeddingFunction("all-MiniLM-L6-v2"),
+            embedding_function=create_embedding_function(model, store),
             metadata={"description": "Sri Lanka tourist locations with semantic search capabilities"}
         )
         
@@ -150,6 +181,11 @@ def create_chroma_collection(locations: List[Dict[str, Any]]) -> None:
         count = collection.count()
         logger.info(f"✅ ChromaDB collection created successfully with {count} locations!")
         
+        if compute_similar:
+            # Precompute "similar locations" from the embeddings we already have
+            logger.info("🕸️ Computing similar-locations graph...")
+            save_similar_graph(build_similar_graph(ids, embeddings, DEFAULT_NEIGHBORS), DEFAULT_NEIGHBORS)
+        
         # Test the collection with a sample query
         logger.info("🔍 Testing collection with sample query...")
         test_results = collection.query(
@@ -170,17 +206,183 @@ def create_chroma_collection(locations: List[Dict[str, Any]]) -> None:
         logger.error(f"❌ Error creating ChromaDB collection: {str(e)}")
         raise
 
+def sync_chroma_collection(locations: List[Dict[str, Any]], batch_size: int = 100, page_size: int = 5000) -> Dict[str, int]:
+    """
+    Incrementally sync the collection with the location data.
+    
+    Each location's enhanced description is fingerprinted and compared with the
+    content_hash stored in the collection. Only new or changed locations are
+    re-embedded and upserted; ids that disappeared from the data are deleted.
+    The collection is never dropped, so a running server keeps serving it.
+    Stored fingerprints are read page_size records at a time.
+    
+    Returns:
+        Counts of added, updated, unchanged and removed locations
+    """
+    try:
+        if not validate_location_data(locations):
+            raise ValueError("Location data validation failed")
+        
+        logger.info("🔄 Starting incremental ChromaDB sync...")
+        descriptions = create_enhanced_descriptions(locations)
+        metadatas = build_metadatas(locations, descriptions)
+        ids = [loc["id"] for loc in locations]
+        
+        store = create_embedding_store()
+        client = chromadb.PersistentClient(path="./chroma_db")
+        collection = client.get_or_create_collection(
+            name="sri_lanka_locations",
+            embedding_function=create_embedding_function(store=store),
+            metadata={"description": "Sri Lanka tourist locations with semantic search capabilities"}
+        )
+        
+        # Fingerprints currently stored in the collection
+        existing_hashes = {}
+        for offset in range(0, collection.count(), page_size):
+            existing = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            for item_id, metadata in zip(existing["ids"], existing["metadatas"]):
+                existing_hashes[item_id] = (metadata or {}).get("content_hash")
+        
+        changed = []
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        for i, (item_id, metadata) in enumerate(zip(ids, metadatas)):
+            if item_id not in existing_hashes:
+                counts["added"] += 1
+                changed.append(i)
+            elif existing_hashes[item_id] != metadata["content_hash"]:
+                counts["updated"] += 1
+                changed.append(i)
+            else:
+                counts["unchanged"] += 1
+        
+        current_ids = set(ids)
+        removed_ids = [item_id for item_id in existing_hashes if item_id not in current_ids]
+        counts["removed"] = len(removed_ids)
+        
+        if changed:
+            logger.info(f"🔮 Generating embeddings for {len(changed)} new or changed locations...")
+            model = create_sentence_model()
+            
+            for start in range(0, len(changed), batch_size):
+                batch = changed[start:start + batch_size]
+                batch_descriptions = [descriptions[i] for i in batch]
+                embeddings = encode_texts(model, batch_descriptions, store).tolist()
+                
+                collection.upsert(
+                    ids=[ids[i] for i in batch],
+                    embeddings=embeddings,
+                    metadatas=[metadatas[i] for i in batch],
+                    documents=batch_descriptions
+                )
+                logger.info(f"📦 Upserted batch {start//batch_size + 1} ({len(batch)} items)")
+        
+        for start in range(0, len(removed_ids), batch_size):
+            collection.delete(ids=removed_ids[start:start + batch_size])
+        
+        if removed_ids:
+            logger.info(f"🗑️ Removed {len(removed_ids)} locations no longer in the data")
+        
+        if changed or removed_ids or not os.path.exists(SIMILAR_GRAPH_PATH):
+            # Neighbours of unchanged locations can change too, so rebuild from stored embeddings
+            logger.info("🕸️ Recomputing similar-locations graph...")
+            rebuild_similar_graph_from_collection(collection, DEFAULT_NEIGHBORS)
+        
+        logger.info(
+            f"✅ Sync complete: {counts['added']} added, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['removed']} removed "
+            f"({collection.count()} locations in collection)"
+        )
+        return counts
+        
+    except Exception as e:
+        logger.error(f"❌ Error syncing ChromaDB collection: {str(e)}")
+        raise
+
+def export_chroma_snapshot(path: str) -> Dict[str, Any]:
+    """Write the collection and its similar-locations graph to a single snapshot file"""
+    client = chromadb.PersistentClient(path="./chroma_db")
+    collection = client.get_collection("sri_lanka_locations", embedding_function=None)
+    manifest = export_snapshot(collection, path, embedding_model_id(), load_similar_graph())
+    logger.info(f"✅ Exported {manifest['count']} locations ({manifest['dim']}-d float16) to {path}")
+    return manifest
+
+def import_chroma_snapshot(path: str, batch_size: int = 100) -> int:
+    """
+    Rebuild the collection from a snapshot without re-encoding anything.
+
+    Embeddings come back normalized and rounded to float16 precision.
+    """
+    snapshot = load_snapshot(path, verify=True)
+    snapshot.check_model(embedding_model_id())
+    
+    client = chromadb.PersistentClient(path="./chroma_db")
+    if "sri_lanka_locations" in [col.name for col in client.list_collections()]:
+        client.delete_collection("sri_lanka_locations")
+        logger.info("🗑️ Deleted existing collection")
+    
+    metadata = dict(snapshot.manifest.get("collection_metadata") or {})
+    metadata.setdefault("hnsw:space", snapshot.metric)
+    collection = client.create_collection(name="sri_lanka_locations", embedding_function=None, metadata=metadata)
+    
+    for start in range(0, len(snapshot), batch_size):
+        end = min(start + batch_size, len(snapshot))
+        collection.add(
+            ids=snapshot.ids[start:end],
+            embeddings=np.asarray(snapshot.embeddings[start:end], dtype=np.float32),
+            metadatas=snapshot.metadatas[start:end],
+            documents=snapshot.documents[start:end]
+        )
+    
+    if snapshot.similar_graph is not None:
+        save_similar_graph(snapshot.similar_graph, DEFAULT_NEIGHBORS)
+    else:
+        rebuild_similar_graph_from_collection(collection, DEFAULT_NEIGHBORS)
+    
+    logger.info(f"✅ Imported {collection.count()} locations from {path}")
+    return collection.count()
+
 def main():
     """Main function to set up ChromaDB"""
+    parser = argparse.ArgumentParser(description="Build the Sri Lanka locations ChromaDB collection")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-embed new or changed locations instead of rebuilding the collection"
+    )
+    snapshot_group = parser.add_mutually_exclusive_group()
+    snapshot_group.add_argument(
+        "--export-snapshot",
+        metavar="PATH",
+        help="Write the existing collection to a portable snapshot file and exit"
+    )
+    snapshot_group.add_argument(
+        "--import-snapshot",
+        metavar="PATH",
+        help="Rebuild the collection from a snapshot file instead of sri_lanka_locations.json"
+    )
+    args = parser.parse_args()
+    
+    if args.export_snapshot:
+        export_chroma_snapshot(args.export_snapshot)
+        return
+    
     try:
         logger.info("🌴 Sri Lanka Location Recommender - Database Setup")
         logger.info("=" * 50)
         
-        # Load location data
-        locations = load_locations()
-        
-        # Create ChromaDB collection
-        create_chroma_collection(locations)
+        if args.import_snapshot:
+            # Restore a collection exported elsewhere, no model needed
+            import_chroma_snapshot(args.import_snapshot)
+        else:
+            # Load location data
+            locations = load_locations()
+            
+            if args.incremental:
+                # Sync changes into the live collection
+                sync_chroma_collection(locations)
+            else:
+                # Create ChromaDB collection
+                create_chroma_collection(locations)
         
         logger.info("=" * 50)
         logger.info("🎉 Setup completed successfully!")
@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_GRAPH_PATH = "./similar_locations.json"
+DEFAULT_NEIGHBORS = 10
+
+
+def build_similar_graph(ids: Sequence[str], embeddings: Any, k: int = DEFAULT_NEIGHBORS,
+                        block_size: int = 1024) -> Dict[str, List[List[Any]]]:
+    """
+    Compute each location's top-k neighbours by cosine similarity.
+
+    Rows are processed in blocks so memory stays at block_size x N scores.
+    Returns {id: [[neighbour_id, similarity], ...]} ordered best first.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if len(ids) == 0:
+        return {}
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms
+    k = min(k, len(ids) - 1)
+
+    graph: Dict[str, List[List[Any]]] = {}
+    for start in range(0, len(ids), block_size):
+        scores = matrix[start:start + block_size] @ matrix.T
+        for offset, row in enumerate(scores):
+            position = start + offset
+            row[position] = -np.inf  # never recommend a location as similar to itself
+            if k <= 0:
+                graph[ids[position]] = []
+                continue
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            graph[ids[position]] = [[ids[i], round(float(row[i]), 4)] for i in top]
+
+    return graph
+
+
+def save_similar_graph(graph: Dict[str, List[List[Any]]], k: int, path: str = SIMILAR_GRAPH_PATH) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "k": k, "metric": "cosine", "neighbors": graph}, f)
+    os.replace(tmp_path, path)
+    logger.info(f"🕸️ Saved similar-locations graph for {len(graph)} locations to {path}")
+
+
+def load_similar_graph(path: str = SIMILAR_GRAPH_PATH) -> Optional[Dict[str, List[List[Any]]]]:
+    """Load the precomputed graph, or None if setup has not produced one yet"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["neighbors"]
+
+
+def rebuild_similar_graph_from_collection(collection, k: int = DEFAULT_NEIGHBORS,
+                                          path: str = SIMILAR_GRAPH_PATH, page_size: int = 5000) -> None:
+    """Recompute the graph from embeddings already stored in the collection (no re-encoding)"""
+    ids: List[str] = []
+    pages: List[np.ndarray] = []
+    # Paged: one get() for everything exceeds SQLite's variable limit on large collections
+    for offset in range(0, collection.count(), page_size):
+        records = collection.get(include=["embeddings"], limit=page_size, offset=offset)
+        ids.extend(records["ids"])
+        pages.append(np.asarray(records["embeddings"], dtype=np.float32))
+    embeddings = np.concatenate(pages) if pages else np.zeros((0, 0), dtype=np.float32)
+    save_similar_graph(build_similar_graph(ids, embeddings, k), k, path)
@@ -0,0 +1,339 @@
+"""
+Portable single-file snapshot of the recommender index.
+
+A snapshot is one uncompressed tar holding everything the server needs to
+answer queries without ChromaDB:
+
+    manifest.json            format version, counts, metric, embedding model, member checksums
+    embeddings.float16.npy   L2-normalized embeddings, row i belongs to ids[i]
+    metadata.json            columnar: ids, documents and one list per metadata field
+    content_hashes.npy       per-location content hashes (fixed-width bytes), row aligned
+    similar_locations.json   precomputed similar-locations graph (optional)
+
+Members are stored uncompressed and .npy data starts on a 64-byte boundary
+inside the tar, so load_snapshot() memory-maps the embedding matrix straight
+out of the snapshot file: nothing is extracted or copied, and pages are
+only read when a query touches them.
+
+Usage:
+    python setup_chromadb.py --export-snapshot recommender.snapshot.tar
+    RECOMMENDER_SNAPSHOT=recommender.snapshot.tar python main.py
+    python snapshot.py recommender.snapshot.tar --verify
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import tarfile
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from vector_backends import NumpyBackend, _collection_fingerprint, _normalize, collection_metric
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "sri-lanka-recommender-snapshot"
+SNAPSHOT_VERSION = 1
+
+MANIFEST_MEMBER = "manifest.json"
+EMBEDDINGS_MEMBER = "embeddings.float16.npy"
+METADATA_MEMBER = "metadata.json"
+CONTENT_HASHES_MEMBER = "content_hashes.npy"
+SIMILAR_MEMBER = "similar_locations.json"
+
+# Stored in content_hashes.npy rather than as a metadata column
+CONTENT_HASH_FIELD = "content_hash"
+
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot this version can read, or fails verification"""
+
+
+class Snapshot:
+    """
+    A loaded snapshot: parsed manifest and metadata plus memory-mapped arrays.
+
+    ``embeddings`` and ``content_hashes`` are read-only views into the
+    snapshot file; keep the file in place while the snapshot is in use.
+    """
+
+    def __init__(self, path: str, manifest: Dict[str, Any], ids: List[str], documents: List[str],
+                 metadatas: List[Dict[str, Any]], embeddings: np.ndarray, content_hashes: np.ndarray,
+                 similar_graph: Optional[Dict[str, List[List[Any]]]] = None):
+        self.path = path
+        self.manifest = manifest
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.embeddings = embeddings
+        self.content_hashes = content_hashes
+        self.similar_graph = similar_graph
+
+    @property
+    def metric(self) -> str:
+        return self.manifest.get("metric", "l2")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def check_model(self, model_id: str) -> None:
+        """Queries must be embedded by the model that produced the snapshot"""
+        expected = self.manifest.get("embedding_model")
+        if expected and expected != model_id:
+            raise SnapshotError(
+                f"Snapshot {self.path} was built with embedding model '{expected}', "
+                f"but this server embeds queries with '{model_id}'"
+            )
+
+    def to_backend(self, rescore_factor: int = 4) -> NumpyBackend:
+        """Exact-search backend reading the memory-mapped float16 matrix in place"""
+        return NumpyBackend(
+            self.ids, self.metadatas, self.documents, None,
+            matrix=self.embeddings, dtype="float16",
+            metric=self.metric, rescore_factor=rescore_factor
+        )
+
+
+def columns_from_metadatas(metadatas: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Row dicts to {field: [value per row]}, with None where a row lacks the field"""
+    fields = list(dict.fromkeys(key for metadata in metadatas for key in (metadata or {})))
+    return {field: [(metadata or {}).get(field) for metadata in metadatas] for field in fields}
+
+
+def metadatas_from_columns(columns: Dict[str, List[Any]], count: int) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = [{} for _ in range(count)]
+    for field, values in columns.items():
+        for row, value in zip(rows, values):
+            if value is not None:
+                row[field] = value
+    return rows
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _portable_member(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    # Local user and permissions mean nothing on the machine that loads the snapshot
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    info.mode = 0o644
+    return info
+
+
+def write_snapshot(
+    path: str,
+    ids: List[str],
+    metadatas: List[Dict[str, Any]],
+    documents: List[str],
+    embeddings: Any,
+    metric: str = "l2",
+    embedding_model: str = "",
+    similar_graph: Optional[Dict[str, Any]] = None,
+    collection_metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Write a snapshot atomically and return its manifest.
+
+    Embeddings are normalized and stored as float16; content hashes move
+    from the metadata into their own row-aligned array.
+    """
+    if not (len(ids) == len(metadatas) == len(documents) == len(embeddings)):
+        raise ValueError("ids, metadatas, documents and embeddings must have the same length")
+
+    matrix = _normalize(np.asarray(embeddings, dtype=np.float32)).astype(np.float16)
+    rows = [dict(metadata or {}) for metadata in metadatas]
+    hashes = [str(row.pop(CONTENT_HASH_FIELD, "")) for row in rows]
+    hash_width = max([len(value) for value in hashes] + [1])
+
+    members = [EMBEDDINGS_MEMBER, METADATA_MEMBER, CONTENT_HASHES_MEMBER]
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryDirectory(prefix=".snapshot-", dir=directory) as scratch:
+        np.save(os.path.join(scratch, EMBEDDINGS_MEMBER), matrix)
+        np.save(os.path.join(scratch, CONTENT_HASHES_MEMBER), np.asarray(hashes, dtype=f"S{hash_width}"))
+        with open(os.path.join(scratch, METADATA_MEMBER), "w", encoding="utf-8") as f:
+            json.dump({"ids": list(ids), "documents": list(documents), "columns": columns_from_metadatas(rows)},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        if similar_graph is not None:
+            with open(os.path.join(scratch, SIMILAR_MEMBER), "w", encoding="utf-8") as f:
+                json.dump(similar_graph, f, separators=(",", ":"))
+            members.append(SIMILAR_MEMBER)
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "count": len(ids),
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "dtype": "float16",
+            "metric": metric,
+            "embedding_model": embedding_model,
+            # Same key as the vector cache, so a snapshot can be matched to the collection it came from
+            "fingerprint": _collection_fingerprint(list(ids), list(metadatas)),
+            "collection_metadata": collection_metadata or {},
+            "members": {name: {"bytes": os.path.getsize(os.path.join(scratch, name)),
+                               "sha256": _sha256_file(os.path.join(scratch, name))} for name in members},
+        }
+
+        tmp_path = f"{path}.tmp"
+        with tarfile.open(tmp_path, "w", format=tarfile.PAX_FORMAT) as tar:
+            # Manifest first so readers can reject a foreign file before touching the rest
+            data = json.dumps(manifest, indent=2).encode("utf-8")
+            info = tarfile.TarInfo(MANIFEST_MEMBER)
+            info.size, info.mtime = len(data), int(time.time())
+            tar.addfile(_portable_member(info), io.BytesIO(data))
+            for name in members:
+                tar.add(os.path.join(scratch, name), arcname=name, filter=_portable_member)
+        os.replace(tmp_path, path)
+
+    logger.info(f"📦 Wrote snapshot of {len(ids)} locations to {path} ({os.path.getsize(path) / 1e6:.2f} MB)")
+    return manifest
+
+
+def export_snapshot(collection, path: str, embedding_model: str = "",
+                    similar_graph: Optional[Dict[str, Any]] = None, page_size: int = 5000) -> Dict[str, Any]:
+    """Snapshot a Chroma collection, read page by page in the order Chroma stores it"""
+    ids: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    documents: List[str] = []
+    pages: List[np.ndarray] = []
+    # One get() for everything exceeds SQLite's variable limit on large collections
+    for offset in range(0, collection.count(), page_size):
+        records = collection.get(include=["metadatas", "documents", "embeddings"], limit=page_size, offset=offset)
+        ids.extend(records["ids"])
+        metadatas.extend(records["metadatas"] or [])
+        documents.extend(records["documents"] or [])
+        pages.append(np.asarray(records["embeddings"], dtype=np.float32))
+    embeddings = np.concatenate(pages) if pages else np.zeros((0, 0), dtype=np.float32)
+
+    return write_snapshot(
+        path, ids, metadatas, documents, embeddings,
+        metric=collection_metric(collection),
+        embedding_model=embedding_model,
+        similar_graph=similar_graph,
+        collection_metadata=collection.metadata
+    )
+
+
+def _memmap_member(path: str, member: tarfile.TarInfo) -> np.ndarray:
+    """Memory-map an uncompressed .npy member in place inside the tar"""
+    with open(path, "rb") as f:
+        f.seek(member.offset_data)
+        version = npy_format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = npy_format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = npy_format.read_array_header_2_0(f)
+        offset = f.tell()
+    if dtype.hasobject:
+        raise SnapshotError(f"{member.name} holds Python objects and cannot be memory-mapped")
+    if int(np.prod(shape)) == 0:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+def _read_json(tar: tarfile.TarFile, member: tarfile.TarInfo) -> Any:
+    with tar.extractfile(member) as f:
+        return json.load(f)
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with tarfile.open(path, "r:") as tar:
+        try:
+            return _read_json(tar, tar.getmember(MANIFEST_MEMBER))
+        except KeyError:
+            raise SnapshotError(f"{path} has no {MANIFEST_MEMBER}; not a recommender snapshot")
+
+
+def verify_snapshot(path: str) -> Dict[str, Any]:
+    """Check every member against the manifest's checksums; returns the manifest"""
+    with tarfile.open(path, "r:") as tar:
+        manifest = _read_json(tar, tar.getmember(MANIFEST_MEMBER))
+        for name, expected in manifest["members"].items():
+            digest = hashlib.sha256()
+            with tar.extractfile(tar.getmember(name)) as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            if digest.hexdigest() != expected["sha256"]:
+                raise SnapshotError(f"Checksum mismatch for {name} in {path}")
+    return manifest
+
+
+def load_snapshot(path: str, verify: bool = False) -> Snapshot:
+    """
+    Open a snapshot without copying its arrays.
+
+    Only the manifest, metadata and similar graph are parsed; the embedding
+    matrix and content hashes are memory-mapped from the tar. verify=True
+    also checks member checksums, which reads the whole file.
+    """
+    if verify:
+        verify_snapshot(path)
+
+    with tarfile.open(path, "r:") as tar:
+        members = {member.name: member for member in tar.getmembers()}
+        if MANIFEST_MEMBER not in members:
+            raise SnapshotError(f"{path} has no {MANIFEST_MEMBER}; not a recommender snapshot")
+        manifest = _read_json(tar, members[MANIFEST_MEMBER])
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise SnapshotError(f"{path} is not a recommender snapshot (format {manifest.get('format')!r})")
+        if manifest.get("version", 0) > SNAPSHOT_VERSION:
+            raise SnapshotError(
+                f"{path} is snapshot version {manifest['version']}, this server reads up to {SNAPSHOT_VERSION}"
+            )
+        for name in manifest["members"]:
+            if name not in members:
+                raise SnapshotError(f"{path} is missing {name}")
+            if not members[name].isfile():
+                raise SnapshotError(f"{name} in {path} is not a regular file")
+
+        metadata = _read_json(tar, members[METADATA_MEMBER])
+        similar_graph = _read_json(tar, members[SIMILAR_MEMBER]) if SIMILAR_MEMBER in manifest["members"] else None
+
+    ids = metadata["ids"]
+    embeddings = _memmap_member(path, members[EMBEDDINGS_MEMBER])
+    content_hashes = _memmap_member(path, members[CONTENT_HASHES_MEMBER])
+    if len(embeddings) != len(ids) or len(content_hashes) != len(ids):
+        raise SnapshotError(f"{path} has {len(ids)} ids but {len(embeddings)} embeddings")
+
+    metadatas = metadatas_from_columns(metadata["columns"], len(ids))
+    for row, value in zip(metadatas, content_hashes):
+        if value:
+            row[CONTENT_HASH_FIELD] = value.decode("ascii")
+
+    return Snapshot(path, manifest, ids, metadata["documents"], metadatas,
+                    embeddings, content_hashes, similar_graph)
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Inspect a recommender snapshot")
+    parser.add_argument("path", help="Snapshot written by setup_chromadb.py --export-snapshot")
+    parser.add_argument("--verify", action="store_true", help="Check member checksums")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    snapshot = load_snapshot(args.path, verify=args.verify)
+    elapsed = time.perf_counter() - started
+    manifest = dict(snapshot.manifest)
+    manifest["load_seconds"] = round(elapsed, 4)
+    manifest["file_bytes"] = os.path.getsize(args.path)
+    print(json.dumps(manifest, indent=2))
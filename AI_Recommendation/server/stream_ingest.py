@@ -0,0 +1,295 @@
+"""
+Streaming bulk ingest for large location catalogs.
+
+Reads a JSON array or JSONL file incrementally, validates records as they
+stream, encodes fixed-size chunks on one thread while a second thread writes
+the previous chunk to ChromaDB. Peak memory is bounded by a few chunks no
+matter how large the catalog is.
+
+Usage:
+    python stream_ingest.py catalog.jsonl --chunk-size 512
+    python stream_ingest.py sri_lanka_locations.json --rebuild
+"""
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import chromadb
+
+from embedding_store import encode_texts
+from embeddings import create_embedding_function, create_embedding_store, create_sentence_model
+from setup_chromadb import build_metadatas, create_enhanced_descriptions, validate_location
+from similar_graph import DEFAULT_NEIGHBORS, rebuild_similar_graph_from_collection
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "sri_lanka_locations"
+READ_BLOCK_SIZE = 1 << 16
+
+
+def log_bad_line(line_number: int, line: str, error: Exception) -> None:
+    logger.warning(f"⚠️ Skipping line {line_number}: {error}")
+
+
+def iter_json_records(path: str, on_bad_line: Callable[[int, str, Exception], None] = log_bad_line) -> Iterator[Any]:
+    """
+    Yield records from a JSON array or JSONL file without loading it whole.
+
+    JSONL lines that do not parse are passed to on_bad_line(line_number,
+    line, error) and skipped rather than aborting the ingest.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(READ_BLOCK_SIZE)
+        stripped = head.lstrip()
+        if stripped.startswith("["):
+            yield from _iter_json_array(f, stripped[1:])
+            return
+
+    # JSON Lines: one record per line
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                on_bad_line(line_number, line, e)
+                continue
+            yield record
+
+
+def _iter_json_array(f, buffer: str) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    position = 0
+    eof = False
+
+    while True:
+        # Skip whitespace and the separating comma without copying the buffer
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if buffer.startswith("]", position):
+            return
+
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Record spans the block boundary: keep only the unread tail and read more
+            block = f.read(READ_BLOCK_SIZE)
+            eof = not block
+            buffer = buffer[position:] + block
+            position = 0
+            continue
+
+        yield record
+
+
+def iter_valid_chunks(records: Iterator[Any], chunk_size: int, stats: Dict[str, int]) -> Iterator[List[Dict[str, Any]]]:
+    """Validate records as they stream and group the valid ones into chunks"""
+    chunk = []
+    for i, record in enumerate(records):
+        stats["read"] += 1
+        error = validate_location(record)
+        if error:
+            stats["invalid"] += 1
+            logger.warning(f"⚠️ Skipping record {i}: {error}")
+            continue
+
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in megabytes (to 0.1), or None if it cannot be read"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS reports bytes
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    # Windows: peak working set
+    return round(getattr(psutil.Process().memory_info(), "peak_wset", 0) / (1024 * 1024), 1) or None
+
+
+def stream_ingest(
+    path: str,
+    chunk_size: int = 512,
+    rebuild: bool = False,
+    model: Optional[Any] = None,
+    client: Optional[Any] = None,
+    collection_name: str = COLLECTION_NAME,
+    compute_similar: bool = False
+) -> Dict[str, Any]:
+    """
+    Ingest a catalog with a bounded read -> encode -> write pipeline.
+
+    compute_similar also rebuilds the similar-locations graph afterwards.
+    That step loads every embedding and scores them block by block, so its
+    memory grows with the catalog; it is off by default and its time and
+    peak RSS are reported separately from the streaming ingest.
+
+    Returns:
+        Counts of read/invalid/written records plus records/sec and peak RSS
+    """
+    started = time.perf_counter()
+    model = model or create_sentence_model()
+    store = create_embedding_store()
+    client = client or chromadb.PersistentClient(path="./chroma_db")
+
+    if rebuild and collection_name in [col.name if hasattr(col, "name") else col for col in client.list_collections()]:
+        client.delete_collection(collection_name)
+        logger.info("🗑️ Deleted existing collection")
+
+    collection = client.get_or_create_collection(
+        name=collection_name,
+        embedding_function=create_embedding_function(model, store),
+        metadata={"description": "Sri Lanka tourist locations with semantic search capabilities"}
+    )
+
+    stats = {"read": 0, "invalid": 0, "written": 0, "chunks": 0}
+    # Small queues keep at most a couple of chunks in flight per stage
+    to_encode: "queue.Queue[Optional[List[Dict[str, Any]]]]" = queue.Queue(maxsize=2)
+    to_write: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=2)
+    errors: List[BaseException] = []
+    stop = threading.Event()
+
+    def put(q: queue.Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def skip_bad_line(line_number: int, line: str, error: Exception) -> None:
+        stats["read"] += 1
+        stats["invalid"] += 1
+        log_bad_line(line_number, line, error)
+
+    def encode_worker():
+        try:
+            while True:
+                chunk = get(to_encode)
+                if chunk is None:
+                    break
+                descriptions = create_enhanced_descriptions(chunk)
+                embeddings = encode_texts(model, descriptions, store, batch_size=64).tolist()
+                if not put(to_write, (chunk, descriptions, embeddings)):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(to_write, None)
+
+    def write_worker():
+        try:
+            while True:
+                item = get(to_write)
+                if item is None:
+                    break
+                chunk, descriptions, embeddings = item
+                collection.upsert(
+                    ids=[loc["id"] for loc in chunk],
+                    embeddings=embeddings,
+                    metadatas=build_metadatas(chunk, descriptions),
+                    documents=descriptions
+                )
+                stats["written"] += len(chunk)
+                stats["chunks"] += 1
+                if stats["chunks"] % 10 == 0:
+                    elapsed = time.perf_counter() - started
+                    logger.info(f"📦 Wrote {stats['written']} locations ({stats['written'] / elapsed:.0f} records/sec)")
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    encoder = threading.Thread(target=encode_worker, name="ingest-encode", daemon=True)
+    writer = threading.Thread(target=write_worker, name="ingest-write", daemon=True)
+    encoder.start()
+    writer.start()
+
+    try:
+        for chunk in iter_valid_chunks(iter_json_records(path, skip_bad_line), chunk_size, stats):
+            if not put(to_encode, chunk):
+                break
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        put(to_encode, None)
+        encoder.join()
+        writer.join()
+
+    if errors:
+        logger.error(f"❌ Streaming ingest failed: {str(errors[0])}")
+        raise errors[0]
+
+    elapsed = time.perf_counter() - started
+    report = {
+        **stats,
+        "seconds": round(elapsed, 3),
+        "records_per_sec": round(stats["written"] / elapsed, 1) if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "collection_count": collection.count()
+    }
+    logger.info(
+        f"✅ Ingested {report['written']} locations ({report['invalid']} invalid skipped) in "
+        f"{report['seconds']}s - {report['records_per_sec']} records/sec, peak RSS {report['peak_rss_mb']} MB"
+    )
+
+    if compute_similar:
+        # Not streamed: holds every embedding, so measured apart from the ingest above
+        logger.info("🕸️ Rebuilding similar-locations graph...")
+        graph_started = time.perf_counter()
+        rebuild_similar_graph_from_collection(collection, DEFAULT_NEIGHBORS)
+        report["similar_graph_seconds"] = round(time.perf_counter() - graph_started, 3)
+        report["similar_graph_peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a large location catalog into ChromaDB")
+    parser.add_argument("path", help="JSON array or JSONL file with location records")
+    parser.add_argument("--chunk-size", type=int, default=512, help="Records encoded and written per chunk")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the collection before ingesting")
+    parser.add_argument("--similar", action="store_true",
+                        help="Also rebuild similar_locations.json (loads every embedding into memory)")
+    args = parser.parse_args()
+
+    report = stream_ingest(args.path, chunk_size=args.chunk_size, rebuild=args.rebuild,
+                           compute_similar=args.similar)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Generate a synthetic location catalog for ingest and load testing.
+
+Records follow the sri_lanka_locations.json schema and are written one at a
+time, so catalogs with millions of entries never sit in memory.
+
+Usage:
+    python synthetic_catalog.py catalog.jsonl --count 1000000
+    python synthetic_catalog.py catalog.json --count 10000 --format json
+"""
+import argparse
+import json
+import random
+from typing import Any, Dict, Iterator
+
+TOWNS = [
+    "Colombo", "Galle", "Kandy", "Ella", "Mirissa", "Trincomalee", "Jaffna", "Anuradhapura",
+    "Polonnaruwa", "Dambulla", "Nuwara Eliya", "Bentota", "Negombo", "Arugam Bay", "Batticaloa"
+]
+KINDS = ["Beach", "Temple", "Fort", "Falls", "Peak", "Park", "Lake", "Market", "Gardens", "Caves"]
+TAGS = [
+    "beach", "historical", "hiking", "wildlife", "unesco", "temple", "surfing", "diving",
+    "tea", "nature", "photography", "ancient", "culture", "adventure", "relaxation", "sunset"
+]
+BEST_FOR = [
+    "history", "photography", "family", "adventure", "relaxation", "hiking", "water_sports",
+    "cultural_sites", "wildlife", "nature", "couples", "budget"
+]
+POPULARITY = ["medium", "high", "very_high"]
+
+
+def generate_locations(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Yield deterministic synthetic location records"""
+    rng = random.Random(seed)
+    for i in range(count):
+        town = rng.choice(TOWNS)
+        kind = rng.choice(KINDS)
+        tags = rng.sample(TAGS, 5)
+        yield {
+            "id": f"synthetic-{i}",
+            "name": f"{town} {kind} {i}",
+            "location": town,
+            "description": (
+                f"A {rng.choice(['quiet', 'famous', 'scenic', 'historic', 'hidden'])} {kind.lower()} near {town} "
+                f"known for {tags[0]} and {tags[1]}, popular with visitors looking for {tags[2]}."
+            ),
+            "tags": tags,
+            "best_for": rng.sample(BEST_FOR, 4),
+            "popularity": rng.choice(POPULARITY)
+        }
+
+
+def write_catalog(path: str, count: int, fmt: str = "jsonl", seed: int = 42) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        if fmt == "json":
+            f.write("[\n")
+            for i, loc in enumerate(generate_locations(count, seed)):
+                f.write((",\n" if i else "") + json.dumps(loc))
+            f.write("\n]\n")
+        else:
+            for loc in generate_locations(count, seed):
+                f.write(json.dumps(loc) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic location catalog")
+    parser.add_argument("path", help="Output file")
+    parser.add_argument("--count", type=int, default=100000, help="Number of locations to generate")
+    parser.add_argument("--format", choices=["jsonl", "json"], default="jsonl", help="JSON Lines or a JSON array")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    write_catalog(args.path, args.count, args.format, args.seed)
+    print(f"✅ Wrote {args.count} synthetic locations to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
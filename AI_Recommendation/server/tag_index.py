@@ -0,0 +1,55 @@
+from typing import Any, Dict, Iterable, List, Set
+
+# Higher rank sorts first when results are ordered by popularity
+POPULARITY_RANK = {"very_high": 3, "high": 2, "medium": 1, "low": 0}
+
+
+def normalize_tag(tag: str) -> str:
+    """Normalize a tag so 'Water Sports', 'water-sports' and 'water_sports' match"""
+    return "_".join(tag.strip().lower().replace("-", " ").split())
+
+
+def split_list_field(value: Any) -> List[str]:
+    """Split a ', '-joined metadata field back into a list"""
+    return value.split(", ") if value else []
+
+
+class TagIndex:
+    """Exact inverted index from tag / best_for values to location positions"""
+
+    def __init__(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        self.ids = ids
+        self.metadatas = metadatas
+        self._postings: Dict[str, Set[int]] = {}
+
+        for position, metadata in enumerate(metadatas):
+            metadata = metadata or {}
+            values = split_list_field(metadata.get("tags")) + split_list_field(metadata.get("best_for"))
+            for value in values:
+                self._postings.setdefault(normalize_tag(value), set()).add(position)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def tags(self) -> Dict[str, int]:
+        """All indexed tags with the number of locations carrying each"""
+        return {tag: len(positions) for tag, positions in sorted(self._postings.items())}
+
+    def lookup(self, tags: Iterable[str], mode: str = "or") -> List[int]:
+        """Positions of locations matching any (or) or all (and) of the tags"""
+        postings = [self._postings.get(normalize_tag(tag), set()) for tag in tags if tag.strip()]
+        if not postings:
+            return []
+
+        if mode == "and":
+            matched = set.intersection(*postings)
+        else:
+            matched = set.union(*postings)
+        return sorted(matched)
+
+    def rank_by_popularity(self, positions: List[int]) -> List[int]:
+        """Order positions by popularity, keeping catalog order among ties"""
+        return sorted(
+            positions,
+            key=lambda position: -POPULARITY_RANK.get((self.metadatas[position] or {}).get("popularity"), -1)
+        )
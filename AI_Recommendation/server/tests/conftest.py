@@ -0,0 +1,9 @@
+"""Tests run offline: the fake embedder stands in for all-MiniLM-L6-v2"""
+import os
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+os.environ.setdefault("EMBEDDING_BACKEND", "fake")
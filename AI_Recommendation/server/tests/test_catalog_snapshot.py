@@ -0,0 +1,70 @@
+import gzip
+import json
+
+import pytest
+
+from catalog_snapshot import CatalogSnapshot, InvalidCursor, etag_matches
+
+METADATAS = [{"name": f"Location {i}", "location": "Galle", "tags": "beach, history", "best_for": "families",
+              "popularity": "High"} for i in range(7)]
+IDS = [f"loc-{i}" for i in range(7)]
+
+
+def read(page):
+    return json.loads(page.body)
+
+
+def test_full_catalog_keeps_the_original_shape():
+    body = read(CatalogSnapshot(IDS, METADATAS).page())
+
+    assert set(body) == {"total", "locations"}
+    assert body["total"] == 7
+    assert body["locations"][0]["tags"] == ["beach", "history"]
+
+
+def test_cursor_pages_walk_the_whole_catalog():
+    catalog = CatalogSnapshot(IDS, METADATAS)
+    seen, cursor = [], None
+    while True:
+        body = read(catalog.page(cursor, limit=3, fields=["id"]))
+        seen.extend(location["id"] for location in body["locations"])
+        assert all(set(location) == {"id"} for location in body["locations"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == IDS
+
+
+def test_cursors_from_an_older_catalog_or_garbage_are_rejected():
+    old = CatalogSnapshot(IDS, METADATAS)
+    cursor = read(old.page(limit=3))["next_cursor"]
+    changed = CatalogSnapshot(IDS, METADATAS[:-1] + [{"name": "Renamed"}])
+
+    with pytest.raises(InvalidCursor, match="older catalog"):
+        changed.page(cursor, limit=3)
+    with pytest.raises(InvalidCursor):
+        old.page("not-a-cursor", limit=3)
+    with pytest.raises(InvalidCursor, match="out of range"):
+        old.page(old.encode_cursor(99), limit=3)
+
+
+def test_etag_follows_content_and_page_variant():
+    catalog = CatalogSnapshot(IDS, METADATAS)
+    page = catalog.page(limit=3)
+
+    assert catalog.page(limit=3) is page
+    assert CatalogSnapshot(IDS, METADATAS).page(limit=3).etag == page.etag
+    assert catalog.page(limit=4).etag != page.etag
+    assert CatalogSnapshot(IDS, METADATAS[:-1] + [{"name": "Renamed"}]).page(limit=3).etag != page.etag
+    assert gzip.decompress(page.gzipped()) == page.body
+
+
+def test_etag_matches_weak_lists_and_wildcard():
+    etag = 'W/"abc-123"'
+    assert etag_matches('W/"abc-123"', etag)
+    assert etag_matches('"abc-123"', etag)
+    assert etag_matches('"other", W/"abc-123"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,59 @@
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from embedding_service import AUTHKEY_ENV, EmbeddingService, EmbeddingServiceClient
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="uses a Unix socket address")
+
+AUTHKEY = "0123456789abcdef-test-key"
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return os.path.join(str(tmp_path), "embeddings.sock")
+
+
+def test_service_refuses_to_start_without_authkey(monkeypatch, socket_path):
+    monkeypatch.delenv(AUTHKEY_ENV, raising=False)
+    with pytest.raises(RuntimeError, match=AUTHKEY_ENV):
+        EmbeddingService(socket_path, pool_size=1)
+
+
+def test_client_refuses_short_authkey(socket_path):
+    with pytest.raises(RuntimeError):
+        EmbeddingServiceClient(socket_path, authkey=b"short")
+
+
+def test_client_with_wrong_key_is_rejected(monkeypatch, socket_path):
+    monkeypatch.setenv(AUTHKEY_ENV, AUTHKEY)
+    service = EmbeddingService(socket_path, pool_size=1)
+    service.start()
+    try:
+        with pytest.raises(multiprocessing.AuthenticationError):
+            EmbeddingServiceClient(socket_path, authkey=b"not-the-right-key-at-all")
+    finally:
+        service.stop()
+
+
+def test_client_reconnects_after_service_restart(monkeypatch, socket_path):
+    monkeypatch.setenv(AUTHKEY_ENV, AUTHKEY)
+    service = EmbeddingService(socket_path, pool_size=1)
+    service.start()
+    client = EmbeddingServiceClient(socket_path)
+    try:
+        before = client.encode(["quiet beach", "old fort"])
+        service.stop()
+
+        service = EmbeddingService(socket_path, pool_size=1)
+        service.start()
+        after = client.encode(["quiet beach", "old fort"])
+
+        assert client.reconnects >= 1
+        np.testing.assert_allclose(before, after)
+    finally:
+        client.close()
+        service.stop()
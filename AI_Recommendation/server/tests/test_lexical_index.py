@@ -0,0 +1,60 @@
+from lexical_index import LexicalIndex, normalize_text, reciprocal_rank_fusion, tokenize
+
+LOCATIONS = [
+    {"name": "Galle Fort", "location": "Galle", "tags": "history, beach", "popularity": "Very High",
+     "description": "Dutch fort on the southern coast"},
+    {"name": "Unawatuna Beach", "location": "Galle", "tags": "beach, swimming", "popularity": "High",
+     "description": "Sheltered bay with calm water for swimming"},
+    {"name": "Sigiriya Rock", "location": "Dambulla", "tags": "history, hiking", "popularity": "Very High",
+     "description": "Ancient rock fortress with frescoes"},
+    {"name": "Horton Plains", "location": "Nuwara Eliya", "tags": "hiking, nature", "popularity": "Medium",
+     "description": "Cloud forest plateau and World's End cliff"},
+]
+
+
+def build_index():
+    return LexicalIndex([f"loc-{i}" for i in range(len(LOCATIONS))], LOCATIONS)
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("The beach, near Galle!") == ["beach", "galle"]
+    assert normalize_text("Galle  Fort") == normalize_text("galle-fort") == "galle fort"
+
+
+def test_search_ranks_by_bm25_with_name_weighted_highest():
+    hits = build_index().search("rock fortress", 3)
+    assert hits[0][0] == 2
+    assert all(score > 0 for _, score in hits)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_exact_name_returns_only_that_location():
+    served_by, hits = build_index().fast_path("galle fort", 5)
+    assert served_by == "exact"
+    assert hits == [(0, 1.0)]
+
+
+def test_exact_town_returns_its_locations_by_popularity():
+    served_by, hits = build_index().fast_path("Galle", 5)
+    assert served_by == "exact"
+    assert [position for position, _ in hits] == [0, 1]
+
+
+def test_confident_name_match_takes_lexical_path():
+    served_by, hits = build_index().fast_path("horton", 3)
+    assert served_by == "lexical"
+    assert hits[0] == (3, 1.0)
+    assert all(0 < score <= 1.0 for _, score in hits)
+
+
+def test_ambiguous_or_descriptive_query_falls_through():
+    index = build_index()
+    assert index.fast_path("hiking", 3) is None
+    assert index.fast_path("calm water", 3) is None
+    assert index.fast_path("the", 3) is None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+    assert fused[0][0] == "b"
+    assert {item_id for item_id, _ in fused} == {"a", "b", "c", "d"}
@@ -0,0 +1,114 @@
+import asyncio
+
+import numpy as np
+
+from query_batcher import QueryBatcher, split_query_results
+
+
+class FakeSearch:
+    """Embeds a text as its length and returns ids ranked by query, recording every call"""
+
+    def __init__(self, fail=False):
+        self.embed_calls = []
+        self.query_calls = []
+        self.fail = fail
+
+    def embed(self, texts):
+        self.embed_calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    def query(self, query_embeddings, n_results, include):
+        self.query_calls.append((len(query_embeddings), n_results, include))
+        if self.fail:
+            raise RuntimeError("search failed")
+        return {
+            "ids": [[f"{int(e[0])}-{rank}" for rank in range(n_results)] for e in query_embeddings],
+            "distances": [[rank / 10 for rank in range(n_results)] for _ in query_embeddings],
+            "metadatas": None,
+        }
+
+
+def test_split_query_results_slices_one_query():
+    results = {"ids": [["a", "b", "c"], ["d", "e", "f"]], "distances": [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]],
+               "embeddings": [np.zeros((3, 2)), np.ones((3, 2))], "metadatas": None}
+
+    single = split_query_results(results, 1, 2)
+
+    assert single["ids"] == [["d", "e"]]
+    assert single["distances"] == [[0.4, 0.5]]
+    assert single["embeddings"][0].shape == (2, 2) and single["embeddings"][0].all()
+    assert single["metadatas"] is None
+
+
+def test_search_many_embeds_duplicates_once_and_trims_each_query():
+    search = FakeSearch()
+    batcher = QueryBatcher(search.embed, search.query)
+
+    results = batcher.search_many(["beach", "hiking", "beach"], [2, 4, 1], ["distances"])
+
+    assert search.embed_calls == [["beach", "hiking"]]
+    assert search.query_calls == [(2, 4, ["distances"])]
+    assert [r["ids"][0] for r in results] == [["5-0", "5-1"], ["6-0", "6-1", "6-2", "6-3"], ["5-0"]]
+
+
+def test_concurrent_submissions_share_one_batch():
+    search = FakeSearch()
+
+    async def run():
+        batcher = QueryBatcher(search.embed, search.query, max_batch_size=8, max_wait_ms=50)
+        await batcher.start()
+        try:
+            timings = {}
+            results = await asyncio.gather(
+                batcher.submit("a", 1, ["distances"], timings),
+                *(batcher.submit("b" * i, 2, ["metadatas"]) for i in range(2, 6))
+            )
+            return results, timings, batcher.stats()
+        finally:
+            await batcher.stop()
+
+    results, timings, stats = asyncio.run(run())
+
+    assert len(search.query_calls) == 1
+    assert search.query_calls[0][2] == ["distances", "metadatas"]
+    assert results[0]["ids"] == [["1-0"]]
+    assert {"queue", "embed", "vector_search"} <= set(timings)
+    assert stats["batches"] == 1 and stats["batch_size_counts"] == {5: 1}
+
+
+def test_max_batch_size_splits_batches():
+    search = FakeSearch()
+
+    async def run():
+        batcher = QueryBatcher(search.embed, search.query, max_batch_size=2, max_wait_ms=50)
+        try:
+            await asyncio.gather(*(batcher.submit("x" * i, 1, ["distances"]) for i in range(1, 6)))
+            return batcher.stats()
+        finally:
+            await batcher.stop()
+
+    stats = asyncio.run(run())
+
+    assert stats["queries"] == 5
+    assert stats["batch_size_counts"] == {1: 1, 2: 2}
+
+
+def test_failed_batch_fails_every_query_and_keeps_serving():
+    search = FakeSearch(fail=True)
+
+    async def run():
+        batcher = QueryBatcher(search.embed, search.query, max_wait_ms=20)
+        try:
+            outcomes = await asyncio.gather(batcher.submit("a", 1, ["distances"]),
+                                            batcher.submit("bb", 1, ["distances"]), return_exceptions=True)
+            search.fail = False
+            after = await batcher.submit("ccc", 1, ["distances"])
+            return outcomes, after, batcher.stats()
+        finally:
+            await batcher.stop()
+
+    outcomes, after, stats = asyncio.run(run())
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert after["ids"] == [["3-0"]]
+    assert stats["errors"] == 1
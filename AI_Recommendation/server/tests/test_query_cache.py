@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+
+from query_cache import LRUCache, SingleFlight, normalize_query
+
+
+def test_normalize_query_folds_case_and_whitespace():
+    assert normalize_query("  Quiet   BEACH\tnear Galle ") == "quiet beach near galle"
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now the most recent
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LRUCache(max_size=4, ttl_seconds=10)
+    cache.set("a", 1)
+    now[0] += 11
+
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_single_flight_runs_identical_calls_once():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        leader = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+
+        leader.cancel()  # e.g. the client that started the query disconnected
+        await asyncio.sleep(0)
+        release.set()
+        return leader, await follower
+
+    leader, result = asyncio.run(main())
+    assert leader.cancelled()
+    assert result == 42
+
+
+def test_errors_reach_every_caller_and_the_key_is_released():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        flight = SingleFlight()
+        outcomes = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        return flight, outcomes
+
+    flight, outcomes = asyncio.run(main())
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert flight.stats()["in_flight"] == 0
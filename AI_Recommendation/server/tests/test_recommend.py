@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import main
+from embeddings import FakeEmbeddingFunction
+from lexical_index import LexicalIndex
+from query_batcher import QueryBatcher
+from query_cache import LRUCache
+from vector_backends import NumpyBackend
+
+from test_lexical_index import LOCATIONS
+
+
+@pytest.fixture(params=["l2", "cosine"])
+def server(request, monkeypatch):
+    """main's globals wired to an in-memory catalog, with the model ready, for each Chroma metric"""
+    embedder = FakeEmbeddingFunction()
+    ids = [f"loc-{i}" for i in range(len(LOCATIONS))]
+    documents = [f"{item['name']} {item['description']} {item['tags']}" for item in LOCATIONS]
+    embeddings = np.asarray(embedder(documents), dtype=np.float32)
+    backend = NumpyBackend(ids, LOCATIONS, documents, embeddings, metric=request.param)
+
+    monkeypatch.setattr(main, "embedding_function", embedder)
+    monkeypatch.setattr(main, "serving_state", main.ServingState(backend, lexical_index=LexicalIndex(ids, LOCATIONS, documents)))
+    monkeypatch.setattr(main, "embedding_cache", LRUCache(max_size=64))
+    monkeypatch.setattr(main, "model_state", "ready")
+    monkeypatch.setattr(main, "query_batcher", QueryBatcher(main.embed_texts, main.run_collection_query))
+    return embedder, backend
+
+
+def cosine(embedder, query, document):
+    a, b = embedder([query, document])
+    return float(np.dot(a, b))
+
+
+def recommend(query, n, min_score=0.0):
+    return main.recommend_chunk(main.serving_state, [main.RecommendItem(query=query, n=n, min_score=min_score)])[0]
+
+
+def test_exact_match_is_ranked_first_and_filled_up_to_n(server):
+    response = recommend("Sigiriya Rock", 3)
+    assert response["served_by"] == "exact"
+    results = response["results"]
+    assert len(results) == 3
+    assert results[0]["name"] == "Sigiriya Rock"
+    assert [item["match_type"] for item in results] == ["exact", "vector", "vector"]
+    assert len({item["name"] for item in results}) == 3
+
+
+def test_fast_path_similarity_score_is_cosine(server):
+    embedder, backend = server
+    response = recommend("sigiriya rock", 2)
+    top = response["results"][0]
+    assert top["lexical_score"] == 1.0
+    expected = cosine(embedder, "sigiriya rock", backend.documents[2])
+    assert top["similarity_score"] == pytest.approx(expected, abs=1e-3)
+    assert top["similarity_score"] < 1.0
+
+
+def test_fast_path_hits_respect_min_score(server):
+    response = recommend("Sigiriya Rock", 3, min_score=0.99)
+    assert response["results"] == []
+
+
+def test_fast_path_without_model_returns_unscored_hits(server, monkeypatch):
+    monkeypatch.setattr(main, "model_state", "loading")
+    served_by, hits = main.lexical_fast_path(main.serving_state, "Galle", 5)
+    results = main.complete_fast_path(main.serving_state, "Galle", served_by, hits, 5)
+    response = main.format_recommendations("Galle", results, 0.5)
+    assert [item["name"] for item in response["results"]] == ["Galle Fort", "Unawatuna Beach"]
+    assert all(item["similarity_score"] is None for item in response["results"])
+
+
+def test_semantic_query_has_no_match_type(server):
+    response = recommend("calm water swimming", 2)
+    assert response["served_by"] in ("hybrid", "vector")
+    assert all("match_type" not in item for item in response["results"])
+
+
+def test_query_equal_to_a_document_scores_one(server):
+    _, backend = server
+    response = recommend(backend.documents[1], 1)
+    assert response["results"][0]["name"] == "Unawatuna Beach"
+    assert response["results"][0]["similarity_score"] == pytest.approx(1.0, abs=1e-3)
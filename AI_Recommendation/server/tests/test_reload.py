@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "embedding_function", object())
+    monkeypatch.setattr(main, "serving_state", None)
+    monkeypatch.setattr(main, "model_state", "ready")
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    return TestClient(main.app)
+
+
+class FakeBackend:
+    metric = "cosine"
+
+    def __init__(self, count):
+        self._count = count
+
+    def count(self):
+        return self._count
+
+
+def reload(client, token="secret"):
+    headers = {"X-Admin-Token": token} if token is not None else {}
+    return client.post("/api/admin/reload", headers=headers)
+
+
+def test_reload_is_disabled_without_admin_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+    assert reload(client).status_code == 403
+
+
+def test_reload_rejects_a_wrong_or_missing_token(client):
+    assert reload(client, "guess").status_code == 401
+    assert reload(client, None).status_code == 401
+
+
+def test_reload_swaps_in_a_complete_new_state(client, monkeypatch):
+    monkeypatch.setattr(main, "build_serving_state", lambda generation: main.ServingState(FakeBackend(7), generation=generation))
+    response = reload(client)
+    assert response.status_code == 200
+    assert response.json() == {"status": "reloaded", "count": 7}
+    assert main.serving_state.generation == 1
+
+
+def test_failed_reload_keeps_the_previous_state(client, monkeypatch):
+    previous = main.ServingState(FakeBackend(3), generation=4)
+    monkeypatch.setattr(main, "serving_state", previous)
+
+    def fail(generation):
+        raise RuntimeError("collection is being rewritten")
+
+    monkeypatch.setattr(main, "build_serving_state", fail)
+    response = reload(client)
+    assert response.status_code == 503
+    assert "previously loaded" in response.json()["detail"]
+    assert main.serving_state is previous
+
+
+def test_concurrent_reloads_do_not_interleave(monkeypatch):
+    monkeypatch.setattr(main, "embedding_function", object())
+    monkeypatch.setattr(main, "serving_state", None)
+    active = []
+    overlaps = []
+
+    def build(generation):
+        active.append(generation)
+        overlaps.append(len(active))
+        threading.Event().wait(0.01)
+        active.remove(generation)
+        return main.ServingState(FakeBackend(generation), generation=generation)
+
+    monkeypatch.setattr(main, "build_serving_state", build)
+    threads = [threading.Thread(target=main.initialize_chromadb) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(overlaps) == 1
+    assert main.serving_state.generation == 4
@@ -0,0 +1,86 @@
+import io
+import json
+import tarfile
+
+import numpy as np
+import pytest
+
+from snapshot import (CONTENT_HASH_FIELD, MANIFEST_MEMBER, SNAPSHOT_FORMAT, SNAPSHOT_VERSION, SnapshotError,
+                      load_snapshot, verify_snapshot, write_snapshot)
+
+
+def catalog(count=12, dim=16):
+    rng = np.random.default_rng(0)
+    ids = [f"loc-{i}" for i in range(count)]
+    metadatas = [{"name": f"Location {i}", "tags": "beach", CONTENT_HASH_FIELD: f"{i:064x}"} for i in range(count)]
+    metadatas[3].pop("tags")
+    documents = [f"description {i}" for i in range(count)]
+    return ids, metadatas, documents, rng.standard_normal((count, dim)).astype(np.float32)
+
+
+def test_round_trip_preserves_catalog_and_search(tmp_path):
+    ids, metadatas, documents, embeddings = catalog()
+    path = str(tmp_path / "index.snapshot.tar")
+    graph = {"loc-0": [["loc-1", 0.9]]}
+
+    write_snapshot(path, ids, metadatas, documents, embeddings, metric="cosine",
+                   embedding_model="fake-384", similar_graph=graph)
+    snapshot = load_snapshot(path, verify=True)
+
+    assert snapshot.ids == ids
+    assert snapshot.documents == documents
+    assert snapshot.metadatas == metadatas
+    assert snapshot.similar_graph == graph
+    assert snapshot.metric == "cosine"
+    assert isinstance(snapshot.embeddings, np.memmap)
+
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.testing.assert_allclose(np.asarray(snapshot.embeddings, dtype=np.float32), normalized, atol=1e-3)
+    result = snapshot.to_backend().query([normalized[5]], 1, ["distances"])
+    assert result["ids"] == [["loc-5"]]
+
+
+def test_model_mismatch_is_refused(tmp_path):
+    path = str(tmp_path / "index.snapshot.tar")
+    write_snapshot(path, *catalog(), embedding_model="all-MiniLM-L6-v2")
+
+    snapshot = load_snapshot(path)
+    snapshot.check_model("all-MiniLM-L6-v2")
+    with pytest.raises(SnapshotError, match="embedding model"):
+        snapshot.check_model("fake-384")
+
+
+def test_corrupted_member_fails_verification(tmp_path):
+    path = tmp_path / "index.snapshot.tar"
+    write_snapshot(str(path), *catalog())
+    with tarfile.open(path) as tar:
+        member = tar.getmember("metadata.json")
+    data = bytearray(path.read_bytes())
+    data[member.offset_data] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(SnapshotError, match="Checksum mismatch"):
+        verify_snapshot(str(path))
+
+
+def test_foreign_or_newer_files_are_refused(tmp_path):
+    foreign = tmp_path / "foreign.tar"
+    with tarfile.open(foreign, "w") as tar:
+        tar.add(__file__, arcname="notes.py")
+    with pytest.raises(SnapshotError, match="not a recommender snapshot"):
+        load_snapshot(str(foreign))
+
+    newer = tmp_path / "newer.tar"
+    manifest = json.dumps({"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION + 1, "members": {}}).encode()
+    with tarfile.open(newer, "w") as tar:
+        info = tarfile.TarInfo(MANIFEST_MEMBER)
+        info.size = len(manifest)
+        tar.addfile(info, io.BytesIO(manifest))
+    with pytest.raises(SnapshotError, match="this server reads up to"):
+        load_snapshot(str(newer))
+
+
+def test_mismatched_lengths_are_rejected(tmp_path):
+    ids, metadatas, documents, embeddings = catalog()
+    with pytest.raises(ValueError):
+        write_snapshot(str(tmp_path / "bad.tar"), ids, metadatas[:-1], documents, embeddings)
@@ -0,0 +1,68 @@
+import json
+import sys
+
+import chromadb
+
+import stream_ingest
+from similar_graph import load_similar_graph
+from stream_ingest import iter_json_records, peak_rss_mb
+from synthetic_catalog import generate_locations
+
+
+def test_jsonl_bad_lines_are_reported_and_skipped(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    path.write_text('{"id": "a"}\n{"id": \n\n{"id": "b"}\n', encoding="utf-8")
+    bad = []
+
+    records = list(iter_json_records(str(path), lambda number, line, error: bad.append(number)))
+
+    assert records == [{"id": "a"}, {"id": "b"}]
+    assert bad == [2]
+
+
+def test_json_array_spanning_many_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(stream_ingest, "READ_BLOCK_SIZE", 32)
+    records = list(generate_locations(40))
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(records, indent=1), encoding="utf-8")
+
+    assert list(iter_json_records(str(path))) == records
+
+
+def test_stream_ingest_skips_a_corrupt_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lines = [json.dumps(record) for record in generate_locations(25)]
+    lines.insert(10, '{"id": "broken", ')
+    (tmp_path / "catalog.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma_db"))
+
+    report = stream_ingest.stream_ingest("catalog.jsonl", chunk_size=8, client=client)
+
+    assert report["written"] == 25
+    assert report["invalid"] == 1
+    assert report["collection_count"] == 25
+    assert "similar_graph_seconds" not in report
+    assert load_similar_graph() is None
+
+
+def test_stream_ingest_can_rebuild_the_similar_graph(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "catalog.jsonl").write_text(
+        "\n".join(json.dumps(record) for record in generate_locations(12)) + "\n", encoding="utf-8"
+    )
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma_db"))
+
+    report = stream_ingest.stream_ingest("catalog.jsonl", chunk_size=8, client=client, compute_similar=True)
+
+    assert report["similar_graph_seconds"] >= 0
+    assert "similar_graph_peak_rss_mb" in report
+    graph = load_similar_graph()
+    assert set(graph) == set(client.get_collection("sri_lanka_locations").get()["ids"])
+    assert all(neighbor in graph for neighbors in graph.values() for neighbor, _ in neighbors)
+
+
+def test_peak_rss_is_none_without_resource_or_psutil(monkeypatch):
+    monkeypatch.setattr(stream_ingest, "resource", None)
+    monkeypatch.setitem(sys.modules, "psutil", None)
+
+    assert peak_rss_mb() is None
@@ -0,0 +1,89 @@
+import os
+import uuid
+
+import chromadb
+import numpy as np
+import pytest
+
+from vector_backends import NumpyBackend
+
+
+def make_collection(count, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    collection = chromadb.EphemeralClient().create_collection(
+        f"test-{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"}, embedding_function=None
+    )
+    embeddings = rng.standard_normal((count, dim)).astype(np.float32)
+    collection.add(
+        ids=[f"loc-{i}" for i in range(count)],
+        embeddings=embeddings.tolist(),
+        metadatas=[{"name": f"Location {i}", "version": seed} for i in range(count)],
+        documents=[f"description {i}" for i in range(count)]
+    )
+    return collection
+
+
+def test_export_is_paged_and_keeps_rows_aligned_with_ids(tmp_path):
+    collection = make_collection(23)
+    calls = []
+    original_get = collection.get
+
+    def get(*args, **kwargs):
+        calls.append(kwargs)
+        return original_get(*args, **kwargs)
+
+    collection.get = get
+    backend = NumpyBackend.from_collection(collection, cache_dir=str(tmp_path), page_size=5)
+
+    assert backend.count() == 23
+    assert all(call.get("limit") == 5 and "ids" not in call for call in calls)
+    stored = collection.get(ids=backend.ids, include=["embeddings"])
+    expected = np.asarray(stored["embeddings"], dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    np.testing.assert_allclose(np.asarray(backend.full_embeddings), expected, rtol=1e-5, atol=1e-6)
+
+    result = backend.query([expected[7]], 1, ["distances", "metadatas"])
+    assert result["ids"][0] == [backend.ids[7]]
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+
+
+def test_reindex_prunes_stale_cache_files(tmp_path):
+    NumpyBackend.from_collection(make_collection(6, seed=1), cache_dir=str(tmp_path), dtype="int8")
+    first = set(os.listdir(tmp_path))
+    assert len(first) == 3
+
+    NumpyBackend.from_collection(make_collection(6, seed=2), cache_dir=str(tmp_path), dtype="int8")
+    second = set(os.listdir(tmp_path))
+    assert len(second) == 3
+    assert not first & second
+
+
+def test_reuses_cache_for_an_unchanged_collection(tmp_path):
+    collection = make_collection(4)
+    NumpyBackend.from_collection(collection, cache_dir=str(tmp_path))
+    before = {name: os.path.getmtime(tmp_path / name) for name in os.listdir(tmp_path)}
+    NumpyBackend.from_collection(collection, cache_dir=str(tmp_path))
+    assert {name: os.path.getmtime(tmp_path / name) for name in os.listdir(tmp_path)} == before
+
+
+def test_reembedded_collection_does_not_reuse_stale_vectors(tmp_path):
+    collection = make_collection(4)
+    NumpyBackend.from_collection(collection, cache_dir=str(tmp_path))
+    first = set(os.listdir(tmp_path))
+
+    stored = collection.get(include=["embeddings"])
+    collection.update(ids=stored["ids"], embeddings=(-np.asarray(stored["embeddings"])).tolist())
+    backend = NumpyBackend.from_collection(collection, cache_dir=str(tmp_path))
+
+    assert not first & set(os.listdir(tmp_path))
+    expected = -np.asarray(stored["embeddings"], dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    np.testing.assert_allclose(np.asarray(backend.full_embeddings), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_embedding_model_is_part_of_the_fingerprint(tmp_path):
+    collection = make_collection(4)
+    NumpyBackend.from_collection(collection, cache_dir=str(tmp_path), embedding_model="model-a")
+    first = set(os.listdir(tmp_path))
+    NumpyBackend.from_collection(collection, cache_dir=str(tmp_path), embedding_model="model-b")
+    assert not first & set(os.listdir(tmp_path))
@@ -0,0 +1,358 @@
+"""
+Vector search backends used by the recommender API.
+
+ChromaBackend forwards to the ChromaDB collection. NumpyBackend answers
+queries with an exact brute-force search over a memory-mapped matrix of
+normalized embeddings, which is faster than Chroma's SQLite + HNSW layers
+for catalogs of a few hundred thousand locations or fewer. Both return
+results in the same shape as ``collection.query`` / ``collection.get``.
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+SCORE_BLOCK_ROWS = 65536
+# Rows per collection.get(): one get() for everything exceeds SQLite's variable limit on large collections
+EXPORT_PAGE_SIZE = 5000
+# Stored embeddings hashed into the cache fingerprint, so a re-embedded collection is re-exported
+FINGERPRINT_SAMPLE_ROWS = 64
+
+
+class ChromaBackend:
+    """Vector backend that delegates to a ChromaDB collection"""
+
+    name = "chroma"
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.metric = collection_metric(collection)
+
+    def query(self, query_embeddings: Sequence[Any], n_results: int, include: List[str]) -> Dict[str, Any]:
+        return self.collection.query(
+            query_embeddings=list(query_embeddings),
+            n_results=n_results,
+            include=include
+        )
+
+    def get_all(self, include: List[str]) -> Dict[str, Any]:
+        return self.collection.get(include=include)
+
+    def score_ids(self, query_embedding: Any, ids: List[str]) -> List[float]:
+        """Distances from one query to the given ids, in the order requested"""
+        if not ids:
+            return []
+        records = self.collection.get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(records["ids"], records["embeddings"]))
+        vectors = np.asarray([by_id[item_id] for item_id in ids], dtype=np.float32)
+        return exact_distances(np.asarray(query_embedding, dtype=np.float32), vectors, self.metric).tolist()
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+class NumpyBackend:
+    """
+    Exact in-process vector search over a memory-mapped embedding matrix.
+
+    Embeddings are L2-normalized and stored as float32, float16 or int8
+    (symmetric per-row scale). Top-k is a single matrix product plus
+    ``argpartition``; with quantized storage the candidate set is widened
+    and rescored against the float32 matrix, which stays on disk and is
+    only paged in for the candidate rows.
+    """
+
+    name = "numpy"
+
+    def __init__(
+        self,
+        ids: List[str],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+        full_embeddings: Optional[np.ndarray],
+        matrix: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+        dtype: str = "float32",
+        metric: str = "l2",
+        rescore_factor: int = 4
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector dtype '{dtype}', expected one of {SUPPORTED_DTYPES}")
+
+        self.ids = ids
+        self.metadatas = metadatas
+        self.documents = documents
+        self.dtype = dtype
+        self.metric = metric
+        self.rescore_factor = max(1, rescore_factor)
+
+        if matrix is None:
+            matrix, scales = quantize(full_embeddings, dtype)
+        self.matrix = matrix
+        self.scales = scales
+        # Without float32 vectors, candidates are rescored from the stored matrix
+        self.full_embeddings = full_embeddings if full_embeddings is not None else matrix
+        self.positions = {item_id: i for i, item_id in enumerate(ids)}
+
+    @classmethod
+    def from_collection(
+        cls,
+        collection,
+        cache_dir: str = "./vector_cache",
+        dtype: str = "float32",
+        rescore_factor: int = 4,
+        page_size: int = EXPORT_PAGE_SIZE,
+        embedding_model: str = ""
+    ) -> "NumpyBackend":
+        """
+        Build (or reuse) memory-mapped matrices for a Chroma collection.
+
+        Files in ``cache_dir`` are keyed by a fingerprint of the collection's
+        ids, metadata (including content hashes), the embedding model and a
+        checksum of its first stored embeddings, so they are rewritten after
+        a re-index or a re-embedding, which also removes the files of earlier
+        fingerprints. The collection is read page by page, and embeddings are
+        written straight into the memory-mapped file.
+        """
+        ids: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        documents: List[str] = []
+        for offset in range(0, collection.count(), page_size):
+            records = collection.get(include=["metadatas", "documents"], limit=page_size, offset=offset)
+            ids.extend(records["ids"])
+            metadatas.extend(records["metadatas"] or [])
+            documents.extend(records["documents"] or [])
+        sample = collection.get(include=["embeddings"], limit=min(page_size, FINGERPRINT_SAMPLE_ROWS))
+        fingerprint = _collection_fingerprint(ids, metadatas, embedding_model, sample["ids"], sample["embeddings"])
+        metric = collection_metric(collection)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        full_path = os.path.join(cache_dir, f"embeddings-{fingerprint}.float32.npy")
+        quantized_path = os.path.join(cache_dir, f"embeddings-{fingerprint}.{dtype}.npy")
+        scales_path = os.path.join(cache_dir, f"embeddings-{fingerprint}.{dtype}.scales.npy")
+
+        if not os.path.exists(full_path):
+            logger.info(f"📐 Exporting {len(ids)} embeddings from ChromaDB to {full_path}")
+            _export_embeddings(collection, ids, full_path, page_size)
+            _prune_cache(cache_dir, fingerprint)
+
+        full_embeddings = np.load(full_path, mmap_mode="r")
+        matrix, scales = full_embeddings, None
+
+        if dtype != "float32":
+            if not os.path.exists(quantized_path):
+                quantized, quantized_scales = quantize(np.asarray(full_embeddings), dtype)
+                if quantized_scales is not None:
+                    _atomic_save(scales_path, quantized_scales)
+                _atomic_save(quantized_path, quantized)
+            matrix = np.load(quantized_path, mmap_mode="r")
+            scales = np.load(scales_path) if dtype == "int8" else None
+
+        logger.info(f"✅ NumPy vector backend ready ({len(ids)} vectors, {dtype}, metric={metric})")
+        return cls(
+            ids, metadatas, documents, full_embeddings,
+            matrix=matrix, scales=scales, dtype=dtype,
+            metric=metric, rescore_factor=rescore_factor
+        )
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def get_all(self, include: List[str]) -> Dict[str, Any]:
+        return {
+            "ids": list(self.ids),
+            "metadatas": list(self.metadatas) if "metadatas" in include else None,
+            "documents": list(self.documents) if "documents" in include else None,
+            "embeddings": np.asarray(self.full_embeddings) if "embeddings" in include else None,
+        }
+
+    def score_ids(self, query_embedding: Any, ids: List[str]) -> List[float]:
+        """Distances from one query to the given ids, in the order requested"""
+        if not ids:
+            return []
+        query = _normalize(np.asarray([query_embedding], dtype=np.float32))[0]
+        rows = np.asarray([self.positions[item_id] for item_id in ids])
+        similarities = np.asarray(self.full_embeddings[rows], dtype=np.float32) @ query
+        return [self._distance(float(s)) for s in similarities]
+
+    def similarities(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each normalized query against every stored vector"""
+        if self.dtype == "float32":
+            return np.asarray(queries @ self.matrix.T, dtype=np.float32)
+
+        # Upcast quantized rows block by block so BLAS does the product
+        scores = np.empty((len(queries), len(self.ids)), dtype=np.float32)
+        for start in range(0, len(self.ids), SCORE_BLOCK_ROWS):
+            block = np.asarray(self.matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        if self.scales is not None:
+            scores *= self.scales[None, :]
+        return scores
+
+    def query(self, query_embeddings: Sequence[Any], n_results: int, include: List[str]) -> Dict[str, Any]:
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+        total = len(self.ids)
+        k = min(n_results, total)
+        result = {"ids": [], "distances": [], "metadatas": [], "documents": [], "embeddings": []}
+        if k == 0:
+            return self._project({key: [[] for _ in queries] for key in result}, include)
+
+        scores = self.similarities(queries)
+        candidates = k if self.dtype == "float32" else min(total, k * self.rescore_factor)
+
+        for row, query in zip(scores, queries):
+            top = np.argpartition(-row, candidates - 1)[:candidates] if candidates < total else np.arange(total)
+            if self.dtype == "float32":
+                top_scores = row[top]
+            else:
+                # Rescore quantized candidates against the exact float32 vectors
+                top.sort()
+                top_scores = np.asarray(self.full_embeddings[top], dtype=np.float32) @ query
+            order = np.argsort(-top_scores)[:k]
+            top, top_scores = top[order], top_scores[order]
+
+            result["ids"].append([self.ids[i] for i in top])
+            result["distances"].append([self._distance(float(s)) for s in top_scores])
+            result["metadatas"].append([self.metadatas[i] for i in top])
+            result["documents"].append([self.documents[i] for i in top])
+            if "embeddings" in include:
+                result["embeddings"].append(np.asarray(self.full_embeddings[top]))
+
+        return self._project(result, include)
+
+    def _distance(self, similarity: float) -> float:
+        # Match Chroma's distance definitions for normalized vectors
+        if self.metric == "l2":
+            return max(0.0, 2.0 - 2.0 * similarity)
+        return 1.0 - similarity
+
+    @staticmethod
+    def _project(result: Dict[str, Any], include: List[str]) -> Dict[str, Any]:
+        return {
+            "ids": result["ids"],
+            "distances": result["distances"] if "distances" in include else None,
+            "metadatas": result["metadatas"] if "metadatas" in include else None,
+            "documents": result["documents"] if "documents" in include else None,
+            "embeddings": result["embeddings"] if "embeddings" in include else None,
+        }
+
+
+def quantize(embeddings: np.ndarray, dtype: str):
+    """Quantize normalized float32 embeddings, returning (matrix, per-row scales or None)"""
+    if dtype == "float16":
+        return np.asarray(embeddings, dtype=np.float16), None
+    if dtype == "int8":
+        max_abs = np.abs(embeddings).max(axis=1)
+        scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+        quantized = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales
+    return embeddings, None
+
+
+def collection_metric(collection) -> str:
+    """The collection's distance function: l2 (Chroma's default), cosine or ip"""
+    configuration = getattr(collection, "configuration_json", None) or {}
+    space = (configuration.get("hnsw") or {}).get("space")
+    return space or (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def similarity_from_distance(distance: float, metric: str = "l2") -> float:
+    """
+    Cosine similarity in [0, 1] from a Chroma distance between normalized vectors.
+
+    l2 is the squared distance 2 - 2cos; cosine and ip are 1 - cos.
+    """
+    if metric == "l2":
+        return max(0.0, 1.0 - distance / 2.0)
+    return max(0.0, 1.0 - distance)
+
+
+def exact_distances(query: np.ndarray, vectors: np.ndarray, metric: str = "l2") -> np.ndarray:
+    """Chroma-compatible distances between one query and a matrix of vectors"""
+    if metric == "l2":
+        diff = vectors - query[None, :]
+        return np.einsum("ij,ij->i", diff, diff)
+    if metric == "cosine":
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        norms[norms == 0] = 1.0
+        return 1.0 - (vectors @ query) / norms
+    return 1.0 - vectors @ query
+
+
+def create_vector_backend(collection, backend: str = "chroma", **options):
+    """Build the configured vector backend for a loaded collection"""
+    if backend == "numpy":
+        return NumpyBackend.from_collection(collection, **options)
+    if backend != "chroma":
+        logger.warning(f"⚠️ Unknown vector backend '{backend}', falling back to chroma")
+    return ChromaBackend(collection)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(matrix), -1) if len(matrix) else np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def _collection_fingerprint(ids: List[str], metadatas: List[Dict[str, Any]], embedding_model: str = "",
+                            sample_ids: Optional[Sequence[str]] = None, sample_embeddings: Any = None) -> str:
+    digest = hashlib.sha256()
+    for item_id, metadata in zip(ids, metadatas):
+        digest.update(item_id.encode("utf-8"))
+        digest.update(json.dumps(metadata, sort_keys=True).encode("utf-8"))
+    if embedding_model:
+        digest.update(f"model:{embedding_model}".encode("utf-8"))
+    if sample_ids is not None and sample_embeddings is not None and len(sample_ids):
+        digest.update("\0".join(sample_ids).encode("utf-8"))
+        digest.update(np.ascontiguousarray(sample_embeddings, dtype=np.float32).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _export_embeddings(collection, ids: List[str], path: str, page_size: int) -> None:
+    """Write the collection's normalized embeddings to a .npy file, in the order of ids"""
+    positions = {item_id: i for i, item_id in enumerate(ids)}
+    tmp_path = f"{path}.tmp"
+    matrix = None
+    try:
+        for offset in range(0, len(ids), page_size):
+            records = collection.get(include=["embeddings"], limit=page_size, offset=offset)
+            page = _normalize(np.asarray(records["embeddings"], dtype=np.float32))
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                                   shape=(len(ids), page.shape[1]))
+            matrix[[positions[item_id] for item_id in records["ids"]]] = page
+        if matrix is None:
+            _atomic_save(path, np.zeros((0, 0), dtype=np.float32))
+            return
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _prune_cache(cache_dir: str, fingerprint: str) -> None:
+    """Remove cached matrices left behind by earlier versions of the collection"""
+    for name in os.listdir(cache_dir):
+        if name.startswith("embeddings-") and not name.startswith(f"embeddings-{fingerprint}."):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+                logger.info(f"🧹 Removed stale vector cache file {name}")
+            except OSError as e:
+                logger.warning(f"⚠️ Could not remove stale vector cache file {name}: {e}")
+
+
+def _atomic_save(path: str, array: np.ndarray) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
@@ -0,0 +1,466 @@
+"""
+Job-page ingestion for the email generation tool.
+
+Careers pages are fetched concurrently through an on-disk HTTP cache
+(revalidated with ETag / Last-Modified), stripped of navigation and other
+boilerplate, split into chunks that fit the prompt, and every chunk goes
+through the job extraction prompt in parallel. Jobs found on several
+chunks or pages of the same site are merged by role.
+
+Usage:
+    python job_ingest.py https://careers.example.com/jobs https://careers.example.com/jobs/42
+    LLM_PROVIDER=fake python job_ingest.py --demo    # fixture pages served from a local HTTP server
+"""
+import argparse
+import functools
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
+
+# Shares the pooled, rate-limited LLM client with the post generator
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "linkeding-post-genarator"))
+from llm_helper import get_llm  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+USER_AGENT = "email-generation-tool/1.0 (+job ingestion)"
+CHARS_PER_TOKEN = 4
+
+EXTRACT_TEMPLATE = """The following text is scraped from a company's careers page:
+
+    {page_data}
+
+    Your task is to extract all job postings and return them as a JSON array,
+    one object per job with the following keys only:
+    - "role": The job title or role
+    - "experience": Required or preferred experience
+    - "skills": A list of required or preferred skills
+    Only return the valid JSON array, no preamble. Return [] if there are no job postings.
+    """
+
+extract_prompt = PromptTemplate.from_template(EXTRACT_TEMPLATE)
+json_parser = JsonOutputParser()
+
+
+class HTTPCache:
+    """
+    Response bodies on disk, keyed by URL, with the validators to revalidate them.
+
+    Entries younger than max_age seconds are used without a request; older
+    ones are revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged page costs a 304 and no body.
+    """
+
+    def __init__(self, directory=".http_cache", max_age=3600):
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def get(self, url):
+        """(meta, body) for url, or None"""
+        path = self._path(url)
+        try:
+            with open(f"{path}.json", encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(f"{path}.body", "rb") as file:
+                return meta, file.read()
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, meta):
+        return time.time() - meta.get("fetched_at", 0) < self.max_age
+
+    def put(self, url, meta, body=None):
+        # Write then rename so a crash never leaves a torn entry behind
+        path = self._path(url)
+        if body is not None:
+            with open(f"{path}.body.tmp", "wb") as file:
+                file.write(body)
+            os.replace(f"{path}.body.tmp", f"{path}.body")
+        with open(f"{path}.json.tmp", "w", encoding="utf-8") as file:
+            json.dump(meta | {"url": url}, file)
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+
+def fetch_page(url, cache=None, timeout=20):
+    """
+    Fetch one page through the cache.
+
+    Returns {url, html, source, bytes} where source is "cached" (fresh, no
+    request), "not_modified" (revalidated with a 304) or "fetched".
+    """
+    cached = cache.get(url) if cache else None
+    if cached and cache.is_fresh(cached[0]):
+        meta, body = cached
+        return {"url": url, "html": body.decode(meta.get("charset", "utf-8"), errors="replace"),
+                "source": "cached", "bytes": 0}
+
+    headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"}
+    if cached:
+        if cached[0].get("etag"):
+            headers["If-None-Match"] = cached[0]["etag"]
+        if cached[0].get("last_modified"):
+            headers["If-Modified-Since"] = cached[0]["last_modified"]
+
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+            body = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            meta = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "charset": response.headers.get_content_charset() or "utf-8",
+                "fetched_at": time.time(),
+            }
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or not cached:
+            raise
+        meta, body = cached
+        cache.put(url, meta | {"fetched_at": time.time()})
+        return {"url": url, "html": body.decode(meta.get("charset", "utf-8"), errors="replace"),
+                "source": "not_modified", "bytes": 0}
+
+    if cache:
+        cache.put(url, meta, body)
+    return {"url": url, "html": body.decode(meta["charset"], errors="replace"), "source": "fetched",
+            "bytes": len(body)}
+
+
+def fetch_pages(urls, cache=None, workers=8, timeout=20):
+    """Fetch every URL (duplicates once) in parallel; a failed page is {url, error}"""
+    def fetch(url):
+        try:
+            return fetch_page(url, cache, timeout)
+        except Exception as e:
+            print(f"Error fetching {url}: {str(e)}")
+            return {"url": url, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fetch, dict.fromkeys(urls)))
+
+
+# Never visible text
+INVISIBLE_TAGS = {"head", "script", "style", "noscript", "template"}
+# Never part of a job description
+SKIP_TAGS = INVISIBLE_TAGS | {"svg", "iframe", "nav", "aside", "form", "button", "select", "dialog"}
+# Site chrome when outside <main>/<article>; inside them they usually hold the job title or apply links
+CHROME_TAGS = {"header", "footer"}
+SKIP_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "alertdialog"}
+BOILERPLATE_WORDS = {"nav", "navbar", "menu", "cookie", "cookies", "consent", "banner", "breadcrumb",
+                     "breadcrumbs", "sidebar", "social", "share", "modal", "popup", "newsletter",
+                     "subscribe", "skip"}
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5",
+              "h6", "tr", "table", "dd", "dt", "dl", "blockquote", "pre", "header", "footer"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source",
+             "track", "wbr"}
+
+
+class _PageText(HTMLParser):
+    """
+    Collects visible text outside boilerplate, and separately the text
+    inside <main>/<article> and all visible text (boilerplate included)
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.main_parts = []
+        self.all_parts = []
+        self._stack = []
+        self._skipping = 0
+        self._in_main = 0
+        self._invisible = 0
+
+    def _is_boilerplate(self, tag, attrs):
+        if tag in SKIP_TAGS or (tag in CHROME_TAGS and not self._in_main):
+            return True
+        attrs = dict(attrs)
+        if (attrs.get("role") or "").lower() in SKIP_ROLES or "hidden" in attrs or attrs.get("aria-hidden") == "true":
+            return True
+        words = re.split(r"[^a-z0-9]+", f"{attrs.get('class') or ''} {attrs.get('id') or ''}".lower())
+        return any(word in BOILERPLATE_WORDS for word in words)
+
+    def _newline(self):
+        self.parts.append("\n")
+        self.all_parts.append("\n")
+        if self._in_main:
+            self.main_parts.append("\n")
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._newline()
+            return
+        skip = self._skipping > 0 or self._is_boilerplate(tag, attrs)
+        main = not skip and tag in ("main", "article")
+        invisible = tag in INVISIBLE_TAGS
+        self._stack.append((tag, skip, main, invisible))
+        self._skipping += skip
+        self._in_main += main
+        self._invisible += invisible
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "br":
+            self._newline()
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed tags: close everything opened after the matching start tag
+        if not any(open_tag == tag for open_tag, _, _, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, skip, main, invisible = self._stack.pop()
+            self._skipping -= skip
+            self._in_main -= main
+            self._invisible -= invisible
+            if open_tag == tag:
+                break
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        if not self._invisible:
+            self.all_parts.append(data)
+        if self._skipping:
+            return
+        self.parts.append(data)
+        if self._in_main:
+            self.main_parts.append(data)
+
+
+def _clean_lines(parts):
+    lines = []
+    for line in "".join(parts).splitlines():
+        line = " ".join(line.split())
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def html_to_text(html, min_main_chars=200, strip_boilerplate=True):
+    """
+    Visible page text without navigation, headers, footers, banners and scripts.
+
+    When the page marks its content with <main> or <article> and that holds
+    at least min_main_chars, only that is kept. strip_boilerplate=False
+    keeps all visible text, as a document loader would.
+    """
+    trimmed, all_text = page_texts(html, min_main_chars)
+    return trimmed if strip_boilerplate else all_text
+
+
+def page_texts(html, min_main_chars=200):
+    """(trimmed text as html_to_text returns it, all visible text) from one parse of the page"""
+    parser = _PageText()
+    parser.feed(html)
+    parser.close()
+    main = _clean_lines(parser.main_parts)
+    trimmed = main if len(main) >= min_main_chars else _clean_lines(parser.parts)
+    return trimmed, _clean_lines(parser.all_parts)
+
+
+def chunk_text(text, max_tokens=1500, overlap_tokens=100):
+    """
+    Split text on line boundaries into chunks of about max_tokens at most.
+
+    Consecutive chunks share roughly overlap_tokens of trailing lines so a
+    job cut at a boundary is still seen whole in one of them.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    lines = []
+    for line in text.splitlines():
+        lines.extend(line[start:start + max_chars] for start in range(0, len(line), max_chars))
+
+    chunks, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            carry, carried = [], 0
+            for previous in reversed(current):
+                if carried + len(previous) + 1 > overlap_chars:
+                    break
+                carry.insert(0, previous)
+                carried += len(previous) + 1
+            current, size = carry, carried
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _as_jobs(output):
+    """The job objects in a parsed answer, whether it came back as a list, one job or {"jobs": [...]}"""
+    if isinstance(output, dict):
+        if "role" in output:
+            output = [output]
+        else:
+            output = next((value for value in output.values() if isinstance(value, list)), [])
+    if not isinstance(output, list):
+        return []
+    return [job for job in output if isinstance(job, dict) and job.get("role")]
+
+
+def extract_jobs(chunks, workers=4, max_attempts=3):
+    """
+    Run the extraction prompt over every chunk in parallel.
+
+    Returns one list of jobs per chunk; a chunk whose request or JSON
+    failed yields an exception instead.
+    """
+    model = get_llm(temperature=0).with_retry(stop_after_attempt=max_attempts)
+    chain = extract_prompt | model | json_parser
+    outputs = chain.batch([{"page_data": chunk} for chunk in chunks],
+                          config={"max_concurrency": workers}, return_exceptions=True)
+    return [output if isinstance(output, Exception) else _as_jobs(output) for output in outputs]
+
+
+def _normalize(text):
+    return " ".join(re.findall(r"[a-z0-9+#]+", str(text or "").lower()))
+
+
+def _skills(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(skill).strip() for skill in value or [] if str(skill).strip()]
+
+
+def merge_jobs(jobs):
+    """
+    Deduplicate (job, url) pairs: the same role on the same site is one job.
+
+    Skills are unioned (first spelling wins), the most detailed experience
+    is kept and every page the job was seen on is listed under sources.
+    """
+    merged = {}
+    for job, url in jobs:
+        key = (urllib.parse.urlsplit(url).netloc, _normalize(job.get("role")))
+        if key not in merged:
+            merged[key] = {"role": str(job["role"]).strip(), "experience": "", "skills": [], "sources": []}
+        entry = merged[key]
+        experience = str(job.get("experience") or "").strip()
+        if len(experience) > len(entry["experience"]):
+            entry["experience"] = experience
+        seen = {_normalize(skill) for skill in entry["skills"]}
+        for skill in _skills(job.get("skills")):
+            if _normalize(skill) not in seen:
+                seen.add(_normalize(skill))
+                entry["skills"].append(skill)
+        if url not in entry["sources"]:
+            entry["sources"].append(url)
+    return list(merged.values())
+
+
+def ingest_jobs(urls, cache_dir=".http_cache", max_age=3600, fetch_workers=8, extract_workers=4,
+                chunk_tokens=1500):
+    """
+    Fetch, trim, chunk and extract jobs from every careers page in urls.
+
+    Returns (jobs, stats). stats counts pages by fetch source, the prompt
+    tokens the raw HTML, all visible text and the trimmed text would take,
+    chunks sent and jobs before and after merging.
+    """
+    started = time.perf_counter()
+    cache = HTTPCache(cache_dir, max_age) if cache_dir else None
+    pages = fetch_pages(urls, cache, fetch_workers)
+
+    stats = {"pages": len(pages), "fetched": 0, "not_modified": 0, "cached": 0, "failed": 0,
+             "bytes_downloaded": 0, "html_tokens": 0, "all_text_tokens": 0, "trimmed_tokens": 0}
+    chunks = []
+    for page in pages:
+        if "error" in page:
+            stats["failed"] += 1
+            continue
+        stats[page["source"]] += 1
+        stats["bytes_downloaded"] += page["bytes"]
+        text, all_text = page_texts(page["html"])
+        stats["html_tokens"] += len(page["html"]) // CHARS_PER_TOKEN
+        stats["all_text_tokens"] += len(all_text) // CHARS_PER_TOKEN
+        stats["trimmed_tokens"] += len(text) // CHARS_PER_TOKEN
+        chunks.extend((chunk, page["url"]) for chunk in chunk_text(text, chunk_tokens))
+
+    results = extract_jobs([chunk for chunk, _ in chunks], extract_workers) if chunks else []
+    found = []
+    for (_, url), result in zip(chunks, results):
+        if isinstance(result, Exception):
+            stats["failed_chunks"] = stats.get("failed_chunks", 0) + 1
+            print(f"Error extracting jobs from {url}: {str(result)}")
+            continue
+        found.extend((job, url) for job in result)
+    jobs = merge_jobs(found)
+
+    stats["chunks"] = len(chunks)
+    stats["jobs_extracted"] = len(found)
+    stats["jobs"] = len(jobs)
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return jobs, stats
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(directory=FIXTURES_DIR):
+    """
+    Serve fixture pages from a local HTTP server on a free port, in a background thread.
+
+    SimpleHTTPRequestHandler sends Last-Modified and answers If-Modified-Since
+    with 304, so the cache can be exercised end to end. Returns (server, base_url);
+    call server.shutdown() when done.
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract job postings from careers pages")
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--demo", action="store_true", help="Ingest the fixture pages from a local server, twice")
+    parser.add_argument("--cache-dir", default=".http_cache", help="HTTP cache directory ('' disables)")
+    parser.add_argument("--max-age", type=float, default=3600, help="Seconds before a cached page is revalidated")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--extract-workers", type=int, default=4)
+    parser.add_argument("--chunk-tokens", type=int, default=1500)
+    parser.add_argument("--output", help="Write the jobs as JSON to this path")
+    args = parser.parse_args()
+
+    if args.demo:
+        server, base_url = serve_fixtures()
+        urls = [f"{base_url}/{name}" for name in sorted(os.listdir(FIXTURES_DIR)) if name.endswith(".html")]
+        # First run fills the cache; max_age=0 makes the second revalidate every page (304s)
+        for run in ("first run", "revalidated"):
+            jobs, stats = ingest_jobs(urls, args.cache_dir, 0, args.fetch_workers, args.extract_workers,
+                                      args.chunk_tokens)
+            print(f"{run}: {json.dumps(stats)}")
+        server.shutdown()
+    else:
+        jobs, stats = ingest_jobs(args.urls, args.cache_dir, args.max_age, args.fetch_workers,
+                                  args.extract_workers, args.chunk_tokens)
+        print(json.dumps(stats, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(jobs, file, indent=4, ensure_ascii=False)
+    else:
+        print(json.dumps(jobs, indent=2, ensure_ascii=False))
@@ -0,0 +1,306 @@
+"""
+Match job skills against the tech-stack / portfolio Chroma collection in batches.
+
+All skills of one or many jobs are deduplicated, embedded in one call
+(skills already embedded are served from SkillEmbeddingCache, in memory
+and optionally on disk) and searched with a single multi-query
+collection.query(). Each job's hit lists are then merged into one ranked
+list of portfolio entries: an entry matched by several of the job's
+skills, or matched closely, ranks higher.
+
+Usage:
+    python portfolio_matcher.py jobs.json                 # output of job_ingest.py --output jobs.json
+    EMBEDDING_BACKEND=fake python portfolio_matcher.py --demo
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+# "default" embeds with Chroma's default model (what the tech-stack collection was built with);
+# "fake" uses HashingEmbeddingFunction so everything runs offline
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "default")
+SKILL_CACHE_PATH = os.getenv("SKILL_CACHE_PATH", "skill_embeddings.sqlite")
+# Most keys bound into one SELECT ... IN (...) by SkillEmbeddingCache.get_many
+SQLITE_MAX_PARAMETERS = 900
+
+
+def normalize_skill(skill):
+    return " ".join(str(skill).lower().split())
+
+
+def job_skills(job):
+    """Skills of a job as a list, whether given as a list or a comma separated string"""
+    skills = job.get("skills") or []
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    return [str(skill).strip() for skill in skills if str(skill).strip()]
+
+
+class HashingEmbeddingFunction:
+    """Deterministic offline embeddings from hashed character trigrams (similar spellings land close)"""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def name(self):
+        return f"hashing-trigram-{self.dim}"
+
+    def __call__(self, input):
+        vectors = np.zeros((len(input), self.dim), dtype=np.float32)
+        for row, text in enumerate(input):
+            padded = f"  {normalize_skill(text)} "
+            for start in range(len(padded) - 2):
+                digest = hashlib.md5(padded[start:start + 3].encode("utf-8")).digest()
+                vectors[row, int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return list(vectors / np.where(norms == 0, 1, norms))
+
+
+def create_embedding_function():
+    if EMBEDDING_BACKEND == "fake":
+        return HashingEmbeddingFunction()
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+    return DefaultEmbeddingFunction()
+
+
+def embedding_model_id(embedding_function):
+    name = getattr(embedding_function, "name", None)
+    return name() if callable(name) else type(embedding_function).__name__
+
+
+class SkillEmbeddingCache:
+    """
+    Skill embeddings keyed by (model, normalized skill).
+
+    Always cached in memory; with a path, also in SQLite so they survive
+    restarts. The same handful of skills recur across most job postings,
+    so after warm-up nearly every lookup is a hit.
+    """
+
+    def __init__(self, path=None, model_id=""):
+        self.model_id = model_id
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS skill_embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, skill):
+        return f"{self.model_id}\0{normalize_skill(skill)}"
+
+    def get_many(self, skills):
+        """{skill: vector} for the skills that are cached"""
+        found = {}
+        with self._lock:
+            missing = []
+            for skill in skills:
+                vector = self._memory.get(self._key(skill))
+                if vector is None:
+                    missing.append(skill)
+                else:
+                    found[skill] = vector
+            if missing and self._conn is not None:
+                keys = {self._key(skill): skill for skill in missing}
+                key_list = list(keys)
+                # Older SQLite builds cap a statement at 999 bound parameters
+                for start in range(0, len(key_list), SQLITE_MAX_PARAMETERS):
+                    chunk = key_list[start:start + SQLITE_MAX_PARAMETERS]
+                    placeholders = ",".join("?" * len(chunk))
+                    for key, blob in self._conn.execute(
+                        f"SELECT key, vector FROM skill_embeddings WHERE key IN ({placeholders})", chunk
+                    ):
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._memory[key] = vector
+                        found[keys[key]] = vector
+            self.hits += len(found)
+            self.misses += len(skills) - len(found)
+        return found
+
+    def put_many(self, vectors):
+        """Store {skill: vector}"""
+        rows = {self._key(skill): np.asarray(vector, dtype=np.float32) for skill, vector in vectors.items()}
+        with self._lock:
+            self._memory.update(rows)
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO skill_embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in rows.items()]
+                )
+                self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._memory), "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+def _similarity(distance, space):
+    # Chroma distances to a similarity in [0, 1] (embeddings are unit length);
+    # "ip" distance is 1 - dot, which for unit vectors is the cosine distance
+    if space in ("cosine", "ip"):
+        return max(0.0, 1.0 - distance)
+    return max(0.0, 1.0 - distance / 2.0)
+
+
+def _collection_space(collection):
+    configuration = getattr(collection, "configuration_json", None) or {}
+    space = (configuration.get("hnsw") or {}).get("space")
+    return space or (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+class PortfolioMatcher:
+    """
+    Ranked portfolio entries per job, from one embedding batch and one query.
+
+    n_results hits are fetched per skill; an entry's score for a job is the
+    sum of its similarities to the job's skills, so breadth and closeness
+    both count. link_key names the metadata field holding portfolio links.
+    """
+
+    def __init__(self, collection, embedding_function=None, cache=None, n_results=3, link_key="links"):
+        self.collection = collection
+        self.embedding_function = embedding_function or create_embedding_function()
+        self.cache = cache or SkillEmbeddingCache(model_id=embedding_model_id(self.embedding_function))
+        self.n_results = n_results
+        self.link_key = link_key
+        self.space = _collection_space(collection)
+        self.stats = {"jobs": 0, "skills": 0, "unique_skills": 0, "embedded": 0, "queries": 0}
+
+    def embed_skills(self, skills):
+        """{skill: vector} for unique skills, embedding only the ones not cached, in one call"""
+        vectors = self.cache.get_many(skills)
+        missing = [skill for skill in skills if skill not in vectors]
+        if missing:
+            fresh = dict(zip(missing, (np.asarray(v, dtype=np.float32) for v in self.embedding_function(missing))))
+            self.cache.put_many(fresh)
+            vectors.update(fresh)
+            self.stats["embedded"] += len(missing)
+        return vectors
+
+    def match(self, jobs, top_k=5):
+        """
+        Portfolio matches for every job, in order.
+
+        Returns one list per job of {id, name, links, metadata, score,
+        matched_skills}, best first, at most top_k long.
+        """
+        per_job = [[normalize_skill(skill) for skill in job_skills(job)] for job in jobs]
+        unique = list(dict.fromkeys(skill for skills in per_job for skill in skills))
+        self.stats["jobs"] += len(jobs)
+        self.stats["skills"] += sum(len(skills) for skills in per_job)
+        self.stats["unique_skills"] += len(unique)
+        if not unique or not self.collection.count():
+            return [[] for _ in jobs]
+
+        vectors = self.embed_skills(unique)
+        result = self.collection.query(
+            query_embeddings=[vectors[skill].tolist() for skill in unique],
+            n_results=min(self.n_results, self.collection.count()),
+            include=["metadatas", "documents", "distances"]
+        )
+        self.stats["queries"] += 1
+        hits = {}
+        for row, skill in enumerate(unique):
+            hits[skill] = list(zip(result["ids"][row], result["documents"][row],
+                                   result["metadatas"][row], result["distances"][row]))
+
+        matches = []
+        for skills in per_job:
+            merged = {}
+            for skill in dict.fromkeys(skills):
+                for item_id, document, metadata, distance in hits[skill]:
+                    entry = merged.setdefault(item_id, {
+                        "id": item_id,
+                        "name": document,
+                        "links": (metadata or {}).get(self.link_key),
+                        "metadata": metadata or {},
+                        "score": 0.0,
+                        "matched_skills": [],
+                    })
+                    entry["score"] += _similarity(distance, self.space)
+                    entry["matched_skills"].append(skill)
+            ranked = sorted(merged.values(), key=lambda entry: -entry["score"])[:top_k]
+            for entry in ranked:
+                entry["score"] = round(entry["score"], 4)
+            matches.append(ranked)
+        return matches
+
+
+def open_collection(path="chroma", name="tech-stack"):
+    import chromadb
+
+    return chromadb.PersistentClient(path=path).get_collection(name, embedding_function=None)
+
+
+# The notebook's tech-stack entries, with portfolio links for the demo
+DEMO_PORTFOLIO = [
+    ("Python", "High-level, interpreted, general-purpose programming language.", "https://example.com/portfolio/python"),
+    ("JavaScript", "Versatile language primarily used for web development.", "https://example.com/portfolio/javascript"),
+    ("Java", "Object-oriented programming language used for web, Android, and enterprise development.", "https://example.com/portfolio/java"),
+    ("C++", "Compiled, high-performance language with object-oriented features.", "https://example.com/portfolio/cpp"),
+    ("Go", "Statically typed language designed for simplicity and performance.", "https://example.com/portfolio/go"),
+    ("Rust", "Memory-safe, high-performance language without garbage collection.", "https://example.com/portfolio/rust"),
+    ("Kotlin", "Modern programming language for Android and JVM development.", "https://example.com/portfolio/kotlin"),
+    ("TypeScript", "Typed superset of JavaScript that compiles to plain JavaScript.", "https://example.com/portfolio/typescript"),
+    ("Ruby", "Dynamic, interpreted language known for simplicity and productivity.", "https://example.com/portfolio/ruby"),
+    ("Swift", "Modern language developed by Apple for iOS and macOS development.", "https://example.com/portfolio/swift"),
+]
+
+DEMO_JOBS = [
+    {"role": "Senior Python Developer", "skills": ["Python", "Django", "PostgreSQL", "AWS"]},
+    {"role": "Frontend Engineer", "skills": ["React", "TypeScript", "JavaScript", "CSS"]},
+    {"role": "Android Developer", "skills": ["Kotlin", "Java", "Android SDK"]},
+    {"role": "Backend Developer", "skills": ["Python", "Go", "AWS", "Docker"]},
+]
+
+
+def demo_collection(embedding_function):
+    import chromadb
+
+    collection = chromadb.EphemeralClient().get_or_create_collection("tech-stack-demo", embedding_function=None)
+    names = [name for name, _, _ in DEMO_PORTFOLIO]
+    collection.add(
+        ids=[str(i + 1) for i in range(len(DEMO_PORTFOLIO))],
+        documents=names,
+        embeddings=[vector.tolist() for vector in map(np.asarray, embedding_function(names))],
+        metadatas=[{"description": description, "links": link} for _, description, link in DEMO_PORTFOLIO]
+    )
+    return collection
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Match job skills to portfolio entries")
+    parser.add_argument("jobs_path", nargs="?", help="JSON list of jobs with a skills field")
+    parser.add_argument("--demo", action="store_true", help="Match sample jobs against an in-memory collection")
+    parser.add_argument("--chroma-path", default="chroma")
+    parser.add_argument("--collection", default="tech-stack")
+    parser.add_argument("--n-results", type=int, default=3, help="Hits per skill")
+    parser.add_argument("--top-k", type=int, default=5, help="Portfolio entries per job")
+    parser.add_argument("--cache-path", default=SKILL_CACHE_PATH, help="Skill embedding cache ('' = memory only)")
+    args = parser.parse_args()
+
+    embedding_function = create_embedding_function()
+    cache = SkillEmbeddingCache(args.cache_path or None, embedding_model_id(embedding_function))
+    if args.demo:
+        collection, jobs = demo_collection(embedding_function), DEMO_JOBS
+    else:
+        collection = open_collection(args.chroma_path, args.collection)
+        with open(args.jobs_path, encoding="utf-8") as file:
+            jobs = json.load(file)
+
+    matcher = PortfolioMatcher(collection, embedding_function, cache, args.n_results)
+    for job, matches in zip(jobs, matcher.match(jobs, args.top_k)):
+        print(f"{job.get('role')}: " + ", ".join(
+            f"{match['name']} ({match['score']}, {'/'.join(match['matched_skills'])})" for match in matches
+        ))
+    print(json.dumps({"matcher": matcher.stats, "skill_cache": cache.stats()}))
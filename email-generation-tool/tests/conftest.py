@@ -0,0 +1,13 @@
+"""Tests run offline: hashed trigram embeddings, the fake chat model and local fixture pages"""
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+os.environ.setdefault("EMBEDDING_BACKEND", "fake")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_CACHE"] = "off"
+os.environ["FAKE_LLM_LATENCY"] = "0"
+os.environ["FAKE_LLM_FAILURE_RATE"] = "0"
@@ -0,0 +1,128 @@
+import http.server
+import os
+import threading
+
+import pytest
+
+from job_ingest import (FIXTURES_DIR, HTTPCache, chunk_text, fetch_page, html_to_text, ingest_jobs, merge_jobs,
+                        page_texts, serve_fixtures)
+
+
+@pytest.fixture
+def fixtures_server():
+    server, base_url = serve_fixtures()
+    yield base_url
+    server.shutdown()
+    server.server_close()
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as file:
+        return file.read()
+
+
+class _ETagHandler(http.server.BaseHTTPRequestHandler):
+    """One page with an ETag and no Last-Modified, counting full responses"""
+
+    body = b"<main><h2>Role</h2></main>"
+    etag = '"v1"'
+    sent = 0
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        type(self).sent += 1
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_cache_is_fresh_then_revalidated_with_last_modified(fixtures_server, tmp_path):
+    url = f"{fixtures_server}/acme_careers.html"
+
+    first = fetch_page(url, HTTPCache(str(tmp_path), max_age=3600))
+    cached = fetch_page(url, HTTPCache(str(tmp_path), max_age=3600))
+    revalidated = fetch_page(url, HTTPCache(str(tmp_path), max_age=0))
+
+    assert (first["source"], cached["source"], revalidated["source"]) == ("fetched", "cached", "not_modified")
+    assert first["bytes"] > 0 and cached["bytes"] == revalidated["bytes"] == 0
+    assert cached["html"] == revalidated["html"] == first["html"]
+
+
+def test_cache_revalidates_with_etag(tmp_path):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/jobs"
+    try:
+        cache = HTTPCache(str(tmp_path), max_age=0)
+        sources = [fetch_page(url, cache)["source"] for _ in range(3)]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert sources == ["fetched", "not_modified", "not_modified"]
+    assert _ETagHandler.sent == 1
+
+
+def test_boilerplate_is_stripped_and_main_content_kept():
+    html = read_fixture("acme_careers.html")
+    trimmed, all_text = page_texts(html)
+
+    assert "Senior Python Developer" in trimmed and "DevOps Engineer" in trimmed
+    for boilerplate in ("About us", "We use cookies", "Why work with us", "gtag", "font-family"):
+        assert boilerplate not in trimmed
+    assert "About us" in all_text and "We use cookies" in all_text
+    assert "gtag" not in all_text
+    assert html_to_text(html) == trimmed
+    assert html_to_text(html, strip_boilerplate=False) == all_text
+
+
+def test_chunks_fit_the_budget_and_overlap():
+    text = "\n".join(f"line {i:03d} " + "x" * 30 for i in range(200))
+    chunks = chunk_text(text, max_tokens=100, overlap_tokens=20)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 * 4 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.splitlines()[0] in previous.splitlines()
+    covered = {line for chunk in chunks for line in chunk.splitlines()}
+    assert covered == set(text.splitlines())
+
+
+def test_merge_jobs_dedupes_roles_per_site():
+    jobs = merge_jobs([
+        ({"role": "Senior Python Developer", "experience": "5+ years", "skills": ["Python", "AWS"]},
+         "https://acme.example/careers"),
+        ({"role": "senior python developer", "experience": "5+ years building backend services",
+          "skills": "python, Celery"}, "https://acme.example/jobs/42"),
+        ({"role": "Senior Python Developer", "experience": "", "skills": []}, "https://globex.example/careers"),
+    ])
+
+    assert len(jobs) == 2
+    acme = jobs[0]
+    assert acme["experience"] == "5+ years building backend services"
+    assert acme["skills"] == ["Python", "AWS", "Celery"]
+    assert acme["sources"] == ["https://acme.example/careers", "https://acme.example/jobs/42"]
+
+
+def test_ingest_fixture_pages_end_to_end(fixtures_server, tmp_path):
+    urls = [f"{fixtures_server}/{name}" for name in sorted(os.listdir(FIXTURES_DIR)) if name.endswith(".html")]
+
+    jobs, stats = ingest_jobs(urls, str(tmp_path), max_age=0)
+    again, revalidated = ingest_jobs(urls, str(tmp_path), max_age=0)
+
+    assert stats["fetched"] == revalidated["not_modified"] == len(urls)
+    assert stats["trimmed_tokens"] < stats["all_text_tokens"] < stats["html_tokens"]
+    roles = [job["role"] for job in jobs]
+    assert len(roles) == len(set(roles))
+    python = next(job for job in jobs if job["role"] == "Senior Python Developer")
+    assert len(python["sources"]) == 2 and "Celery" in python["skills"]
+    assert again == jobs
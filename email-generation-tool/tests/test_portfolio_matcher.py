@@ -0,0 +1,74 @@
+import sqlite3
+import uuid
+
+import chromadb
+import numpy as np
+import pytest
+
+from portfolio_matcher import (
+    DEMO_JOBS, HashingEmbeddingFunction, PortfolioMatcher, SkillEmbeddingCache, demo_collection
+)
+
+
+@pytest.fixture
+def embedding_function():
+    return HashingEmbeddingFunction()
+
+
+def space_collection(embedding_function, space):
+    """Two portfolio entries in a collection using the given distance space"""
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"portfolio-{space}-{uuid.uuid4().hex}", embedding_function=None,
+                                          metadata={"hnsw:space": space})
+    names = ["Python", "Rust"]
+    collection.add(ids=["1", "2"], documents=names,
+                   embeddings=[np.asarray(v).tolist() for v in embedding_function(names)],
+                   metadatas=[{"links": "https://example.com/python"}, {"links": "https://example.com/rust"}])
+    return collection
+
+
+@pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+def test_exact_skill_match_scores_near_one_in_every_space(embedding_function, space):
+    matcher = PortfolioMatcher(space_collection(embedding_function, space), embedding_function, n_results=1)
+
+    [[best]] = matcher.match([{"skills": ["Python"]}], top_k=1)
+
+    assert best["name"] == "Python"
+    assert best["score"] == pytest.approx(1.0, abs=1e-3)
+
+
+def test_entries_matched_by_more_skills_rank_higher(embedding_function):
+    matcher = PortfolioMatcher(demo_collection(embedding_function), embedding_function, n_results=3)
+
+    matches = matcher.match(DEMO_JOBS, top_k=3)
+
+    assert len(matches) == len(DEMO_JOBS)
+    assert matches[1][0]["name"] in ("TypeScript", "JavaScript")
+    assert all(a["score"] >= b["score"] for ranked in matches for a, b in zip(ranked, ranked[1:]))
+    assert matcher.stats["queries"] == 1
+
+
+def test_skill_cache_persists_between_instances(tmp_path, embedding_function):
+    path = str(tmp_path / "skills.sqlite")
+    first = SkillEmbeddingCache(path, "model")
+    first.put_many({"python": embedding_function(["python"])[0]})
+
+    second = SkillEmbeddingCache(path, "model")
+    found = second.get_many(["python", "go"])
+
+    assert list(found) == ["python"]
+    assert second.stats()["hits"] == 1 and second.stats()["misses"] == 1
+    assert SkillEmbeddingCache(path, "other-model").get_many(["python"]) == {}
+
+
+def test_skill_cache_reads_more_keys_than_sqlite_binds_at_once(tmp_path):
+    path = str(tmp_path / "skills.sqlite")
+    skills = [f"skill {i}" for i in range(2500)]
+    SkillEmbeddingCache(path, "model").put_many({skill: np.full(4, i, dtype=np.float32) for i, skill in enumerate(skills)})
+
+    cache = SkillEmbeddingCache(path, "model")
+    cache._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    found = cache.get_many(skills)
+
+    assert len(found) == len(skills)
+    assert found["skill 2499"][0] == 2499
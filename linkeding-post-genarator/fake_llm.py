@@ -0,0 +1,159 @@
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeRateLimitError(Exception):
+    """Stands in for a provider 429 so retry paths can be exercised offline"""
+
+    status_code = 429
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatGroq with realistic latency.
+
+    Answers the prompts used in this project with plausible output:
+    metadata JSON (or a JSON array for packed prompts) for extraction,
+    recommendation JSON, a short post for generation prompts and job
+    JSON for careers pages. failure_rate injects 429s and a latency
+    above request_timeout raises TimeoutError once the timeout has
+    passed. Streaming emits a word at a time, the first after
+    first_token_share of latency_seconds and the rest spread over the
+    remainder.
+    """
+
+    latency_seconds: float = 0.2
+    failure_rate: float = 0.0
+    first_token_share: float = 0.25
+    request_timeout: Optional[float] = None
+    temperature: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _times_out(self) -> bool:
+        return bool(self.request_timeout) and self.latency_seconds > self.request_timeout
+
+    def _complete(self, prompt: str):
+        self.calls += 1
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise FakeRateLimitError("Rate limit reached (fake)")
+
+        content = fake_completion(prompt)
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        usage = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return content, usage
+
+    def _respond(self, prompt: str) -> ChatResult:
+        content, usage = self._complete(prompt)
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream_plan(self, messages: List[BaseMessage]):
+        """Chunks to emit with the delay before each, plus the usage for the final chunk"""
+        content, usage = self._complete(_prompt_text(messages))
+        pieces = re.findall(r"\S+\s*", content) or [content]
+        first = self.latency_seconds * self.first_token_share
+        rest = (self.latency_seconds - first) / max(len(pieces) - 1, 1)
+        return [(first if i == 0 else rest, piece) for i, piece in enumerate(pieces)], usage
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self._times_out():
+            time.sleep(self.request_timeout)
+            raise TimeoutError("Request timed out (fake)")
+        time.sleep(self.latency_seconds)
+        return self._respond(_prompt_text(messages))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self._times_out():
+            await asyncio.sleep(self.request_timeout)
+            raise TimeoutError("Request timed out (fake)")
+        await asyncio.sleep(self.latency_seconds)
+        return self._respond(_prompt_text(messages))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        plan, usage = self._stream_plan(messages)
+        for delay, piece in plan:
+            time.sleep(delay)
+            if run_manager:
+                run_manager.on_llm_new_token(piece)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        plan, usage = self._stream_plan(messages)
+        for delay, piece in plan:
+            await asyncio.sleep(delay)
+            if run_manager:
+                await run_manager.on_llm_new_token(piece)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(message.content) for message in messages)
+
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+
+def _extraction(post: str) -> dict:
+    sentences = _sentences(post) or [post]
+    return {
+        "line_count": len([line for line in post.splitlines() if line.strip()]) or 1,
+        "problem": sentences[0][:200],
+        "solution": (sentences[1] if len(sentences) > 1 else sentences[0])[:200],
+    }
+
+
+def fake_completion(prompt: str) -> str:
+    """Deterministic answer shaped like what the real model returns for each prompt"""
+    if "<post index=" in prompt:
+        # Packed extraction prompt: one object per post, keyed by its index
+        posts = re.findall(r'<post index="(\d+)">\s*(.*?)\s*</post>', prompt, flags=re.S)
+        return json.dumps([{"index": int(index), **_extraction(text)} for index, text in posts])
+    if "careers page" in prompt:
+        # Job extraction (email-generation-tool): "<role>\nExperience: ...\nSkills: a, b" blocks
+        page = prompt.split("careers page:", 1)[-1]
+        jobs = re.findall(r"([^\n]+)\n\s*Experience:\s*([^\n]+)\n\s*Skills:\s*([^\n]+)", page)
+        return json.dumps([
+            {"role": role.strip(), "experience": experience.strip(),
+             "skills": [skill.strip() for skill in skills.split(",") if skill.strip()]}
+            for role, experience, skills in jobs
+        ])
+    if "line_count" in prompt:
+        post = prompt.split("perform that task:", 1)[-1].strip()
+        return json.dumps(_extraction(post))
+    if "frontend_recommendations" in prompt:
+        return json.dumps({
+            "frontend_recommendations": ["React", "Tailwind CSS"],
+            "backend_recommendations": ["FastAPI", "Node.js"],
+            "database_recommendations": ["PostgreSQL"],
+            "architecture_recommendations": ["REST API", "MVC"],
+        })
+    name = re.search(r"name:\s*\n\s*(\S[^\n]*)", prompt)
+    title = name.group(1).strip() if name else "our latest project"
+    return (
+        f"Excited to present {title}! We set out to tackle a real problem and built a focused "
+        f"solution for it. Proud of the team and what we learned along the way. #buildinpublic"
+    )
@@ -1,25 +1,28 @@
-from llm_helper import llm
+import functools
+
+from llm_helper import get_llm
 from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
 from langchain_core.exceptions import OutputParserException
+from rate_limit import estimate_tokens
 
-def generate_linkedin_post(name, problem, solution, tech_stack):
-    prompt = f"""
+POST_TEMPLATE = """
         You are an AI assistant that creates engaging, professional, and impactful LinkedIn posts for tech project showcases.
 
         Create a LinkedIn post based on the following inputs:
-        
+
         name:
         {name}
-        
+
         Problem:
         {problem}
-        
+
         Solution:
         {solution}
 
         Tech Stack:
-        {', '.join(tech_stack)}
-        
+        {tech_stack}
+
         Post Requirements:
         - when name give you add that also
         - Start with a strong intro (e.g., "Introducing", "We're proud to launch", "Excited to present")
@@ -30,23 +33,79 @@ def generate_linkedin_post(name, problem, solution, tech_stack):
 
         Now write the LinkedIn post:
     """
-    
-    pt = PromptTemplate.from_template(prompt)
-    chain = pt | llm
 
+# Compiled once; every post reuses the same template and chain
+post_prompt = PromptTemplate.from_template(POST_TEMPLATE)
+
+
+@functools.lru_cache(maxsize=None)
+def get_message_chain(rate_limited=True):
+    """Prompt and model, answering with the message (and its token usage); rate_limited as in get_llm"""
+    return post_prompt | get_llm(rate_limited=rate_limited)
+
+
+@functools.lru_cache(maxsize=None)
+def get_post_chain(rate_limited=True):
+    return get_message_chain(rate_limited) | StrOutputParser()
+
+
+def format_tech_stack(tech_stack):
+    """Technologies as one comma separated line, from a list or a {category: [...]} dict"""
+    if isinstance(tech_stack, dict):
+        tech_stack = [tech for techs in tech_stack.values() for tech in techs]
+    return ', '.join(tech_stack or [])
+
+
+def post_inputs(name, problem, solution, tech_stack):
+    return {
+        'name': name or "",
+        'problem': problem or "",
+        'solution': solution or "",
+        'tech_stack': format_tech_stack(tech_stack),
+    }
+
+
+def generate_linkedin_post(name, problem, solution, tech_stack):
     try:
-        result = chain.invoke({})
-        # If expecting JSON output, parse accordingly
-        if isinstance(result, dict) and "post" in result:
-            return result["post"]
-        elif isinstance(result, str):
-            return result.strip()
-        else:
-            return str(result)
+        return get_post_chain().invoke(post_inputs(name, problem, solution, tech_stack)).strip()
     except OutputParserException as e:
         return f"Error generating post: {e}"
-    
-    
+
+
+async def generate_linkedin_post_async(name, problem, solution, tech_stack, limiter=None):
+    inputs = post_inputs(name, problem, solution, tech_stack)
+    if not limiter:
+        post = await get_post_chain().ainvoke(inputs)
+        return post.strip()
+
+    estimated = estimate_tokens(post_prompt.format(**inputs))
+    await limiter.acquire(estimated)
+    message = await get_message_chain(rate_limited=False).ainvoke(inputs)
+    tokens = getattr(message, "usage_metadata", None) or {}
+    limiter.report_usage(estimated, tokens.get("total_tokens"))
+    return message.content.strip()
+
+
+async def stream_linkedin_post(name, problem, solution, tech_stack, limiter=None):
+    """Yield the post as the model produces it, piece by piece"""
+    inputs = post_inputs(name, problem, solution, tech_stack)
+    if not limiter:
+        async for piece in get_post_chain().astream(inputs):
+            yield piece
+        return
+
+    estimated = estimate_tokens(post_prompt.format(**inputs))
+    await limiter.acquire(estimated)
+    total_tokens = None
+    async for chunk in get_message_chain(rate_limited=False).astream(inputs):
+        tokens = getattr(chunk, "usage_metadata", None) or {}
+        if "total_tokens" in tokens:
+            total_tokens = (total_tokens or 0) + tokens["total_tokens"]
+        if chunk.content:
+            yield chunk.content
+    limiter.report_usage(estimated, total_tokens)
+
+
 if __name__ == "__main__":
     name = "musicia"
     problem = "Music event organizers in Sri Lanka struggle with scattered communication and low visibility"
@@ -56,7 +115,6 @@ if __name__ == "__main__":
         "back_end": ["PHP", "MVC Architecture"],
         "database": ["MySQL"]
     }
-    
+
     post = generate_linkedin_post(name, problem, solution, tech_stack)
     print(post)
-
@@ -0,0 +1,177 @@
+"""
+Generate LinkedIn posts for many projects at once.
+
+Project specs (name, problem, solution, tech_stack) are read from a JSON
+array or JSONL file, posts are generated by a pool of workers and each one
+is appended to the output JSONL as soon as it is ready. --stream instead
+prints every post token by token as the model writes it, one project at a
+time, for interactive use.
+
+Usage:
+    python generate_from_json.py data/projects.json data/generated_posts.jsonl --workers 8
+    python generate_from_json.py data/projects.jsonl --stream
+    LLM_PROVIDER=fake python generate_from_json.py data/processed_posts.json --workers 16
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+import time
+
+from genarator import generate_linkedin_post_async, stream_linkedin_post
+from llm_helper import get_metrics
+from pipeline import iter_posts
+from rate_limit import RateLimiter, retry_with_backoff
+
+
+def spec_args(spec):
+    if not isinstance(spec, dict):
+        raise ValueError(f"project spec must be a JSON object, got {type(spec).__name__}")
+    return spec.get('name'), spec.get('problem'), spec.get('solution'), spec.get('tech_stack')
+
+
+def latency_stats(latencies, prefix):
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    return {
+        f"{prefix}_mean": round(sum(ordered) / len(ordered), 3),
+        f"{prefix}_p50": round(ordered[len(ordered) // 2], 3),
+        f"{prefix}_max": round(ordered[-1], 3),
+    }
+
+
+async def generate_posts(input_path, output_path="data/generated_posts.jsonl", workers=4,
+                         requests_per_minute=30, tokens_per_minute=30000, max_retries=5):
+    """
+    Generate a post for every spec with `workers` requests in flight.
+
+    Records are written in completion order with the spec's input index.
+    Returns counts, elapsed seconds, posts per second and per-post latency.
+    """
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    stats = {"specs": 0, "succeeded": 0, "failed": 0, "retries": 0}
+    latencies = []
+    # Bounded so large inputs are read no faster than they are generated
+    pending = asyncio.Queue(maxsize=workers * 2)
+
+    def on_retry(attempt, error, delay):
+        stats["retries"] += 1
+        print(f"Retrying (attempt {attempt}) in {delay:.1f}s after: {error}")
+
+    started = time.perf_counter()
+    with open(output_path, "w", encoding='utf-8') as output:
+        async def worker():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                index, spec = item
+                began = time.perf_counter()
+                try:
+                    post = await retry_with_backoff(
+                        functools.partial(generate_linkedin_post_async, *spec_args(spec), limiter),
+                        max_retries=max_retries,
+                        on_retry=on_retry
+                    )
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"Error generating post {index}: {str(e)}")
+                    continue
+                latencies.append(time.perf_counter() - began)
+                output.write(json.dumps(spec | {"index": index, "post": post}, ensure_ascii=False) + "\n")
+                output.flush()
+                stats["succeeded"] += 1
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            for index, spec in enumerate(iter_posts(input_path)):
+                stats["specs"] += 1
+                await pending.put((index, spec))
+        finally:
+            for _ in tasks:
+                await pending.put(None)
+            await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["posts_per_sec"] = round(stats["succeeded"] / elapsed, 2) if elapsed else 0.0
+    stats.update(latency_stats(latencies, "latency"))
+    return stats
+
+
+async def stream_posts(input_path, output_path=None, requests_per_minute=30, tokens_per_minute=30000):
+    """
+    Print each post to stdout as it is generated, one spec after another.
+
+    A spec that is not a JSON object or whose generation fails is counted as
+    failed and, with output_path, written as an {"index", "error", "spec"} record.
+    Returns counts with time to first token and full completion time per post.
+    """
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    stats = {"specs": 0, "succeeded": 0, "failed": 0}
+    first_tokens, totals = [], []
+    output = open(output_path, "w", encoding='utf-8') if output_path else None
+    try:
+        for index, spec in enumerate(iter_posts(input_path)):
+            stats["specs"] += 1
+            pieces = []
+            began = time.perf_counter()
+            try:
+                args = spec_args(spec)
+                print(f"\n--- {args[0] or f'project {index}'} ---")
+                async for piece in stream_linkedin_post(*args, limiter):
+                    if not pieces:
+                        first_tokens.append(time.perf_counter() - began)
+                    pieces.append(piece)
+                    sys.stdout.write(piece)
+                    sys.stdout.flush()
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"\nError generating post {index}: {str(e)}")
+                if output:
+                    output.write(json.dumps({"index": index, "error": str(e), "spec": spec},
+                                            ensure_ascii=False) + "\n")
+                    output.flush()
+                continue
+            totals.append(time.perf_counter() - began)
+            print()
+            stats["succeeded"] += 1
+            if output:
+                output.write(json.dumps(spec | {"index": index, "post": "".join(pieces).strip()},
+                                        ensure_ascii=False) + "\n")
+                output.flush()
+    finally:
+        if output:
+            output.close()
+
+    stats.update(latency_stats(first_tokens, "first_token_seconds"))
+    stats.update(latency_stats(totals, "total_seconds"))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate LinkedIn posts for a batch of projects")
+    parser.add_argument("input_path", help="JSON array or JSONL of {name, problem, solution, tech_stack}")
+    parser.add_argument("output_path", nargs="?", help="JSONL output (default: data/generated_posts.jsonl; "
+                                                       "none with --stream)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("LLM_CONCURRENCY", "4")))
+    parser.add_argument("--stream", action="store_true", help="Print each post token by token as it is written")
+    parser.add_argument("--rpm", type=int, default=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30")),
+                        help="Requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=int(os.getenv("LLM_TOKENS_PER_MINUTE", "30000")),
+                        help="Tokens per minute (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.stream:
+        stats = asyncio.run(stream_posts(args.input_path, args.output_path, args.rpm, args.tpm))
+    else:
+        stats = asyncio.run(generate_posts(
+            args.input_path, args.output_path or "data/generated_posts.jsonl",
+            args.workers, args.rpm, args.tpm, args.max_retries
+        ))
+    print(json.dumps(stats, indent=2))
+    print(f"LLM calls: {json.dumps(get_metrics().snapshot())}")
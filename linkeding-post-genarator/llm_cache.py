@@ -0,0 +1,159 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import HumanMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+# on: read and write, refresh: always call the model and overwrite, off: no caching
+CACHE_MODES = ("on", "refresh", "off")
+
+
+def _dump_generations(generations):
+    items = []
+    for generation in generations:
+        if isinstance(generation, ChatGeneration):
+            items.append({"message": message_to_dict(generation.message),
+                          "generation_info": generation.generation_info})
+        else:
+            items.append({"text": generation.text, "generation_info": generation.generation_info})
+    return json.dumps(items, ensure_ascii=False)
+
+
+def _load_generations(payload):
+    generations = []
+    for item in json.loads(payload):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=item["generation_info"]))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item["generation_info"]))
+    return generations
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Disk-backed LangChain cache for LLM responses.
+
+    Entries are keyed by sha256 of the model's llm_string (model name,
+    temperature and other parameters) and the fully rendered prompt. Entries
+    older than ttl_seconds are ignored and deleted; beyond max_entries the
+    least recently used are evicted. mode="refresh" skips lookups but still
+    stores fresh responses.
+    """
+
+    def __init__(self, path="llm_cache.sqlite", ttl_seconds=30 * 24 * 3600, max_entries=10000, mode="on"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"mode must be one of {', '.join(CACHE_MODES)}")
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, llm_string TEXT, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_accessed ON llm_cache (last_accessed)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def contains(self, prompt, llm_string):
+        """Whether lookup() would hit, without touching stats or recency"""
+        if self.mode != "on":
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM llm_cache WHERE key = ?", (self.key(prompt, llm_string),)
+            ).fetchone()
+        return row is not None and not (self.ttl_seconds and time.time() - row[0] > self.ttl_seconds)
+
+    def lookup(self, prompt, llm_string):
+        if self.mode != "on":
+            return None
+        key = self.key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return _load_generations(row[0])
+
+    def update(self, prompt, llm_string, return_val):
+        if self.mode == "off":
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_string, response, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.key(prompt, llm_string), llm_string, _dump_generations(return_val), now, now)
+            )
+            self.writes += 1
+            if self.max_entries:
+                evicted = self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_accessed "
+                    "LIMIT MAX(0, (SELECT COUNT(*) FROM llm_cache) - ?))",
+                    (self.max_entries,)
+                ).rowcount
+                self.evictions += max(evicted, 0)
+            self._conn.commit()
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def is_cached(llm, text):
+    """
+    Whether invoking llm with the plain-text prompt would be answered from its cache.
+
+    Lets callers skip rate limiting for responses that cost no API call.
+    Mirrors how chat models key the cache (serialized messages + llm string)
+    and answers False whenever that cannot be determined.
+    """
+    cache = getattr(llm, "cache", None)
+    if not isinstance(cache, SQLiteLLMCache):
+        return False
+    try:
+        return cache.contains(dumps([HumanMessage(content=text)]), llm._get_llm_string())
+    except Exception:
+        return False
@@ -1,7 +1,197 @@
+"""
+One shared, lazily built chat model for every tool in the repo.
+
+get_llm() constructs the model on first use, so importing this module is
+cheap. All models share a pooled HTTP client, per-call timeouts, the
+response cache, an adaptive rate limiter and LLMMetrics, which collects
+per-call latency and token counts (get_metrics().snapshot()).
+
+Configuration (environment or .env):
+    LLM_PROVIDER          groq (default), openai (any OpenAI-compatible server via LLM_BASE_URL) or fake
+    LLM_MODEL             model name, defaults per provider
+    LLM_TIMEOUT           seconds per call (default 60), LLM_CONNECT_TIMEOUT (default 10)
+    LLM_MAX_CONNECTIONS   pooled HTTP connections (default 20)
+    LLM_PROVIDER_RETRIES  retries inside the provider SDK (default 2)
+    LLM_RATE_LIMIT_RPM    adaptive requests-per-minute ceiling, 0 = off (default per provider)
+    LLM_CACHE, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES  see llm_cache.py
+"""
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 import os
+import threading
 
 load_dotenv()
 
-llm = ChatGroq(groq_api_key=os.getenv("GROQ_API_KEY"), model_name="llama3-8b-8192")
\ No newline at end of file
+# "groq" (default), "openai" or "fake" for the offline stand-in in fake_llm.py
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+
+# Response cache: LLM_CACHE=on (default), refresh (re-ask and overwrite) or off
+LLM_CACHE = os.getenv("LLM_CACHE", "on")
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_PROVIDER_RETRIES = int(os.getenv("LLM_PROVIDER_RETRIES", "2"))
+
+# Adaptive rate limit ceiling when LLM_RATE_LIMIT_RPM is not set (Groq's free tier allows 30 rpm)
+DEFAULT_RPM = {"groq": 30, "openai": 60, "fake": 0}
+
+_lock = threading.RLock()
+_models = {}
+_shared = {}
+
+
+def get_llm_cache():
+    with _lock:
+        if "cache" not in _shared:
+            _shared["cache"] = None
+            if LLM_CACHE != "off":
+                from llm_cache import SQLiteLLMCache
+
+                _shared["cache"] = SQLiteLLMCache(
+                    path=os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite"),
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600))),
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+                    mode=LLM_CACHE,
+                )
+        return _shared["cache"]
+
+
+def set_llm_cache_mode(mode):
+    """
+    Override LLM_CACHE for this process: "on", "refresh" or "off".
+
+    Turns the cache on even when LLM_CACHE=off, as long as no model has
+    been built yet (models keep the cache they were built with). Returns
+    the cache, or None when it is off.
+    """
+    global LLM_CACHE
+    with _lock:
+        cache = _shared.get("cache")
+        if cache is not None:
+            cache.mode = mode
+            return cache
+        if _models and mode != "off":
+            print(f"LLM cache mode {mode!r} ignored: models were already built without a cache")
+            return None
+        LLM_CACHE = mode
+        _shared.pop("cache", None)
+    return get_llm_cache()
+
+
+def get_http_clients():
+    """
+    Pooled (sync, async) httpx clients shared by every provider.
+
+    The async client belongs to the event loop that first uses it, which is
+    fine for scripts that make a single asyncio.run() call.
+    """
+    with _lock:
+        if "http" not in _shared:
+            import httpx
+
+            limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+            timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+            _shared["http"] = (httpx.Client(limits=limits, timeout=timeout),
+                               httpx.AsyncClient(limits=limits, timeout=timeout))
+        return _shared["http"]
+
+
+def get_metrics(provider=None):
+    """Metrics callback for provider, carrying its adaptive rate limiter (if any)"""
+    provider = provider or LLM_PROVIDER
+    with _lock:
+        key = ("metrics", provider)
+        if key not in _shared:
+            from llm_metrics import LLMMetrics
+            from rate_limit import AdaptiveRateLimiter
+
+            rpm = float(os.getenv("LLM_RATE_LIMIT_RPM", DEFAULT_RPM.get(provider, 0)))
+            _shared[key] = LLMMetrics(AdaptiveRateLimiter(rpm) if rpm else None)
+        return _shared[key]
+
+
+def _groq(model, **options):
+    from langchain_groq import ChatGroq
+
+    http_client, http_async_client = get_http_clients()
+    return ChatGroq(
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        model_name=model or "llama3-8b-8192",
+        request_timeout=LLM_TIMEOUT,
+        max_retries=LLM_PROVIDER_RETRIES,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        **options
+    )
+
+
+def _openai(model, **options):
+    from langchain_openai import ChatOpenAI
+
+    http_client, http_async_client = get_http_clients()
+    base_url = os.getenv("LLM_BASE_URL") or None
+    return ChatOpenAI(
+        # Local OpenAI-compatible servers usually ignore the key but the client requires one
+        api_key=os.getenv("OPENAI_API_KEY") or ("not-needed" if base_url else None),
+        base_url=base_url,
+        model=model or "gpt-4o-mini",
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_PROVIDER_RETRIES,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        **options
+    )
+
+
+def _fake(model, **options):
+    from fake_llm import FakeChatModel
+
+    return FakeChatModel(
+        latency_seconds=float(os.getenv("FAKE_LLM_LATENCY", "0.2")),
+        failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+        request_timeout=LLM_TIMEOUT,
+        **options
+    )
+
+
+# name -> factory(model, **options) returning a LangChain chat model
+PROVIDERS = {"groq": _groq, "openai": _openai, "fake": _fake}
+
+
+def register_provider(name, factory):
+    PROVIDERS[name] = factory
+
+
+def get_llm(provider=None, rate_limited=True, **options):
+    """
+    The shared chat model for provider (default LLM_PROVIDER), built on first use.
+
+    options such as temperature=0 go to the model; each distinct set gets
+    its own instance, sharing the HTTP pool, cache, metrics and rate limiter.
+    rate_limited=False leaves out the adaptive rate limiter, for callers
+    that already pace their requests with a RateLimiter.
+    """
+    provider = provider or LLM_PROVIDER
+    key = (provider, rate_limited, tuple(sorted(options.items())))
+    with _lock:
+        if key not in _models:
+            if provider not in PROVIDERS:
+                raise ValueError(f"Unknown LLM provider {provider!r}, expected one of {', '.join(PROVIDERS)}")
+            metrics = get_metrics(provider)
+            _models[key] = PROVIDERS[provider](
+                os.getenv("LLM_MODEL"),
+                cache=get_llm_cache(),
+                rate_limiter=metrics.limiter if rate_limited else None,
+                callbacks=[metrics],
+                **options
+            )
+        return _models[key]
+
+
+def __getattr__(name):
+    # `from llm_helper import llm` still works; the model is built when first imported that way
+    if name == "llm":
+        return get_llm()
+    if name == "llm_cache":
+        return get_llm_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
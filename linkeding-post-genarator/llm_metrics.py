@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import deque
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from rate_limit import is_rate_limit
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LLMMetrics(BaseCallbackHandler):
+    """
+    Per-call latency and token counts for every model that has it as a callback.
+
+    Latency runs from the call to its answer, including any wait for the
+    rate limiter. Cache hits (LangChain zeroes their total_cost) are
+    counted separately and left out of latency and token totals.
+    Rate-limit errors and successes are forwarded to an
+    AdaptiveRateLimiter when one is given.
+    """
+
+    # Counters only, so run on the caller's thread instead of an executor
+    run_inline = True
+
+    def __init__(self, limiter=None, window=1000):
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._started = {}
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.cached = 0
+        self.errors = 0
+        self.throttled = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def _start(self, run_id):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            if usage.get("total_cost") == 0:
+                self.cached += 1
+                return
+            self.calls += 1
+            if started is not None:
+                self._latencies.append(time.perf_counter() - started)
+            self.input_tokens += usage.get("input_tokens", 0)
+            self.output_tokens += usage.get("output_tokens", 0)
+        if self.limiter:
+            self.limiter.succeeded()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        throttled = is_rate_limit(error)
+        with self._lock:
+            self._started.pop(run_id, None)
+            self.errors += 1
+            self.throttled += throttled
+        if throttled and self.limiter:
+            self.limiter.throttled()
+
+    def snapshot(self):
+        with self._lock:
+            ordered = sorted(self._latencies)
+            stats = {
+                "calls": self.calls,
+                "cached": self.cached,
+                "errors": self.errors,
+                "throttled": self.throttled,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+            }
+        if ordered:
+            stats["latency_p50"] = round(_percentile(ordered, 0.5), 3)
+            stats["latency_p95"] = round(_percentile(ordered, 0.95), 3)
+            stats["latency_max"] = round(ordered[-1], 3)
+        if self.limiter:
+            stats["rpm"] = round(self.limiter.rpm, 1)
+        return stats
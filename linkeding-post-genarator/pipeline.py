@@ -0,0 +1,307 @@
+"""
+Resumable streaming stage: raw posts (JSON array or JSONL) -> enriched JSONL.
+
+Posts are read incrementally, enriched with extract_pack_async (one post
+per request, or several with --pack-tokens) and appended to the output as they finish, so memory stays flat for any input
+size. A checkpoint index of finished content hashes makes reruns skip work
+already done; posts that still fail after retries go to a dead-letter file
+and are retried on the next run. Malformed input (unparsable JSONL lines,
+records that are not objects or have no text) is dead-lettered as well.
+
+Usage:
+    python pipeline.py data/raw_posts.json data/processed_posts.jsonl --concurrency 8
+    python pipeline.py data/raw_posts.json data/processed_posts.jsonl --pack-tokens 3000
+    python pipeline.py data/raw_posts.json data/processed_posts.jsonl --export-json data/processed_posts.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from preprocess import MAX_POSTS_PER_PACK, content_hash, extract_pack_async, new_usage, pack_posts, usage_report
+from rate_limit import RateLimiter
+
+READ_BLOCK_SIZE = 1 << 16
+
+
+def report_bad_line(line_number, line, error):
+    print(f"Skipping line {line_number}: {error}")
+
+
+def iter_posts(path, on_bad_line=report_bad_line):
+    """
+    Yield posts one at a time from a JSON array or a JSONL file.
+
+    JSONL lines that do not parse are passed to on_bad_line(line_number,
+    line, error) and skipped, so one corrupt line does not end the run.
+    """
+    with open(path, encoding='utf-8') as file:
+        head = file.read(READ_BLOCK_SIZE).lstrip("\ufeff").lstrip()
+        if head.startswith("["):
+            yield from _iter_json_array(file, head[1:])
+            return
+
+    with open(path, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                post = json.loads(line)
+            except json.JSONDecodeError as e:
+                on_bad_line(line_number, line, e)
+                continue
+            yield post
+
+
+def _iter_json_array(file, buffer):
+    decoder = json.JSONDecoder()
+    position = 0
+    while True:
+        # Skip whitespace and the separating comma without copying the buffer
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if buffer.startswith("]", position):
+            return
+        try:
+            post, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            block = file.read(READ_BLOCK_SIZE)
+            if not block:
+                raise ValueError("Unexpected end of JSON array")
+            # Only the unread tail is kept when the buffer is refilled
+            buffer = buffer[position:] + block
+            position = 0
+            continue
+        yield post
+
+
+def validate_post(post):
+    """Why post cannot be enriched, or None if it can"""
+    if not isinstance(post, dict):
+        return f"expected an object, got {type(post).__name__}"
+    if not isinstance(post.get('text'), str) or not post['text'].strip():
+        return "missing or empty 'text'"
+    return None
+
+
+class Checkpoint:
+    """
+    Index of content hashes already present in the output JSONL.
+
+    The output file is the source of truth: the index also stores how many
+    output bytes it covers, and sync() indexes anything written after that
+    (e.g. just before a crash) and drops a trailing partial line.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._conn = sqlite3.connect(f"{output_path}.checkpoint.sqlite")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS done (hash TEXT PRIMARY KEY)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._conn.commit()
+
+    @property
+    def offset(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'offset'").fetchone()
+        return row[0] if row else 0
+
+    def sync(self):
+        """Bring the index up to date with the output file; returns records indexed"""
+        if not os.path.exists(self.output_path):
+            self._set_offset(0)
+            self._conn.commit()
+            return 0
+
+        size = os.path.getsize(self.output_path)
+        offset = self.offset if self.offset <= size else 0
+        indexed = 0
+        with open(self.output_path, "rb+") as file:
+            file.seek(offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # Interrupted mid-write: drop the partial record
+                    file.truncate(offset)
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    file.truncate(offset)
+                    break
+                self._conn.execute("INSERT OR IGNORE INTO done (hash) VALUES (?)", (record['content_hash'],))
+                offset += len(line)
+                indexed += 1
+        self._set_offset(offset)
+        self._conn.commit()
+        return indexed
+
+    def is_done(self, digest):
+        return self._conn.execute("SELECT 1 FROM done WHERE hash = ?", (digest,)).fetchone() is not None
+
+    def mark_done(self, digest, offset):
+        self._conn.execute("INSERT OR IGNORE INTO done (hash) VALUES (?)", (digest,))
+        self._set_offset(offset)
+        self._conn.commit()
+
+    def _set_offset(self, offset):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('offset', ?)", (offset,))
+
+    def close(self):
+        self._conn.close()
+
+
+def peak_rss_mb():
+    """Peak resident set size in MB, or None where the resource module is missing (Windows)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_pipeline(input_path, output_path, dead_letter_path=None, concurrency=8,
+                       requests_per_minute=30, tokens_per_minute=30000, max_retries=5,
+                       pack_tokens=0, pack_size=MAX_POSTS_PER_PACK):
+    """
+    Enrich every post not yet in output_path, appending results as they finish.
+
+    Returns counts of read, skipped, succeeded, failed and invalid posts,
+    plus retries, elapsed seconds, posts per second, peak RSS and the API call
+    and token usage report.
+    """
+    dead_letter_path = dead_letter_path or f"{output_path}.dead.jsonl"
+    checkpoint = Checkpoint(output_path)
+    recovered = checkpoint.sync()
+    if recovered:
+        print(f"Indexed {recovered} records written after the last checkpoint")
+
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    stats = {"read": 0, "skipped": 0, "succeeded": 0, "failed": 0, "invalid": 0, "retries": 0}
+    usage = new_usage()
+    # Bounded so the reader never runs far ahead of the workers
+    pending = asyncio.Queue(maxsize=concurrency * 2)
+    in_flight = set()
+
+    def on_retry(attempt, error, delay):
+        stats["retries"] += 1
+        print(f"Retrying (attempt {attempt}) in {delay:.1f}s after: {error}")
+
+    started = time.perf_counter()
+    with open(output_path, "ab") as output, open(dead_letter_path, "a", encoding='utf-8') as dead:
+        def dead_letter(digest, post, error, counter="failed"):
+            stats[counter] += 1
+            dead.write(json.dumps({"content_hash": digest, "error": str(error), "post": post},
+                                  ensure_ascii=False) + "\n")
+            dead.flush()
+
+        def bad_line(line_number, line, error):
+            dead_letter(None, line, f"line {line_number}: {error}", "invalid")
+
+        async def worker():
+            while True:
+                pack = await pending.get()
+                if pack is None:
+                    return
+                try:
+                    try:
+                        outcomes = await extract_pack_async(
+                            [post['text'] for _, post in pack], limiter, max_retries, on_retry, usage
+                        )
+                    except Exception as e:
+                        # Keep the worker alive; a dead worker would leave the reader blocked on the queue
+                        outcomes = [e] * len(pack)
+                    for (digest, post), metadata in zip(pack, outcomes):
+                        if isinstance(metadata, Exception):
+                            dead_letter(digest, post, metadata)
+                            continue
+                        try:
+                            record = post | metadata | {"content_hash": digest}
+                            line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+                        except Exception as e:
+                            dead_letter(digest, post, e)
+                            continue
+                        output.write(line)
+                        output.flush()
+                        checkpoint.mark_done(digest, output.tell())
+                        stats["succeeded"] += 1
+                finally:
+                    for digest, _ in pack:
+                        in_flight.discard(digest)
+
+        def fresh_posts():
+            for post in iter_posts(input_path, bad_line):
+                stats["read"] += 1
+                error = validate_post(post)
+                if error:
+                    dead_letter(None, post, error, "invalid")
+                    continue
+                digest = content_hash(post)
+                if digest in in_flight or checkpoint.is_done(digest):
+                    stats["skipped"] += 1
+                    continue
+                in_flight.add(digest)
+                yield digest, post
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for pack in pack_posts(fresh_posts(), pack_tokens, pack_size):
+                await pending.put(pack)
+        finally:
+            for _ in workers:
+                await pending.put(None)
+            await asyncio.gather(*workers)
+            checkpoint.close()
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["posts_per_sec"] = round(stats["succeeded"] / elapsed, 2) if elapsed else 0.0
+    peak = peak_rss_mb()
+    stats["peak_rss_mb"] = round(peak, 1) if peak is not None else None
+    stats["usage"] = usage_report(usage)
+    return stats
+
+
+def export_json(jsonl_path, json_path):
+    """Write the JSONL output as the JSON array other scripts expect, one record at a time"""
+    with open(jsonl_path, encoding='utf-8') as source, open(json_path, "w", encoding='utf-8') as target:
+        target.write("[\n")
+        first = True
+        for line in source:
+            if not line.strip():
+                continue
+            target.write(("" if first else ",\n") + line.rstrip("\n"))
+            first = False
+        target.write("\n]\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumable streaming metadata extraction for LinkedIn posts")
+    parser.add_argument("input_path", nargs="?", default="data/raw_posts.json")
+    parser.add_argument("output_path", nargs="?", default="data/processed_posts.jsonl")
+    parser.add_argument("--dead-letter", help="Failed posts file (default: <output>.dead.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("LLM_CONCURRENCY", "8")))
+    parser.add_argument("--rpm", type=int, default=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30")),
+                        help="Requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=int(os.getenv("LLM_TOKENS_PER_MINUTE", "30000")),
+                        help="Tokens per minute (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--pack-tokens", type=int, default=int(os.getenv("LLM_PACK_TOKENS", "0")),
+                        help="Pack several posts into one request of up to this many estimated tokens (0 = off)")
+    parser.add_argument("--pack-size", type=int, default=MAX_POSTS_PER_PACK, help="Most posts per packed request")
+    parser.add_argument("--export-json", help="Also write the output as a JSON array to this path")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_pipeline(
+        args.input_path, args.output_path, args.dead_letter,
+        args.concurrency, args.rpm, args.tpm, args.max_retries, args.pack_tokens, args.pack_size
+    ))
+    print(json.dumps(stats, indent=2))
+    if args.export_json:
+        export_json(args.output_path, args.export_json)
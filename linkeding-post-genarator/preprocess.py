@@ -1,8 +1,46 @@
+import argparse
+import asyncio
+import functools
+import hashlib
 import json
+import os
+import time
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
-from llm_helper import llm
+from llm_helper import get_llm, get_llm_cache, get_metrics, set_llm_cache_mode
+from llm_cache import is_cached
+from rate_limit import RateLimiter, estimate_tokens, retry_with_backoff
+
+EXTRACT_TEMPLATE = '''
+        You are given linkedin post about software projects. You need to extract number of lines,
+        problem that solve from that software and what is the solution given from that software.
+        Need json object with 3 keys called line_count, problem and solution.
+        no preamble need
+        Here is the actual post on with you need to perform that task:
+        {post}
+    '''
+
+PACKED_EXTRACT_TEMPLATE = '''
+        You are given several linkedin posts about software projects, each one inside a <post index="N"> tag.
+        For every post you need to extract number of lines, problem that solve from that software and
+        what is the solution given from that software.
+        Need a json array with one object per post, each with 4 keys called index, line_count, problem and solution,
+        where index is the number from the post tag.
+        no preamble need
+        Here are the actual posts on with you need to perform that task:
+        {posts}
+    '''
+
+METADATA_KEYS = ("line_count", "problem", "solution")
+# Completion budget per post in a packed request, and the most posts one request may carry
+PACKED_COMPLETION_TOKENS = 120
+MAX_POSTS_PER_PACK = 10
+
+# Built once and shared by every extraction call
+extract_prompt = PromptTemplate.from_template(EXTRACT_TEMPLATE)
+packed_extract_prompt = PromptTemplate.from_template(PACKED_EXTRACT_TEMPLATE)
+json_parser = JsonOutputParser()
 
 def process_posts(raw_file_path, process_file_path="data/processed_posts.json"):
     details_posts = []
@@ -12,6 +50,185 @@ def process_posts(raw_file_path, process_file_path="data/processed_posts.json"):
         metadata = extract_metadata(post['text'])
         post_with_metadata = post | metadata
         details_posts.append(post_with_metadata)
+    write_posts(details_posts, process_file_path)
+
+
+def write_posts(posts, process_file_path):
+    with open(process_file_path, "w", encoding='utf-8') as file:
+        json.dump(posts, file, indent=4, ensure_ascii=False)
+
+
+async def process_posts_async(raw_file_path, process_file_path="data/processed_posts.json", concurrency=8,
+                              requests_per_minute=30, tokens_per_minute=30000, max_retries=5,
+                              pack_tokens=0, pack_size=MAX_POSTS_PER_PACK):
+    """
+    Extract metadata for every post concurrently.
+
+    At most `concurrency` requests are in flight, within the requests- and
+    tokens-per-minute budget, and transient failures (rate limits, timeouts,
+    5xx) are retried with backoff. With pack_tokens set, posts are grouped
+    into packed requests of up to that many estimated tokens (see
+    pack_posts). Each result is appended to <process_file_path>.partial.jsonl
+    as soon as it completes, and posts already there are not extracted
+    again, so an interrupted run resumes. Posts that still fail are written
+    to <process_file_path>.failed.jsonl and the partial file is kept for the
+    next run; otherwise it is removed. The successful posts, in input order,
+    are written to process_file_path at the end.
+
+    Returns counts plus elapsed seconds, posts per second and the API call
+    and token usage report.
+    """
+    with open(raw_file_path, encoding='utf-8') as file:
+        posts = json.load(file)
+
+    partial_path = f"{process_file_path}.partial.jsonl"
+    failed_path = f"{process_file_path}.failed.jsonl"
+    done = load_partial(partial_path)
+
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    stats = {"posts": len(posts), "succeeded": 0, "resumed": 0, "failed": 0, "retries": 0}
+    usage = new_usage()
+    results = [None] * len(posts)
+    todo = []
+    for index, post in enumerate(posts):
+        digest = content_hash(post)
+        if digest in done:
+            results[index] = done[digest]
+            stats["resumed"] += 1
+        else:
+            todo.append((index, post))
+    pending = asyncio.Queue()
+    for pack in pack_posts(todo, pack_tokens, pack_size):
+        pending.put_nowait(pack)
+
+    def on_retry(attempt, error, delay):
+        stats["retries"] += 1
+        print(f"Retrying (attempt {attempt}) in {delay:.1f}s after: {error}")
+
+    started = time.perf_counter()
+    with open(partial_path, "a", encoding='utf-8') as partial, open(failed_path, "w", encoding='utf-8') as failed:
+        def record_failure(index, digest, post, error):
+            stats["failed"] += 1
+            print(f"Error processing post {index}: {str(error)}")
+            failed.write(json.dumps({"index": index, "content_hash": digest, "error": str(error),
+                                     "post": post}, ensure_ascii=False) + "\n")
+
+        async def worker():
+            while not pending.empty():
+                pack = pending.get_nowait()
+                try:
+                    outcomes = await extract_pack_async(
+                        [post['text'] for _, post in pack], limiter, max_retries, on_retry, usage
+                    )
+                except Exception as e:
+                    # Keep the worker alive so the rest of the queue is still processed
+                    outcomes = [e] * len(pack)
+                for (index, post), metadata in zip(pack, outcomes):
+                    digest = content_hash(post)
+                    if isinstance(metadata, Exception):
+                        record_failure(index, digest, post, metadata)
+                        continue
+                    try:
+                        merged = post | metadata
+                        line = json.dumps({"index": index, "content_hash": digest, "post": merged},
+                                          ensure_ascii=False) + "\n"
+                    except Exception as e:
+                        record_failure(index, digest, post, e)
+                        continue
+                    results[index] = merged
+                    stats["succeeded"] += 1
+                    partial.write(line)
+                partial.flush()
+                failed.flush()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    write_posts([post for post in results if post is not None], process_file_path)
+    if stats["failed"]:
+        print(f"{stats['failed']} posts failed, see {failed_path}; rerun to retry them")
+    else:
+        os.remove(partial_path)
+        os.remove(failed_path)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["posts_per_sec"] = round(stats["succeeded"] / elapsed, 2) if elapsed else 0.0
+    stats["usage"] = usage_report(usage)
+    return stats
+
+
+def content_hash(post):
+    """Identifies a post by the text the model sees"""
+    return hashlib.sha256(post.get('text', '').encode('utf-8')).hexdigest()
+
+
+def load_partial(partial_path):
+    """Posts already extracted by an earlier run, by content hash; unreadable lines are skipped"""
+    done = {}
+    if not os.path.exists(partial_path):
+        return done
+    with open(partial_path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+                done[record["content_hash"]] = record["post"]
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def pack_posts(items, token_budget, max_posts=MAX_POSTS_PER_PACK):
+    """
+    Group (key, post) pairs into lists that fit one packed extraction request.
+
+    A pack is closed once its estimated prompt plus completion tokens would
+    exceed token_budget or it holds max_posts posts; a post too large to
+    share a request goes alone. token_budget 0 yields one post per list.
+    Works on any iterable, so streaming inputs stay streaming.
+    """
+    base = estimate_tokens(PACKED_EXTRACT_TEMPLATE, completion_tokens=0)
+    pack, used = [], base
+    for item in items:
+        if not token_budget:
+            yield [item]
+            continue
+        # Post text, its <post> tag and its share of the JSON array in the answer
+        cost = estimate_tokens(item[1].get('text', ''), PACKED_COMPLETION_TOKENS) + 8
+        if pack and (used + cost > token_budget or len(pack) >= max_posts):
+            yield pack
+            pack, used = [], base
+        pack.append(item)
+        used += cost
+    if pack:
+        yield pack
+
+
+def new_usage():
+    return {"posts": 0, "api_calls": 0, "cached_calls": 0, "single_post_calls": 0, "fallback_posts": 0,
+            "input_tokens": 0, "output_tokens": 0, "single_prompt_tokens": 0}
+
+
+def usage_report(usage):
+    """
+    API calls and tokens spent, against what one request per post would have cost.
+
+    The single-post estimate counts each post's own prompt and assumes the
+    same answer tokens, so it understates the saving slightly. Responses
+    served from the LLM cache count as neither. single_post_calls is the
+    API calls that carried one post: unpacked posts and packed fallbacks.
+    """
+    spent = usage["input_tokens"] + usage["output_tokens"]
+    single_tokens = usage["single_prompt_tokens"] + usage["output_tokens"]
+    return {
+        "posts": usage["posts"],
+        "api_calls": usage["api_calls"],
+        "cached_calls": usage["cached_calls"],
+        "fallback_posts": usage["fallback_posts"],
+        "single_post_calls": usage["single_post_calls"],
+        "tokens": spent,
+        "single_post_tokens_estimate": single_tokens,
+        "tokens_saved_pct": round(100 * (1 - spent / single_tokens), 1) if single_tokens else 0.0,
+    }
 
 
 def get_all_languages(posts):
@@ -38,7 +255,7 @@ def get_all_languages(posts):
     }}'''
     
     pt = PromptTemplate.from_template(template)
-    chain = pt | llm | JsonOutputParser()
+    chain = pt | get_llm() | JsonOutputParser()
     
     try:
         return chain.invoke({'languages': list(languages)})
@@ -47,27 +264,161 @@ def get_all_languages(posts):
         return {}
 
 def extract_metadata(post):
-    template = '''
-        You are given linkedin post about software projects. You need to extract number of lines,
-        problem that solve from that software and what is the solution given from that software.
-        Need json object with 3 keys called line_count, problem and solution.
-        no preamble need
-        Here is the actual post on with you need to perform that task:
-        {post}
-    '''
-    
-    pt = PromptTemplate.from_template(template)
-    chain = pt | llm
+    chain = extract_prompt | get_llm()
     response = chain.invoke(input={'post': post})
-    
+    return parse_metadata(response.content)
+
+
+async def invoke_async(prompt, limiter=None, usage=None, completion_tokens=256, call_counter=None):
+    """
+    Send one prompt within the rate limits and return the response text, recording usage.
+
+    call_counter names an extra usage counter to increment when the prompt
+    reaches the API (not when it is answered from the cache).
+    """
+    # A limiter passed in replaces the model's own adaptive one
+    llm = get_llm(rate_limited=limiter is None)
+    estimated = estimate_tokens(prompt, completion_tokens)
+    if (limiter or usage is not None) and is_cached(llm, prompt):
+        # Answered from the response cache, no API quota used
+        limiter = None
+        if usage is not None:
+            usage["cached_calls"] += 1
+            usage = None
+    if limiter:
+        await limiter.acquire(estimated)
+    response = await llm.ainvoke(prompt)
+    tokens = getattr(response, "usage_metadata", None) or {}
+    if limiter:
+        limiter.report_usage(estimated, tokens.get("total_tokens"))
+    if usage is not None:
+        usage["api_calls"] += 1
+        if call_counter:
+            usage[call_counter] += 1
+        usage["input_tokens"] += tokens.get("input_tokens", len(prompt) // 4)
+        usage["output_tokens"] += tokens.get("output_tokens", len(response.content) // 4)
+    return response.content
+
+
+async def extract_metadata_async(post, limiter=None, usage=None):
+    return parse_metadata(await invoke_async(extract_prompt.format(post=post), limiter, usage,
+                                             call_counter="single_post_calls"))
+
+
+async def extract_metadata_packed_async(posts, limiter=None, usage=None):
+    """Metadata for several posts from one request; None for any post the answer does not cover"""
+    body = "\n".join(f'<post index="{index}">\n{post}\n</post>' for index, post in enumerate(posts))
+    content = await invoke_async(
+        packed_extract_prompt.format(posts=body), limiter, usage,
+        completion_tokens=PACKED_COMPLETION_TOKENS * len(posts)
+    )
+    return parse_packed_metadata(content, len(posts))
+
+
+async def extract_pack_async(posts, limiter=None, max_retries=5, on_retry=None, usage=None):
+    """
+    Metadata for each post, or the exception it failed with, in input order.
+
+    Several posts go out as one packed request. Entries missing or malformed
+    in its answer, or all of them if the request itself fails, are then
+    extracted one post at a time.
+    """
+    if usage is not None:
+        usage["posts"] += len(posts)
+        usage["single_prompt_tokens"] += sum(
+            estimate_tokens(extract_prompt.format(post=post), completion_tokens=0) for post in posts
+        )
+    retry = functools.partial(retry_with_backoff, max_retries=max_retries, on_retry=on_retry)
+
+    results = [None] * len(posts)
+    if len(posts) > 1:
+        try:
+            results = await retry(functools.partial(extract_metadata_packed_async, posts, limiter, usage))
+        except Exception as e:
+            print(f"Packed request for {len(posts)} posts failed, falling back to single posts: {str(e)}")
+        if usage is not None:
+            usage["fallback_posts"] += results.count(None)
+
+    for index, metadata in enumerate(results):
+        if metadata is not None:
+            continue
+        try:
+            results[index] = await retry(functools.partial(extract_metadata_async, posts[index], limiter, usage))
+        except Exception as e:
+            results[index] = e
+    return results
+
+
+def parse_metadata(content):
+    """The metadata keys of a single-post answer; raises OutputParserException if any is missing"""
     try:
-        json_parser = JsonOutputParser()
-        res = json_parser.parse(response.content)
+        res = json_parser.parse(content)
     except OutputParserException:
         raise OutputParserException("Context too big. Unable to parse jobs")
     
-    return res
+    if not isinstance(res, dict):
+        raise OutputParserException(f"Expected a JSON object, got {type(res).__name__}")
+    missing = [key for key in METADATA_KEYS if res.get(key) is None]
+    if missing:
+        raise OutputParserException(f"Missing metadata keys: {', '.join(missing)}")
+    return {key: res[key] for key in METADATA_KEYS}
+
+
+def parse_packed_metadata(content, count):
+    """
+    Validate a packed answer: one entry per index in range(count).
+
+    Entries that are missing, duplicated, out of range or lack a metadata
+    key come back as None, as does everything if the answer is not a JSON array.
+    """
+    results = [None] * count
+    try:
+        items = json_parser.parse(content)
+    except OutputParserException:
+        return results
+    if not isinstance(items, list):
+        return results
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("index"))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < count and results[index] is None and all(item.get(key) is not None for key in METADATA_KEYS):
+            results[index] = {key: item[key] for key in METADATA_KEYS}
+    return results
 
 
 if __name__  == "__main__":
-    process_posts("data/raw_posts.json", "data/processed_posts.json")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Extract line count, problem and solution from LinkedIn posts")
+    parser.add_argument("raw_file_path", nargs="?", default="data/raw_posts.json")
+    parser.add_argument("process_file_path", nargs="?", default="data/processed_posts.json")
+    parser.add_argument("--serial", action="store_true", help="One blocking request at a time")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("LLM_CONCURRENCY", "8")))
+    parser.add_argument("--rpm", type=int, default=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30")),
+                        help="Requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=int(os.getenv("LLM_TOKENS_PER_MINUTE", "30000")),
+                        help="Tokens per minute (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--pack-tokens", type=int, default=int(os.getenv("LLM_PACK_TOKENS", "0")),
+                        help="Pack several posts into one request of up to this many estimated tokens (0 = off)")
+    parser.add_argument("--pack-size", type=int, default=MAX_POSTS_PER_PACK, help="Most posts per packed request")
+    parser.add_argument("--cache", choices=["on", "refresh", "off"],
+                        help="Use (on), overwrite (refresh) or bypass (off) the LLM response cache")
+    args = parser.parse_args()
+
+    # --cache overrides LLM_CACHE, so --cache on enables the cache even when LLM_CACHE=off
+    llm_cache = set_llm_cache_mode(args.cache) if args.cache else get_llm_cache()
+
+    if args.serial:
+        process_posts(args.raw_file_path, args.process_file_path)
+    else:
+        stats = asyncio.run(process_posts_async(
+            args.raw_file_path, args.process_file_path, args.concurrency, args.rpm, args.tpm, args.max_retries,
+            args.pack_tokens, args.pack_size
+        ))
+        print(json.dumps(stats, indent=2))
+    if llm_cache is not None:
+        print(f"LLM cache: {json.dumps(llm_cache.stats())}")
+    print(f"LLM calls: {json.dumps(get_metrics().snapshot())}")
\ No newline at end of file
@@ -0,0 +1,185 @@
+import asyncio
+import random
+import threading
+import time
+
+from langchain_core.rate_limiters import BaseRateLimiter
+
+
+class TokenBucket:
+    """Refills `capacity` units per minute, continuously"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` units are available (0 if they are now)"""
+        self.refill()
+        # A single request larger than the whole budget waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+
+class RateLimiter:
+    """
+    Async requests-per-minute and tokens-per-minute budget for LLM calls.
+
+    acquire() waits until both budgets allow the call. Token counts are
+    estimated up front; report_usage() settles the difference once the
+    provider reports how many tokens the call really used.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, estimated_tokens=0):
+        async with self._lock:
+            while True:
+                wait = 0.0
+                if self.requests:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens and estimated_tokens:
+                    wait = max(wait, self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self.requests:
+                self.requests.available -= 1
+            if self.tokens:
+                self.tokens.available -= estimated_tokens
+
+    def report_usage(self, estimated_tokens, actual_tokens):
+        if self.tokens and actual_tokens is not None:
+            self.tokens.refill()
+            self.tokens.available = min(self.tokens.capacity, self.tokens.available + estimated_tokens - actual_tokens)
+
+
+class AdaptiveRateLimiter(BaseRateLimiter):
+    """
+    Request pacing for a chat model that backs off when the provider pushes back.
+
+    Calls are spaced 60 / rpm seconds apart. Every rate-limit response
+    halves rpm (down to min_rpm, a tenth of max_rpm by default) and each
+    success adds `increase` back (a twentieth of max_rpm), up to max_rpm,
+    so sustained throughput settles just under what the provider accepts.
+    Meant to be passed as a model's rate_limiter, with throttled() and
+    succeeded() driven by LLMMetrics. Callers pacing requests with their
+    own RateLimiter use get_llm(rate_limited=False) instead, so each call
+    is throttled once.
+    """
+
+    def __init__(self, max_rpm, min_rpm=None, increase=None):
+        self.max_rpm = float(max_rpm)
+        self.min_rpm = min(float(min_rpm), self.max_rpm) if min_rpm else self.max_rpm / 10
+        self.increase = increase or self.max_rpm / 20
+        self.rpm = self.max_rpm
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, blocking):
+        """Claim the next slot; returns seconds to wait for it, or None if not blocking and busy"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            if not blocking and start > now:
+                return None
+            self._next = start + 60.0 / self.rpm
+            return start - now
+
+    def acquire(self, *, blocking=True):
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking=True):
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def throttled(self):
+        with self._lock:
+            self.rpm = max(self.min_rpm, self.rpm / 2)
+            self._next = max(self._next, time.monotonic() + 60.0 / self.rpm)
+
+    def succeeded(self):
+        with self._lock:
+            self.rpm = min(self.max_rpm, self.rpm + self.increase)
+
+
+def estimate_tokens(text, completion_tokens=256):
+    """Rough prompt + completion token count (about four characters per token)"""
+    return len(text) // 4 + completion_tokens
+
+
+TRANSIENT_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+def is_transient(error):
+    """Rate limits, timeouts, connection drops and 5xx responses are worth retrying"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+    name = type(error).__name__
+    return any(marker in name for marker in ("RateLimit", "Timeout", "Connection", "Overloaded"))
+
+
+def is_rate_limit(error):
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status == 429 or "RateLimit" in type(error).__name__
+
+
+def retry_after(error):
+    """Seconds from a Retry-After header on the error's response, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def retry_with_backoff(fn, max_retries=5, base_delay=1.0, max_delay=60.0, on_retry=None):
+    """
+    Await fn(), retrying transient failures with exponential backoff and full jitter.
+
+    A Retry-After header from the provider takes precedence over the computed delay.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_transient(e):
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            attempt += 1
+            if on_retry:
+                on_retry(attempt, e, delay)
+            await asyncio.sleep(delay)
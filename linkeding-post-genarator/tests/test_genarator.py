@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from genarator import generate_linkedin_post_async, stream_linkedin_post
+from generate_from_json import stream_posts
+from rate_limit import RateLimiter
+
+SPEC = ("musicia", "Scattered event communication", "One platform for events", ["React", "FastAPI"])
+
+
+class RecordingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(requests_per_minute=600, tokens_per_minute=100000)
+        self.reports = []
+
+    def report_usage(self, estimated_tokens, actual_tokens):
+        self.reports.append((estimated_tokens, actual_tokens))
+        super().report_usage(estimated_tokens, actual_tokens)
+
+
+def test_async_generation_settles_token_usage_with_the_limiter():
+    limiter = RecordingLimiter()
+    post = asyncio.run(generate_linkedin_post_async(*SPEC, limiter))
+
+    assert post and post == post.strip()
+    [(estimated, actual)] = limiter.reports
+    assert estimated > 0 and actual > 0
+
+
+def test_streamed_generation_settles_token_usage_with_the_limiter():
+    limiter = RecordingLimiter()
+
+    async def collect():
+        return [piece async for piece in stream_linkedin_post(*SPEC, limiter)]
+
+    pieces = asyncio.run(collect())
+
+    assert "".join(pieces).strip()
+    [(estimated, actual)] = limiter.reports
+    assert actual > 0
+
+
+def test_stream_posts_records_a_malformed_spec_and_continues(tmp_path):
+    source, output = tmp_path / "projects.jsonl", tmp_path / "posts.jsonl"
+    spec = dict(zip(("name", "problem", "solution", "tech_stack"), SPEC))
+    source.write_text("\n".join(json.dumps(item) for item in (spec, ["not", "a", "spec"], spec)), encoding="utf-8")
+
+    stats = asyncio.run(stream_posts(str(source), str(output), requests_per_minute=0, tokens_per_minute=0))
+
+    assert (stats["specs"], stats["succeeded"], stats["failed"]) == (3, 2, 1)
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [record["index"] for record in records] == [0, 1, 2]
+    assert "JSON object" in records[1]["error"] and records[1]["spec"] == ["not", "a", "spec"]
+    assert records[2]["post"]
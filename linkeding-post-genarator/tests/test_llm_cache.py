@@ -0,0 +1,60 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+import llm_cache
+from fake_llm import FakeChatModel
+from llm_cache import SQLiteLLMCache, is_cached
+
+
+def answer(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_round_trip_and_ttl(tmp_path, monkeypatch):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.update("prompt", "model-a", answer("hello"))
+
+    assert cache.lookup("prompt", "model-a")[0].message.content == "hello"
+    assert cache.lookup("prompt", "model-b") is None
+
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 120)
+    assert not cache.contains("prompt", "model-a")
+    assert cache.lookup("prompt", "model-a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.update("first", "model", answer("1"))
+    cache.update("second", "model", answer("2"))
+    cache.lookup("first", "model")
+    cache.update("third", "model", answer("3"))
+
+    assert cache.lookup("second", "model") is None
+    assert cache.lookup("first", "model") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_refresh_and_off_modes(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "cache.sqlite"), mode="refresh")
+    cache.update("prompt", "model", answer("fresh"))
+    assert cache.lookup("prompt", "model") is None
+
+    cache.mode = "off"
+    cache.update("other", "model", answer("ignored"))
+    cache.mode = "on"
+    assert cache.lookup("prompt", "model")[0].message.content == "fresh"
+    assert cache.lookup("other", "model") is None
+
+
+def test_is_cached_matches_how_the_model_keys_its_cache(tmp_path):
+    llm = FakeChatModel(cache=SQLiteLLMCache(str(tmp_path / "cache.sqlite")))
+
+    assert not is_cached(llm, "Write a post")
+    first = asyncio.run(llm.ainvoke("Write a post"))
+    assert is_cached(llm, "Write a post")
+    assert asyncio.run(llm.ainvoke("Write a post")).content == first.content
+    assert llm.cache.stats()["hits"] == 1
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pipeline
+from pipeline import iter_posts, run_pipeline
+
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def run(*args, **kwargs):
+    # A hung pipeline fails the test instead of blocking the suite
+    return asyncio.run(asyncio.wait_for(run_pipeline(*args, **kwargs), timeout=30))
+
+
+def test_iter_posts_skips_unparsable_jsonl_lines(tmp_path):
+    source = tmp_path / "posts.jsonl"
+    write_lines(source, ['{"text": "one"}', '{"text": ', '{"text": "two"}'])
+    bad = []
+
+    posts = list(iter_posts(source, lambda number, line, error: bad.append(number)))
+
+    assert [post["text"] for post in posts] == ["one", "two"]
+    assert bad == [2]
+
+
+def test_iter_posts_reads_json_array_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "READ_BLOCK_SIZE", 16)
+    records = [{"text": f"post number {i}", "line_count": i} for i in range(50)]
+    source = tmp_path / "posts.json"
+    source.write_text(json.dumps(records, indent=2), encoding="utf-8")
+
+    assert list(iter_posts(source)) == records
+
+
+def test_malformed_records_are_dead_lettered(tmp_path):
+    source, output, dead = tmp_path / "raw.jsonl", tmp_path / "out.jsonl", tmp_path / "dead.jsonl"
+    write_lines(source, [
+        '{"text": "Shipped a new release today", "engagement": 10}',
+        '{"engagement": 3}',
+        '["not", "an", "object"]',
+        'not json at all',
+        '{"text": "Hiring backend engineers", "engagement": 7}',
+    ])
+
+    stats = run(source, output, dead, concurrency=1, requests_per_minute=0, tokens_per_minute=0)
+
+    assert stats["succeeded"] == 2
+    assert stats["invalid"] == 3
+    assert [record["text"] for record in read_jsonl(output)] == [
+        "Shipped a new release today", "Hiring backend engineers"
+    ]
+    assert len(read_jsonl(dead)) == 3
+
+
+def test_worker_survives_a_failing_pack(tmp_path, monkeypatch):
+    source, output, dead = tmp_path / "raw.jsonl", tmp_path / "out.jsonl", tmp_path / "dead.jsonl"
+    write_lines(source, [json.dumps({"text": f"post {i}"}) for i in range(6)])
+    real_extract = pipeline.extract_pack_async
+
+    async def flaky_extract(texts, *args, **kwargs):
+        if "post 2" in texts:
+            raise RuntimeError("provider exploded")
+        return await real_extract(texts, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "extract_pack_async", flaky_extract)
+
+    # One worker: if the exception killed it, the reader would block forever
+    stats = run(source, output, dead, concurrency=1, requests_per_minute=0, tokens_per_minute=0)
+
+    assert stats["succeeded"] == 5
+    assert stats["failed"] == 1
+    assert read_jsonl(dead)[0]["error"] == "provider exploded"
+
+
+def test_rerun_skips_finished_posts(tmp_path):
+    source, output, dead = tmp_path / "raw.jsonl", tmp_path / "out.jsonl", tmp_path / "dead.jsonl"
+    write_lines(source, [json.dumps({"text": f"post {i}"}) for i in range(4)])
+
+    first = run(source, output, dead, concurrency=2, requests_per_minute=0, tokens_per_minute=0)
+    second = run(source, output, dead, concurrency=2, requests_per_minute=0, tokens_per_minute=0)
+
+    assert first["succeeded"] == 4
+    assert second["skipped"] == 4 and second["succeeded"] == 0
+    assert len(read_jsonl(output)) == 4
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import llm_helper
+import preprocess
+from preprocess import content_hash, process_posts_async
+
+
+def write_posts(path, count):
+    posts = [{"text": f"Built project {i} to solve problem {i}", "engagement": i} for i in range(count)]
+    path.write_text(json.dumps(posts), encoding="utf-8")
+    return posts
+
+
+def run(*args, **kwargs):
+    kwargs.setdefault("requests_per_minute", 0)
+    kwargs.setdefault("tokens_per_minute", 0)
+    kwargs.setdefault("max_retries", 0)
+    return asyncio.run(asyncio.wait_for(process_posts_async(*args, **kwargs), timeout=30))
+
+
+def failing_on(monkeypatch, texts):
+    """Make extraction fail for the given post texts"""
+    extract = preprocess.extract_pack_async
+
+    async def extract_pack_async(posts, *args, **kwargs):
+        outcomes = await extract(posts, *args, **kwargs)
+        return [RuntimeError("extraction failed") if post in texts else outcome
+                for post, outcome in zip(posts, outcomes)]
+
+    monkeypatch.setattr(preprocess, "extract_pack_async", extract_pack_async)
+
+
+def test_failed_posts_are_recorded_and_the_rerun_resumes(tmp_path, monkeypatch):
+    source, output = tmp_path / "raw.json", tmp_path / "processed.json"
+    posts = write_posts(source, 6)
+    failing_on(monkeypatch, {posts[2]["text"]})
+
+    stats = run(source, output)
+
+    assert (stats["succeeded"], stats["failed"]) == (5, 1)
+    failed = [json.loads(line) for line in open(f"{output}.failed.jsonl", encoding="utf-8")]
+    assert [(record["index"], record["content_hash"]) for record in failed] == [(2, content_hash(posts[2]))]
+    assert len(json.loads(output.read_text(encoding="utf-8"))) == 5
+
+    monkeypatch.undo()
+    stats = run(source, output)
+
+    assert (stats["resumed"], stats["succeeded"], stats["failed"]) == (5, 1, 0)
+    assert stats["usage"]["posts"] == 1
+    assert [post["engagement"] for post in json.loads(output.read_text(encoding="utf-8"))] == list(range(6))
+    assert not (tmp_path / "processed.json.partial.jsonl").exists()
+    assert not (tmp_path / "processed.json.failed.jsonl").exists()
+
+
+def test_interrupted_partial_file_is_appended_not_truncated(tmp_path):
+    source, output = tmp_path / "raw.json", tmp_path / "processed.json"
+    posts = write_posts(source, 3)
+    partial = tmp_path / "processed.json.partial.jsonl"
+    earlier = posts[0] | {"line_count": 1, "problem": "p", "solution": "s"}
+    partial.write_text(
+        json.dumps({"index": 0, "content_hash": content_hash(posts[0]), "post": earlier}) + "\n" + '{"index": 1, "po',
+        encoding="utf-8"
+    )
+
+    stats = run(source, output)
+
+    assert (stats["resumed"], stats["succeeded"]) == (1, 2)
+    assert json.loads(output.read_text(encoding="utf-8"))[0] == earlier
+
+
+def test_cache_mode_enables_cache_when_env_turns_it_off(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(llm_helper, "LLM_CACHE", "off")
+    monkeypatch.setattr(llm_helper, "_shared", {})
+    monkeypatch.setattr(llm_helper, "_models", {})
+
+    assert llm_helper.get_llm_cache() is None
+    cache = llm_helper.set_llm_cache_mode("refresh")
+    assert cache is not None and cache.mode == "refresh"
+    assert llm_helper.get_llm_cache() is cache
+
+
+def test_malformed_answers_are_recorded_as_failures(tmp_path, monkeypatch):
+    source, output = tmp_path / "raw.json", tmp_path / "processed.json"
+    posts = write_posts(source, 4)
+    answers = {posts[1]["text"]: '["not", "an", "object"]', posts[2]["text"]: '{"problem": "p"}'}
+    invoke = preprocess.invoke_async
+
+    async def invoke_async(prompt, *args, **kwargs):
+        for text, answer in answers.items():
+            if text in prompt:
+                return answer
+        return await invoke(prompt, *args, **kwargs)
+
+    monkeypatch.setattr(preprocess, "invoke_async", invoke_async)
+    stats = run(source, output)
+
+    assert (stats["succeeded"], stats["failed"]) == (2, 2)
+    failed = [json.loads(line) for line in open(f"{output}.failed.jsonl", encoding="utf-8")]
+    assert sorted(record["index"] for record in failed) == [1, 2]
+    written = json.loads(output.read_text(encoding="utf-8"))
+    assert all(set(preprocess.METADATA_KEYS) <= set(post) for post in written)
+
+
+def test_usage_counts_single_post_calls_as_they_are_made(tmp_path):
+    source = tmp_path / "raw.json"
+    write_posts(source, 4)
+
+    unpacked = run(source, tmp_path / "unpacked.json")["usage"]
+    packed = run(source, tmp_path / "packed.json", pack_tokens=100000)["usage"]
+
+    assert unpacked["single_post_calls"] == unpacked["api_calls"] == 4
+    assert packed["single_post_calls"] == packed["fallback_posts"]
+    assert packed["api_calls"] == 1 + packed["single_post_calls"]
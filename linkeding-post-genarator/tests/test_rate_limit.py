@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+import llm_helper
+import preprocess
+from rate_limit import AdaptiveRateLimiter, RateLimiter
+
+
+@pytest.fixture
+def fresh_models(monkeypatch):
+    """Build models from scratch with a 600 rpm adaptive limiter"""
+    monkeypatch.setenv("LLM_RATE_LIMIT_RPM", "600")
+    monkeypatch.setattr(llm_helper, "_shared", {})
+    monkeypatch.setattr(llm_helper, "_models", {})
+
+
+def test_models_for_callers_with_their_own_limiter_skip_the_adaptive_one(fresh_models):
+    assert isinstance(llm_helper.get_llm().rate_limiter, AdaptiveRateLimiter)
+    assert llm_helper.get_llm(rate_limited=False).rate_limiter is None
+    assert llm_helper.get_llm(rate_limited=False) is llm_helper.get_llm(rate_limited=False)
+
+
+def test_invoke_with_a_limiter_is_throttled_once(fresh_models):
+    adaptive = llm_helper.get_metrics().limiter
+    reserved = []
+    original = adaptive._reserve
+    adaptive._reserve = lambda blocking: reserved.append(blocking) or original(blocking)
+
+    asyncio.run(preprocess.invoke_async("Extract this post", RateLimiter(600, 0)))
+    assert reserved == []
+
+    asyncio.run(preprocess.invoke_async("Extract this post"))
+    assert reserved == [True]
+
+
+def test_adaptive_limiter_halves_on_throttle_and_recovers():
+    limiter = AdaptiveRateLimiter(60)
+    limiter.throttled()
+    limiter.throttled()
+    assert limiter.rpm == 15
+    for _ in range(100):
+        limiter.throttled()
+    assert limiter.rpm == limiter.min_rpm == 6
+    for _ in range(100):
+        limiter.succeeded()
+    assert limiter.rpm == 60